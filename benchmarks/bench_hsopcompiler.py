@@ -0,0 +1,290 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Times the hot paths of AD_HSopCompiler on generated networks, using the in-memory hou stand-in of benchmarks/fakehou.
+#
+#     python benchmarks/bench_hsopcompiler.py --nodes 500 2000 5000 --depth 2 --exprs 4 --keys 3 --cross 0.3 --save baseline.json
+#     python benchmarks/bench_hsopcompiler.py --nodes 500 2000 5000 --depth 2 --exprs 4 --keys 3 --cross 0.3 --compare baseline.json
+#
+# Each configuration is run --repeat times on a fresh network and the best time of each phase is kept.
+# With --compare, the exit code is 1 if a phase is slower than its baseline by more than --tolerance.
+# With --instrument, the hou calls of one compileBlock per configuration are counted and timed per compile phase. (see AD_houInstrumentation)
+
+import typing, os, sys, json, time, random, argparse, platform
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "fakehou"))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARKS_DIR), "houdiniAutoCompileBlock", "scripts", "python"))
+
+import hou
+from ad_hsopcompiler import AD_HSopCompiler, AD_houInstrumentation
+
+PHASES = ("allNodesInBlock", "referencedNodes", "neededSpareInputs", "makeExprCompilable", "compileBlock", "recompileBlock")
+
+class AD_benchConfig():
+    """
+    The parameters of a generated network.
+
+    nodes
+    Number of nodes inside the outermost block.
+
+    depth
+    Number of nested foreach blocks.
+
+    exprs
+    Number of expression parms per node.
+
+    keys
+    Number of keyframes per expression parm. 0 makes string parms with backtick expressions instead.
+
+    cross
+    Fraction of the expressions referencing another node by path, the others reference inputs.
+
+    plain
+    Number of parms per node without expression, set to constant values. Most parms of usual nodes are like this, e.g. about 40 on an Attribute Wrangle and 90 on a PolyExtrude.
+    """
+
+    def __init__(self, nodes: int, depth: int, exprs: int, keys: int, cross: float, seed: int = 1, plain: int = 0) -> None:
+        self.nodes = nodes
+        self.depth = max(1, depth)
+        self.exprs = exprs
+        self.keys = keys
+        self.cross = cross
+        self.seed = seed
+        self.plain = plain
+
+    def key(self) -> str:
+        key = f"N{self.nodes}_D{self.depth}_E{self.exprs}_K{self.keys}_X{self.cross}"
+        if self.plain > 0:
+            key += f"_P{self.plain}"
+        return key
+
+    def asDict(self) -> dict:
+        return {"nodes": self.nodes, "depth": self.depth, "exprs": self.exprs, "keys": self.keys, "cross": self.cross, "seed": self.seed, "plain": self.plain}
+
+def buildNetwork(config: AD_benchConfig) -> tuple[hou.Node, hou.SopNode]:
+    """
+    return a new generated network and the block_end node of its outermost block.
+    """
+
+    hou.reset()
+    rand = random.Random(config.seed)
+    network = hou.createNetwork()
+
+    source = network.createNode("grid")
+    externals = [network.createNode("box") for i in range(4)]
+    blockNodes: list[hou.SopNode] = []
+    blockEnds: list[hou.SopNode] = []
+    previous = source
+
+    for level in range(config.depth):
+        blockBegin = network.createNode("block_begin")
+        blockEnd = network.createNode("block_end")
+        blockBegin.parm("blockpath").set(blockBegin.relativePathTo(blockEnd))
+        blockBegin.setInput(0, previous)
+        blockEnds.append(blockEnd)
+        previous = blockBegin
+
+        levelNodes = config.nodes // config.depth + (1 if level < config.nodes % config.depth else 0)
+        for i in range(levelNodes):
+            node = network.createNode("xform")
+            node.setInput(0, previous)
+            for j in range(config.exprs):
+                addExpression(node, j, config, rand, blockNodes + externals)
+            for j in range(config.plain):
+                addPlainParm(node, j)
+            blockNodes.append(node)
+            previous = node
+
+    for blockEnd in reversed(blockEnds):
+        blockEnd.setInput(0, previous)
+        previous = blockEnd
+
+    return network, blockEnds[0]
+
+def addExpression(node: hou.SopNode, index: int, config: AD_benchConfig, rand: random.Random, targets: list[hou.SopNode]):
+    """
+    Adds an expression parm to "node", keyframed if config.keys > 0.
+    """
+
+    def expression() -> str:
+        if rand.random() < config.cross and len(targets) > 0:
+            target = rand.choice(targets)
+            return f'point("../{target.name()}", 0, "P", 0) * detail("../{target.name()}", "scale", 0) + $F * 0.5'
+        return f'npoints(0) + bbox(0, D_XMAX) * fit01(rand($PT), 0.2, 1.5) + detail(0, "id", 0)'
+
+    name = f"bench_expr{index}"
+    if config.keys > 0:
+        node.addSpareParmTuple(hou.FloatParmTemplate(name, name))
+        parm = node.parm(name)
+        for key in range(config.keys):
+            parm.setKeyframe(hou.Keyframe(key * 10.0, expression()))
+    else:
+        node.addSpareParmTuple(hou.StringParmTemplate(name, name))
+        node.parm(name).set(f"piece_`{expression()}`_`{expression()}`")
+
+def addPlainParm(node: hou.SopNode, index: int):
+    """
+    Adds a parm set to a constant value to "node", alternately a float, an int and a string.
+    """
+
+    name = f"bench_plain{index}"
+    if index % 3 == 0:
+        node.addSpareParmTuple(hou.FloatParmTemplate(name, name))
+        node.parm(name).set(index * 0.5)
+    elif index % 3 == 1:
+        node.addSpareParmTuple(hou.IntParmTemplate(name, name))
+        node.parm(name).set(index)
+    else:
+        node.addSpareParmTuple(hou.StringParmTemplate(name, name))
+        node.parm(name).set(f"@class=={index}")
+
+def runPhases(config: AD_benchConfig, analysisWorkers: int = 1) -> dict[str, float]:
+    """
+    return the duration in seconds of each phase in PHASES, on a fresh network.
+    The parms texts are analysed by "analysisWorkers" processes. (see AD_HSopCompiler.prefetchAnalysis())
+    """
+
+    network, blockEnd = buildNetwork(config)
+    compiler = AD_HSopCompiler(analysisWorkers=analysisWorkers)
+    timings: dict[str, float] = {}
+
+    startTime = time.perf_counter()
+    blockNodes = compiler.allNodesInBlock(blockEnd)
+    timings["allNodesInBlock"] = time.perf_counter() - startTime
+
+    startTime = time.perf_counter()
+    for node in blockNodes:
+        compiler.referencedNodes(node)
+    timings["referencedNodes"] = time.perf_counter() - startTime
+
+    startTime = time.perf_counter()
+    neededSpareInputs = {node: compiler.neededSpareInputs(node) for node in blockNodes}
+    timings["neededSpareInputs"] = time.perf_counter() - startTime
+
+    startTime = time.perf_counter()
+    for node in blockNodes:
+        for parm in node.parms():
+            for expr in compiler.exprsInParm(parm):
+                compiler.makeExprCompilable(parm, expr, neededSpareInputs[node])
+    timings["makeExprCompilable"] = time.perf_counter() - startTime
+
+    startTime = time.perf_counter()
+    compiler.compileBlock(blockEnd)
+    timings["compileBlock"] = time.perf_counter() - startTime
+
+    # Compiling the unchanged block again
+    startTime = time.perf_counter()
+    compiler.compileBlock(blockEnd)
+    timings["recompileBlock"] = time.perf_counter() - startTime
+
+    return timings
+
+def benchmark(config: AD_benchConfig, repeat: int, analysisWorkers: int = 1) -> dict[str, float]:
+    """
+    return the best duration of each phase over "repeat" runs.
+    """
+
+    best: dict[str, float] = {}
+    for i in range(max(1, repeat)):
+        for phase, seconds in runPhases(config, analysisWorkers).items():
+            best[phase] = min(seconds, best.get(phase, seconds))
+
+    return best
+
+def instrument(config: AD_benchConfig) -> AD_houInstrumentation:
+    """
+    return the hou calls instrumentation of a compileBlock on a fresh network.
+    """
+
+    network, blockEnd = buildNetwork(config)
+    compiler = AD_HSopCompiler()
+    with AD_houInstrumentation(compiler) as instrumentation:
+        compiler.compileBlock(blockEnd)
+
+    return instrumentation
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    return the description of each phase of "results" slower than in "baseline" by more than "tolerance" (0.25 = 25%).
+    """
+
+    regressions: list[str] = []
+    for key, result in results.items():
+        baselinePhases = baseline.get("results", {}).get(key, {}).get("phases")
+        if baselinePhases == None:
+            continue
+        for phase, seconds in result["phases"].items():
+            reference = baselinePhases.get(phase)
+            if reference != None and reference > 0 and seconds > reference * (1 + tolerance):
+                regressions.append(f"{key} {phase} : {seconds*1000:.1f}ms instead of {reference*1000:.1f}ms (+{(seconds/reference-1)*100:.0f}%)")
+
+    return regressions
+
+def main(argv: typing.Union[list[str], None] = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of AD_HSopCompiler on generated networks.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 500, 2000], help="numbers of nodes in the block, one benchmark per value")
+    parser.add_argument("--depth", type=int, default=2, help="number of nested foreach blocks")
+    parser.add_argument("--exprs", type=int, default=4, help="number of expression parms per node")
+    parser.add_argument("--keys", type=int, default=0, help="number of keyframes per expression parm, 0 for backtick string parms")
+    parser.add_argument("--cross", type=float, default=0.3, help="fraction of the expressions referencing another node by path")
+    parser.add_argument("--plain", type=int, default=0, help="number of parms without expression per node")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the network generation")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per configuration, the best time is kept")
+    parser.add_argument("--save", default=None, help="JSON file where the results are saved as a baseline")
+    parser.add_argument("--compare", default=None, help="baseline JSON file to compare the results to")
+    parser.add_argument("--analysis-workers", type=int, default=1, help="processes analysing the parms texts, compared to 1 when above (default : 1)")
+    parser.add_argument("--instrument", action="store_true", help="prints the hou calls made by compileBlock per compile phase")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline (default : 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results: dict[str, dict] = {}
+    print(f"{'configuration':<32}" + "".join(f"{phase:>20}" for phase in PHASES))
+    for nodes in args.nodes:
+        config = AD_benchConfig(nodes, args.depth, args.exprs, args.keys, args.cross, args.seed, args.plain)
+        phases = benchmark(config, args.repeat)
+        results[config.key()] = {"config": config.asDict(), "phases": phases}
+        print(f"{config.key():<32}" + "".join(f"{phases[phase]*1000:>18.1f}ms" for phase in PHASES))
+        if args.analysis_workers > 1:
+            key = f"{config.key()}_W{args.analysis_workers}"
+            phases = benchmark(config, args.repeat, args.analysis_workers)
+            results[key] = {"config": dict(config.asDict(), analysisWorkers=args.analysis_workers), "phases": phases}
+            print(f"{key:<32}" + "".join(f"{phases[phase]*1000:>18.1f}ms" for phase in PHASES))
+        if args.instrument == True:
+            instrumentation = instrument(config)
+            results[config.key()]["houCalls"] = instrumentation.report()
+            print(instrumentation)
+
+    if args.save != None:
+        with open(args.save, "w") as file:
+            json.dump({"python": platform.python_version(), "machine": platform.node(), "results": results}, file, indent=4)
+
+    if args.compare != None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression : {regression}")
+        if len(regressions) > 0:
+            return 1
+        print("No regression against the baseline.")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
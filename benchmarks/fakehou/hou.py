@@ -0,0 +1,751 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# In-memory stand-in for the parts of the hou module used by ad_hsopcompiler.
+# Only meant for benchmarks and tests : nodes, parms, keyframes and wiring behave like Houdini's.
+# Cooking is simulated : a cook sleeps for the cook times set with Node.setCookTime() of the nodes it depends on.
+# Compilable nodes between a compile_end and its compile_begin nodes cook COMPILED_SPEEDUP times faster, unless one of them has no verb.
+
+import os, time, contextlib, posixpath
+
+COMPILED_SPEEDUP = 4.0
+
+
+class parmTemplateType():
+    Int = "Int"
+    Float = "Float"
+    String = "String"
+    Toggle = "Toggle"
+    Menu = "Menu"
+    Button = "Button"
+    FolderSet = "FolderSet"
+    Folder = "Folder"
+    Separator = "Separator"
+    Label = "Label"
+    Ramp = "Ramp"
+    Data = "Data"
+
+
+class stringParmType():
+    Regular = "Regular"
+    FileReference = "FileReference"
+    NodeReference = "NodeReference"
+    NodeReferenceList = "NodeReferenceList"
+
+
+class exprLanguage():
+    Hscript = "Hscript"
+    Python = "Python"
+
+
+class Error(Exception):
+    pass
+
+
+class OperationFailed(Error):
+    pass
+
+
+class ParmTemplate():
+
+    def __init__(self, name, label="", num_components=1, parm_type=parmTemplateType.Float, default_value=(0,), **kwargs) -> None:
+        self._name = name
+        self._label = label
+        self._numComponents = num_components
+        self._type = parm_type
+        self._default = tuple(default_value)
+        self._kwargs = kwargs
+
+    def name(self):
+        return self._name
+
+    def setName(self, name):
+        self._name = name
+
+    def label(self):
+        return self._label
+
+    def setLabel(self, label):
+        self._label = label
+
+    def type(self):
+        return self._type
+
+    def numComponents(self):
+        return self._numComponents
+
+    def defaultValue(self):
+        return self._default
+
+    def defaultExpression(self):
+        return tuple(self._kwargs.get("default_expression", ("",) * self._numComponents))
+
+    def clone(self):
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone._kwargs = dict(self._kwargs)
+        return clone
+
+
+class FloatParmTemplate(ParmTemplate):
+
+    def __init__(self, name, label="", num_components=1, default_value=(0.0,), **kwargs) -> None:
+        super().__init__(name, label, num_components, parmTemplateType.Float, default_value, **kwargs)
+
+
+class IntParmTemplate(ParmTemplate):
+
+    def __init__(self, name, label="", num_components=1, default_value=(0,), **kwargs) -> None:
+        super().__init__(name, label, num_components, parmTemplateType.Int, default_value, **kwargs)
+
+
+class StringParmTemplate(ParmTemplate):
+
+    def __init__(self, name, label="", num_components=1, string_type=stringParmType.Regular, default_value=("",), **kwargs) -> None:
+        super().__init__(name, label, num_components, parmTemplateType.String, default_value, **kwargs)
+        self._stringType = string_type
+
+    def stringType(self):
+        return self._stringType
+
+
+class ParmTemplateGroup():
+
+    def __init__(self, templates=()) -> None:
+        self._templates = list(templates)
+
+    def append(self, template):
+        self._templates.append(template)
+
+    def addParmTemplate(self, template):
+        self._templates.append(template)
+
+    def parmTemplates(self):
+        return tuple(self._templates)
+
+    def entriesWithoutFolders(self):
+        return tuple(template for template in self._templates if template.type() not in (parmTemplateType.Folder, parmTemplateType.FolderSet))
+
+    def find(self, name):
+        for template in self._templates:
+            if template.name() == name:
+                return template
+        return None
+
+
+class Keyframe():
+
+    def __init__(self, frame=0.0, expression=None, language=exprLanguage.Hscript) -> None:
+        self._frame = frame
+        self._expression = expression
+        self._language = language
+
+    def frame(self):
+        return self._frame
+
+    def setFrame(self, frame):
+        self._frame = frame
+
+    def expression(self):
+        return self._expression
+
+    def setExpression(self, expression, language=None):
+        self._expression = expression
+        if language != None:
+            self._language = language
+
+    def expressionLanguage(self):
+        return self._language
+
+    def isExpressionSet(self):
+        return self._expression != None
+
+
+class StringKeyframe(Keyframe):
+    pass
+
+
+class NodeConnection():
+
+    def __init__(self, inputNode, outputIndex, outputNode, inputIndex) -> None:
+        self._inputNode = inputNode
+        self._outputIndex = outputIndex
+        self._outputNode = outputNode
+        self._inputIndex = inputIndex
+
+    def inputNode(self):
+        return self._inputNode
+
+    def outputIndex(self):
+        return self._outputIndex
+
+    def outputNode(self):
+        return self._outputNode
+
+    def inputIndex(self):
+        return self._inputIndex
+
+    def __repr__(self) -> str:
+        return f"<hou.NodeConnection {self._inputNode} -> {self._outputNode}[{self._inputIndex}]>"
+
+
+class Parm():
+
+    def __init__(self, node, template, value=None) -> None:
+        self._node = node
+        self._template = template
+        self._value = template.defaultValue()[0] if value == None else value
+        self._keyframes = []
+        self._language = exprLanguage.Hscript
+        self._tuple = ParmTuple(self)
+
+    def name(self):
+        return self._template.name()
+
+    def node(self):
+        return self._node
+
+    def path(self):
+        return self._node.path() + "/" + self.name()
+
+    def parmTemplate(self):
+        return self._template
+
+    def rawValue(self):
+        if len(self._keyframes) > 0:
+            return self._keyframes[0].expression()
+        return str(self._value)
+
+    def unexpandedString(self):
+        return self.rawValue()
+
+    def eval(self):
+        return self._value
+
+    def evalAsString(self):
+        return str(self._value)
+
+    def evalAsNode(self):
+        return self._node.node(str(self._value))
+
+    def set(self, value):
+        self._value = value
+
+    def keyframes(self):
+        return tuple(self._keyframes)
+
+    def isAtDefault(self, compare_temporary_defaults=True, compare_expressions=False):
+        return len(self._keyframes) == 0 and self._value == self._template.defaultValue()[0]
+
+    def tuple(self):
+        return self._tuple
+
+    def setKeyframe(self, key):
+        for i, existing in enumerate(self._keyframes):
+            if existing.frame() == key.frame():
+                self._keyframes[i] = key
+                return
+        self._keyframes.append(key)
+
+    def setExpression(self, expression, language=None):
+        self.setKeyframe(Keyframe(0.0, expression, language or exprLanguage.Hscript))
+
+    def expressionLanguage(self):
+        if len(self._keyframes) > 0:
+            return self._keyframes[0].expressionLanguage()
+        return self._language
+
+    def isSpare(self):
+        return self._template.name() in self._node._spareNames
+
+    def __repr__(self) -> str:
+        return f"<hou.Parm {self.name()} in {self._node.path()}>"
+
+
+class ParmTuple():
+    """
+    The parms of the stand-in all have one component, so a tuple holds a single parm.
+    """
+
+    def __init__(self, parm) -> None:
+        self._parm = parm
+
+    def name(self):
+        return self._parm.name()
+
+    def node(self):
+        return self._parm.node()
+
+    def parmTemplate(self):
+        return self._parm._template
+
+    def isAtDefault(self, compare_temporary_defaults=True, compare_expressions=False):
+        return self._parm.isAtDefault(compare_temporary_defaults, compare_expressions)
+
+    def __iter__(self):
+        return iter((self._parm,))
+
+    def __getitem__(self, index):
+        return (self._parm,)[index]
+
+    def __len__(self):
+        return 1
+
+    def __repr__(self) -> str:
+        return f"<hou.ParmTuple {self.name()} in {self._parm.node().path()}>"
+
+
+class NodeType():
+
+    def __init__(self, name, version="") -> None:
+        self._name = name
+        self._version = version
+
+    def name(self):
+        return self._name
+
+    def nameComponents(self):
+        return ("", "", self._name, self._version)
+
+    def definition(self):
+        return None
+
+    def category(self):
+        return _sopCategory
+
+    def parmTemplateGroup(self):
+        return ParmTemplateGroup(_typeParms.get(self._name, _defaultParms)())
+
+
+class SopNodeType(NodeType):
+    pass
+
+
+class NodeTypeCategory():
+
+    def __init__(self, verbs) -> None:
+        self._verbs = verbs
+
+    def nodeVerb(self, name):
+        return name if name in self._verbs else None
+
+    def nodeVerbs(self):
+        return {name: name for name in self._verbs}
+
+
+# Default parms per node type : name -> template
+def _nodeRef(name):
+    return StringParmTemplate(name, name, 1, string_type=stringParmType.NodeReference, default_value=("",))
+
+_typeParms = {
+    "block_begin": lambda: [StringParmTemplate("method", "Method", default_value=("feedback",)), _nodeRef("blockpath"), StringParmTemplate("resetcookpass", "Reset")],
+    "block_end": lambda: [IntParmTemplate("itermethod", "Iteration Method", default_value=(1,)), IntParmTemplate("iterations", "Iterations", default_value=(10,)), IntParmTemplate("method", "Gather Method", default_value=(1,)), ToggleParmTemplate("multithread", "Multithread"), _nodeRef("blockpath"), _nodeRef("templatepath"), StringParmTemplate("attrib", "Piece Attribute", default_value=("class",))],
+    "compile_begin": lambda: [_nodeRef("blockpath")],
+    "compile_end": lambda: [],
+    "object_merge": lambda: [StringParmTemplate("objpath1", "Object 1", string_type=stringParmType.NodeReference)],
+    "attribwrangle": lambda: [StringParmTemplate("snippet", "VEXpression"), StringParmTemplate("group", "Group"), IntParmTemplate("class", "Run Over")],
+}
+
+class ToggleParmTemplate(ParmTemplate):
+
+    def __init__(self, name, label="", default_value=False, **kwargs) -> None:
+        super().__init__(name, label, 1, parmTemplateType.Toggle, (default_value,), **kwargs)
+
+_defaultParms = lambda: [FloatParmTemplate("tx", "Translate"), FloatParmTemplate("ty", "Translate"), StringParmTemplate("group", "Group")]
+
+_sopVerbs = {"null", "xform", "transform", "attribwrangle", "pointwrangle", "block_begin", "block_end", "compile_begin", "compile_end", "grid", "box", "merge", "polyextrude", "object_merge", "color"}
+_sopCategory = NodeTypeCategory(_sopVerbs)
+
+def sopNodeTypeCategory():
+    return _sopCategory
+
+
+class Node():
+
+    _sessionCounter = 0
+
+    def __init__(self, name, parent, typeName) -> None:
+        Node._sessionCounter += 1
+        self._sessionId = Node._sessionCounter
+        self._name = name
+        self._parent = parent
+        self._type = SopNodeType(typeName)
+        self._children = {}
+        self._inputs = []
+        self._userData = {}
+        self._spareNames = set()
+        self._parms = {}
+        self._cookTime = 0.0
+        self._warnings = ()
+        self._position = (0, 0)
+        for template in _typeParms.get(typeName, _defaultParms)():
+            self._parms[template.name()] = Parm(self, template)
+
+    # Hierarchy
+    def name(self):
+        return self._name
+
+    def path(self):
+        if self._parent == None:
+            return "/"
+        parentPath = self._parent.path()
+        return ("" if parentPath == "/" else parentPath) + "/" + self._name
+
+    def parent(self):
+        return self._parent
+
+    def children(self):
+        return tuple(self._children.values())
+
+    def allSubChildren(self, top_down=True, recurse_in_locked_nodes=True):
+        result = []
+        for child in self._children.values():
+            result.append(child)
+            result.extend(child.allSubChildren())
+        return tuple(result)
+
+    def isNetwork(self):
+        return True
+
+    def sessionId(self):
+        return self._sessionId
+
+    def type(self):
+        return self._type
+
+    def node(self, path):
+        if path == None or path == "":
+            return None
+        if path.startswith("/"):
+            return node(path)
+        current = self
+        for part in path.split("/"):
+            if part in ("", "."):
+                continue
+            if part == "..":
+                current = current._parent
+            else:
+                current = current._children.get(part)
+            if current == None:
+                return None
+        return current
+
+    def relativePathTo(self, other):
+        return posixpath.relpath(other.path(), self.path())
+
+    def createNode(self, typeName, node_name=None):
+        if node_name == None:
+            index = 1
+            while f"{typeName}{index}" in self._children:
+                index += 1
+            node_name = f"{typeName}{index}"
+        child = SopNode(node_name, self, typeName)
+        self._children[node_name] = child
+        return child
+
+    def destroy(self):
+        for child in list(self.outputs()):
+            for i, input in enumerate(child._inputs):
+                if input != None and input[0] is self:
+                    child._inputs[i] = None
+        del self._parent._children[self._name]
+
+    # Wiring
+    def setInput(self, index, inputNode, outputIndex=0):
+        while len(self._inputs) <= index:
+            self._inputs.append(None)
+        self._inputs[index] = None if inputNode == None else (inputNode, outputIndex)
+
+    def input(self, index):
+        if index < 0 or index >= len(self._inputs) or self._inputs[index] == None:
+            return None
+        return self._inputs[index][0]
+
+    def inputs(self):
+        return tuple(None if input == None else input[0] for input in self._inputs)
+
+    def inputConnections(self):
+        return tuple(NodeConnection(input[0], input[1], self, i) for i, input in enumerate(self._inputs) if input != None)
+
+    def inputConnectors(self):
+        return tuple((() if input == None else (NodeConnection(input[0], input[1], self, i),)) for i, input in enumerate(self._inputs))
+
+    def outputs(self):
+        result = []
+        if self._parent == None:
+            return ()
+        for sibling in self._parent._children.values():
+            for input in sibling._inputs:
+                if input != None and input[0] is self and sibling not in result:
+                    result.append(sibling)
+        return tuple(result)
+
+    def outputConnections(self):
+        result = []
+        for sibling in self._parent._children.values():
+            for i, input in enumerate(sibling._inputs):
+                if input != None and input[0] is self:
+                    result.append(NodeConnection(self, input[1], sibling, i))
+        return tuple(result)
+
+    def dependents(self, include_children=True):
+        return tuple(sibling for sibling in self._parent._children.values() if sibling is not self)
+
+    def moveToGoodPosition(self, relative_to_inputs=True, move_inputs=True, move_outputs=True, move_unconnected=True):
+        return self._position
+
+    def layoutChildren(self, items=(), horizontal_spacing=-1.0, vertical_spacing=-1.0):
+        pass
+
+    # Parms
+    def parm(self, name):
+        if name.startswith("./"):
+            name = name[2:]
+        return self._parms.get(name)
+
+    def parms(self):
+        return tuple(self._parms.values())
+
+    def parmTuples(self):
+        return tuple(parm._tuple for parm in self._parms.values())
+
+    def spareParms(self):
+        return tuple(parm for name, parm in self._parms.items() if name in self._spareNames)
+
+    def evalParm(self, name):
+        return self.parm(name).eval()
+
+    def addSpareParmTuple(self, template, in_folder=(), create_missing_folders=False):
+        if template.name() in self._parms:
+            raise OperationFailed(f"parm {template.name()} already exists")
+        self._parms[template.name()] = Parm(self, template)
+        self._spareNames.add(template.name())
+
+    def parmTemplateGroup(self):
+        return ParmTemplateGroup(parm.parmTemplate() for parm in self._parms.values())
+
+    def setParmTemplateGroup(self, group, rename_conflicting_parms=False):
+        for template in group.parmTemplates():
+            if template.name() not in self._parms:
+                self._parms[template.name()] = Parm(self, template)
+                self._spareNames.add(template.name())
+
+    def parmsReferencingThis(self):
+        result = []
+        for sibling in self._parent._children.values():
+            for parm in sibling._parms.values():
+                template = parm.parmTemplate()
+                if template.type() == parmTemplateType.String and template.stringType() == stringParmType.NodeReference:
+                    if sibling.node(parm.rawValue()) is self:
+                        result.append(parm)
+        return tuple(result)
+
+    # User data
+    def userData(self, name):
+        return self._userData.get(name)
+
+    def setUserData(self, name, value):
+        self._userData[name] = value
+
+    def destroyUserData(self, name, must_exist=True):
+        self._userData.pop(name, None)
+
+    # Cooking
+    def setCookTime(self, seconds):
+        """
+        Not in hou : sets the simulated time "self" takes to cook.
+        """
+
+        self._cookTime = seconds
+
+    def cook(self, force=False, frame_range=()):
+        seconds = 0.0
+        # compile_end -> nodes cooked by it
+        regions = {}
+        visited = set()
+        pending = [(self, None)]
+        while len(pending) > 0:
+            node, compileEnd = pending.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+
+            typeName = node.type().name()
+            if typeName == "compile_end" and compileEnd == None:
+                compileEnd = node
+            if compileEnd != None:
+                regions.setdefault(compileEnd, []).append(node)
+            else:
+                seconds += node._cookTime
+
+            for input in node.inputs():
+                if input != None:
+                    pending.append((input, None if typeName == "compile_begin" else compileEnd))
+
+        for compileEnd, nodes in regions.items():
+            regionSeconds = sum(node._cookTime for node in nodes)
+            notCompilable = [node for node in nodes if _sopCategory.nodeVerb(node.type().name()) == None]
+            if len(notCompilable) > 0:
+                compileEnd._warnings = tuple(f"Unable to compile : {node.path()} is not compilable" for node in notCompilable)
+                seconds += regionSeconds
+            else:
+                compileEnd._warnings = ()
+                seconds += regionSeconds / COMPILED_SPEEDUP
+
+        time.sleep(seconds)
+
+    def errors(self):
+        return ()
+
+    def warnings(self):
+        return self._warnings
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and other._sessionId == self._sessionId
+
+    def __hash__(self):
+        return self._sessionId
+
+    def __repr__(self) -> str:
+        return f"<hou.SopNode at {self.path()}>"
+
+
+class SopNode(Node):
+    pass
+
+
+_root = Node("", None, "root")
+_root._parms = {}
+
+
+def node(path):
+    if path == None or not path.startswith("/"):
+        return None
+    current = _root
+    for part in path.split("/"):
+        if part == "":
+            continue
+        current = current._children.get(part)
+        if current == None:
+            return None
+    return current
+
+
+def parm(path):
+    nodePath, name = posixpath.split(path)
+    owner = node(nodePath)
+    if owner == None:
+        return None
+    return owner.parm(name)
+
+
+def pwd():
+    return _root
+
+
+_frame = 1.0
+
+def frame():
+    return _frame
+
+
+def setFrame(frame):
+    global _frame
+    _frame = frame
+
+
+def reset():
+    """
+    Clears the scene.
+    """
+
+    _root._children.clear()
+
+
+def createNetwork(name="geo1", parentName="obj"):
+    """
+    return a new empty network at /parentName/name.
+    """
+
+    parent = _root._children.get(parentName)
+    if parent == None:
+        parent = Node(parentName, _root, "objnet")
+        _root._children[parentName] = parent
+    network = Node(name, parent, "geo")
+    parent._children[name] = network
+    return network
+
+
+class _undos():
+
+    def __init__(self) -> None:
+        self.groups = []
+        self.labels = []
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def group(self, label):
+        # Nested groups are part of the outermost one
+        self.groups.append(label)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.labels.insert(0, label)
+
+    def areEnabled(self):
+        return True
+
+    def undoLabels(self):
+        return tuple(self.labels)
+
+    def performUndo(self):
+        if len(self.labels) > 0:
+            self.labels.pop(0)
+
+    @contextlib.contextmanager
+    def disabler(self):
+        yield
+
+undos = _undos()
+
+
+class hipFile():
+    """
+    The stand-in can not read scenes : loading a file keeps the current scene, saving writes its node paths.
+    """
+
+    _path = "untitled.hip"
+
+    @staticmethod
+    def load(path, suppress_save_prompt=False, ignore_load_warnings=False):
+        if not os.path.exists(path):
+            raise OperationFailed(f"Unable to open file: {path}")
+        hipFile._path = path
+
+    @staticmethod
+    def save(file_name=None, save_to_recent_files=True):
+        if file_name != None:
+            hipFile._path = file_name
+        with open(hipFile._path, "w") as file:
+            file.write("\n".join(node.path() for node in _root.allSubChildren()))
+
+    @staticmethod
+    def path():
+        return hipFile._path
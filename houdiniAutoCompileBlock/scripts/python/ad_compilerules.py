@@ -0,0 +1,185 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Tells which Sop node types can be inside a compile block.
+
+import typing, os, json, warnings
+
+# Environment variable listing JSON rule files loaded in compileRules, separated by os.pathsep
+RULES_ENV: str = "HOUDINI_AUTOCOMPILEBLOCK_RULES"
+
+# node type name -> (compilable, reason)
+# Types without a rule are compilable if they have a verb. (see AD_compileRules.rule())
+DEFAULT_COMPILE_RULES: dict[str, tuple[bool, str]] = {
+    "block_begin": (True, ""),
+    "block_end": (True, ""),
+    "compile_begin": (True, ""),
+    "compile_end": (True, ""),
+    "python": (False, "Python SOPs run Python code when cooking, they can not be compiled"),
+}
+
+class AD_compileRule(typing.NamedTuple):
+    """
+    Whether the nodes of a type can be compiled, and why not.
+    """
+
+    compilable: bool
+    reason: str
+
+class AD_compileBlocker(typing.NamedTuple):
+    """
+    A node preventing its block from being compiled.
+    """
+
+    node: str
+    type: str
+    reason: str
+
+class AD_compileRules():
+    """
+    A table of the Sop node types which can or can not be compiled : node type name -> AD_compileRule.
+    Rules are looked up with the full type name first ("studio::mytool::2.0"), then without its version ("studio::mytool").
+    Types without a rule are compilable if they have a verb, when "useVerbs" is True. The rule of each type is cached.
+
+    Studios can add rules for their HDAs from Python or from a JSON file :
+        from ad_compilerules import compileRules
+        compileRules.register("studio::mytool::2.0", False, "reads files at cook time")
+        compileRules.load("studio_rules.json")
+    """
+
+    def __init__(self, rules: typing.Union[typing.Mapping[str, tuple[bool, str]], None] = None, useVerbs=True) -> None:
+        self._rules: dict[str, AD_compileRule] = {}
+        # node type name -> rule, for the types already checked
+        self._typeRules: dict[str, AD_compileRule] = {}
+        self.useVerbs: bool = useVerbs
+        if rules != None:
+            for typeName, (compilable, reason) in rules.items():
+                self.register(typeName, compilable, reason)
+
+    def register(self, typeName: str, compilable: bool, reason: str = ""):
+        """
+        Registers whether the nodes of type "typeName", with or without its version, can be compiled. "reason" explains why not.
+        Replaces the rule already registered for "typeName".
+        """
+
+        if compilable.__class__ != bool:
+            raise ValueError(f"{typeName} : compilable must be True or False, not {compilable!r}")
+        if compilable == False and reason == "":
+            reason = "not compilable"
+
+        self._rules[typeName] = AD_compileRule(compilable, reason)
+        self._typeRules.clear()
+
+    def unregister(self, typeName: str):
+        """
+        Removes the rule of "typeName" from the table.
+        """
+
+        self._rules.pop(typeName, None)
+        self._typeRules.clear()
+
+    def load(self, path: str):
+        """
+        Registers the rules of the JSON file "path" :
+            {
+                "studio::mytool::2.0": {"compilable": false, "reason": "reads files at cook time"},
+                "studio::scatter": {"compilable": true}
+            }
+        Raises OSError if the file can not be read, ValueError if it is not valid. Nothing is registered then.
+        """
+
+        with open(path) as file:
+            rules = json.load(file)
+
+        if rules.__class__ != dict:
+            raise ValueError(f"{path} : the rules must be a JSON object")
+        for typeName, rule in rules.items():
+            if rule.__class__ != dict or "compilable" not in rule:
+                raise ValueError(f"{path} : {typeName} rule must be an object with a compilable key")
+            if rule["compilable"].__class__ != bool:
+                raise ValueError(f"{path} : {typeName} compilable must be true or false, not {rule['compilable']!r}")
+
+        for typeName, rule in rules.items():
+            self.register(typeName, rule["compilable"], rule.get("reason", ""))
+
+    def loadFiles(self, paths: typing.Iterable[str]) -> tuple[str]:
+        """
+        Registers the rules of each JSON file of "paths". (see self.load())
+        A file which can not be read or is not valid is skipped with a warning, the other files are still loaded.
+        return the paths of the loaded files.
+        """
+
+        loaded: list[str] = []
+        for path in paths:
+            try:
+                self.load(path)
+            except (OSError, ValueError) as error:
+                warnings.warn(f"Compile rules file skipped : {path} : {error}")
+                continue
+            loaded.append(path)
+
+        return tuple(loaded)
+
+    def rule(self, nodeType: "hou.NodeType") -> AD_compileRule:
+        """
+        return the AD_compileRule of "nodeType".
+        """
+
+        typeName: str = nodeType.name()
+        rule = self._typeRules.get(typeName)
+        if rule != None:
+            return rule
+
+        scope, namespace, name, version = nodeType.nameComponents()
+        rule = self._rules.get(typeName)
+        if rule == None:
+            rule = self._rules.get("::".join(part for part in (namespace, name) if part != ""))
+        if rule == None:
+            if self.useVerbs == True and nodeType.category().nodeVerb(typeName) == None:
+                rule = AD_compileRule(False, "has no verb, it can not be compiled")
+            else:
+                rule = AD_compileRule(True, "")
+
+        self._typeRules[typeName] = rule
+
+        return rule
+
+    def blockers(self, nodes: typing.Iterable["hou.Node"]) -> tuple[AD_compileBlocker]:
+        """
+        return an AD_compileBlocker for each node of "nodes" whose type can not be compiled.
+        """
+
+        blockers: list[AD_compileBlocker] = []
+        for node in nodes:
+            rule = self.rule(node.type())
+            if rule.compilable == False:
+                blockers.append(AD_compileBlocker(node.path(), node.type().name(), rule.reason))
+
+        return tuple(blockers)
+
+    def __contains__(self, typeName: str) -> bool:
+        return typeName in self._rules
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._rules)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+# Shared default table, used by AD_HSopCompiler
+compileRules = AD_compileRules(DEFAULT_COMPILE_RULES)
+compileRules.loadFiles(rulesPath for rulesPath in os.environ.get(RULES_ENV, "").split(os.pathsep) if rulesPath != "")
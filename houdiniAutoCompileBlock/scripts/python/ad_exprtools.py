@@ -0,0 +1,877 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import typing, re, ast, functools, concurrent.futures
+
+# Hscript function name -> positions of its arguments referencing a geometry (a node path or an input number)
+HSCRIPT_GEOMETRY_FUNCTIONS: dict[str, tuple[int]] = {
+    "arclen": (0,),
+    "arclenD": (0,),
+    "attriblist": (0,),
+    "bbox": (0,),
+    "centroid": (0,),
+    "curvature": (0,),
+    "degree": (0,),
+    "detail": (0,),
+    "detailattriblist": (0,),
+    "detailattribsize": (0,),
+    "detailattribtype": (0,),
+    "details": (0,),
+    "detailsmap": (0,),
+    "detailsnummap": (0,),
+    "detailvals": (0,),
+    "edgegrouplist": (0,),
+    "edgegroupmask": (0,),
+    "groupbyval": (0,),
+    "groupbyvals": (0,),
+    "hasdetailattrib": (0,),
+    "haspoint": (1,),
+    "haspointattrib": (0,),
+    "hasprim": (1,),
+    "hasprimattrib": (0,),
+    "hasvertexattrib": (0,),
+    "isclosed": (0,),
+    "iscollided": (0,),
+    "isspline": (0,),
+    "isstuck": (0,),
+    "iswrapu": (0,),
+    "iswrapv": (0,),
+    "listbyval": (0,),
+    "listbyvals": (0,),
+    "metaweight": (0,),
+    "mindist": (0, 2),
+    "nearpoint": (0,),
+    "normal": (0,),
+    "npoints": (0,),
+    "npointsgroup": (0,),
+    "nprims": (0,),
+    "nprimsgroup": (0,),
+    "nuniquevals": (0,),
+    "nvertices": (0,),
+    "nverticesgroup": (0,),
+    "point": (0,),
+    "pointattriblist": (0,),
+    "pointattribsize": (0,),
+    "pointattribtype": (0,),
+    "pointavg": (0,),
+    "pointdist": (0, 2),
+    "pointgrouplist": (0,),
+    "pointgroupmask": (0,),
+    "pointlist": (0,),
+    "pointneighbours": (0,),
+    "pointpattern": (0,),
+    "points": (0,),
+    "pointsmap": (0,),
+    "pointsnummap": (0,),
+    "pointvals": (0,),
+    "prim": (0,),
+    "primattriblist": (0,),
+    "primattribsize": (0,),
+    "primattribtype": (0,),
+    "primdist": (0, 2),
+    "primduv": (0,),
+    "primgrouplist": (0,),
+    "primgroupmask": (0,),
+    "primlist": (0,),
+    "primneighbours": (0,),
+    "prims": (0,),
+    "primsmap": (0,),
+    "primsnummap": (0,),
+    "primuv": (0,),
+    "primvals": (0,),
+    "realuv": (0,),
+    "seampoints": (0,),
+    "spknot": (0,),
+    "surflen": (0,),
+    "uniqueval": (0,),
+    "uniquevals": (0,),
+    "unituv": (0,),
+    "uvdist": (0, 4),
+    "vertex": (0,),
+    "vertexattriblist": (0,),
+    "vertexattribsize": (0,),
+    "vertexattribtype": (0,),
+    "vertexgrouplist": (0,),
+    "vertexgroupmask": (0,),
+    "vertexs": (0,),
+    "vertexsmap": (0,),
+    "vertexsnummap": (0,),
+    "vertexvals": (0,),
+    "volumeaverage": (0,),
+    "volumegradient": (0,),
+    "volumeindex": (0,),
+    "volumeindextopos": (0,),
+    "volumemax": (0,),
+    "volumemin": (0,),
+    "volumepostoindex": (0,),
+    "volumeres": (0,),
+    "volumesample": (0,),
+    "volumevoxeldiameter": (0,),
+    "xyzdist": (3,)
+}
+
+# Hscript function name -> positions of its arguments that are channel paths
+HSCRIPT_CHANNEL_FUNCTIONS: dict[str, tuple[int]] = {
+    "ch": (0,),
+    "chf": (0,),
+    "chs": (0,),
+    "chsraw": (0,),
+    "chramp": (0,),
+}
+
+# VEX functions whose first argument is a channel path
+VEX_CHANNEL_FUNCTIONS: tuple[str] = ("ch", "chf", "chi", "chs", "chv", "chp", "ch2", "ch3", "ch4", "chramp", "chsraw", "chu", "chdict", "chsop")
+
+# Hscript local variable name -> ( input number the variable is about, equivalent expression where {input} is the geometry reference )
+HSCRIPT_LOCAL_VARIABLES: dict[str, tuple[int, str]] = {
+    "CEX": (0, "centroid({input}, D_X)"),
+    "CEY": (0, "centroid({input}, D_Y)"),
+    "CEZ": (0, "centroid({input}, D_Z)"),
+    "XMIN": (0, "bbox({input}, D_XMIN)"),
+    "XMAX": (0, "bbox({input}, D_XMAX)"),
+    "YMIN": (0, "bbox({input}, D_YMIN)"),
+    "YMAX": (0, "bbox({input}, D_YMAX)"),
+    "ZMIN": (0, "bbox({input}, D_ZMIN)"),
+    "ZMAX": (0, "bbox({input}, D_ZMAX)"),
+    "SIZEX": (0, "bbox({input}, D_XSIZE)"),
+    "SIZEY": (0, "bbox({input}, D_YSIZE)"),
+    "SIZEZ": (0, "bbox({input}, D_ZSIZE)"),
+    "NPT": (0, "npoints({input})"),
+    "NPR": (0, "nprims({input})"),
+}
+
+class AD_hscriptSignatures():
+    """
+    A table of the Hscript functions taking geometry arguments : function name -> positions of these arguments.
+    Lookups are dict lookups, done once per function call found by AD_hscriptLexer.
+
+    Studios can register their own functions :
+        from ad_exprtools import hscriptSignatures
+        hscriptSignatures.register("myfunction", 0, 2)
+    """
+
+    def __init__(self, signatures: typing.Union[typing.Mapping[str, typing.Iterable[int]], None] = None) -> None:
+        self._signatures: dict[str, tuple[int]] = {}
+        if signatures != None:
+            for name, positions in signatures.items():
+                self.register(name, *positions)
+
+    def register(self, name: str, *positions: int):
+        """
+        Registers "name" as a function whose arguments at "positions" (starting at 0) reference a geometry.
+        Positions are added to the ones already registered for "name".
+        """
+
+        if len(positions) == 0:
+            raise ValueError(f"{name} : at least one argument position is needed")
+        for position in positions:
+            if position.__class__ != int or position < 0:
+                raise ValueError(f"{name} : invalid argument position {position!r}")
+
+        self._signatures[name] = tuple(sorted(set(self._signatures.get(name, ()) + positions)))
+
+    def unregister(self, name: str):
+        """
+        Removes "name" from the table.
+        """
+
+        self._signatures.pop(name, None)
+
+    def get(self, name: str, default: typing.Any = None) -> typing.Union[tuple[int], typing.Any]:
+        """
+        return the geometry argument positions of "name", or "default" if "name" is not registered.
+        """
+
+        return self._signatures.get(name, default)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._signatures
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._signatures)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+class AD_hscriptVariables():
+    """
+    A table of the Hscript local variables which can be rewritten as function calls : variable name -> ( input number, replacement ).
+    "replacement" is an expression where {input} stands for the geometry reference, e.g. "centroid({input}, D_X)" for $CEX.
+
+    Studios can register their own variables :
+        from ad_exprtools import hscriptVariables
+        hscriptVariables.register("MYVAR", 1, "detail({input}, \"myattrib\", 0)")
+    """
+
+    def __init__(self, variables: typing.Union[typing.Mapping[str, tuple[int, str]], None] = None) -> None:
+        self._variables: dict[str, tuple[int, str]] = {}
+        if variables != None:
+            for name, (input, replacement) in variables.items():
+                self.register(name, input, replacement)
+
+    def register(self, name: str, input: int, replacement: str):
+        """
+        Registers the variable "name", without $, as the expression "replacement" on the input number "input".
+        Replaces the variable already registered as "name".
+        """
+
+        if input.__class__ != int or input < 0:
+            raise ValueError(f"{name} : invalid input number {input!r}")
+        if "{input}" not in replacement:
+            raise ValueError(f"{name} : the replacement must contain {{input}}")
+
+        self._variables[name] = (input, replacement)
+
+    def unregister(self, name: str):
+        """
+        Removes "name" from the table.
+        """
+
+        self._variables.pop(name, None)
+
+    def get(self, name: str, default: typing.Any = None) -> typing.Union[tuple[int, str], typing.Any]:
+        """
+        return tuple[ input, replacement ] of "name", or "default" if "name" is not registered.
+        """
+
+        return self._variables.get(name, default)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._variables
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._variables)
+
+    def __len__(self) -> int:
+        return len(self._variables)
+
+class AD_exprMatch():
+    """
+    A match found in an expression, exposing the same accessors as re.Match (group(), start(), end(), span()).
+    Group 0 is the whole match, other groups are sub spans of it.
+    """
+
+    __slots__ = ("string", "_spans")
+
+    def __init__(self, string: str, *spans: tuple[int, int]) -> None:
+        self.string = string
+        self._spans = spans
+
+    def span(self, group: int = 0) -> tuple[int, int]:
+        return self._spans[group]
+
+    def start(self, group: int = 0) -> int:
+        return self._spans[group][0]
+
+    def end(self, group: int = 0) -> int:
+        return self._spans[group][1]
+
+    def group(self, group: int = 0) -> str:
+        return self.string[self._spans[group][0]:self._spans[group][1]]
+
+    def __repr__(self) -> str:
+        return f"<AD_exprMatch span={self._spans[0]}, match={self.group()!r}>"
+
+class AD_exprToken():
+    """
+    A token of an expression. "start" and "end" are its offsets in the source expression.
+    """
+
+    __slots__ = ("kind", "text", "start", "end")
+
+    def __init__(self, kind: str, text: str, start: int, end: int) -> None:
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+
+    def __repr__(self) -> str:
+        return f"<AD_exprToken {self.kind} {self.text!r} at {self.start}>"
+
+class AD_exprCall():
+    """
+    A function call of an expression.
+
+    args
+    One tuple of tokens per argument. Tokens of nested calls are included in the argument they are part of.
+    """
+
+    __slots__ = ("name", "start", "end", "args")
+
+    def __init__(self, name: str, start: int, end: int, args: tuple[tuple[AD_exprToken]]) -> None:
+        self.name = name
+        self.start = start
+        self.end = end
+        self.args = args
+
+    def __repr__(self) -> str:
+        return f"<AD_exprCall {self.name}() with {len(self.args)} args at {self.start}>"
+
+class AD_hscriptLexer():
+    """
+    A single pass tokenizer of Hscript expressions.
+    Every detector (strings, function calls, input references) reads the same token stream, so an expression is scanned only once.
+    """
+
+    STRING = "STRING"
+    NUMBER = "NUMBER"
+    IDENT = "IDENT"
+    VARIABLE = "VARIABLE"
+    LPAREN = "LPAREN"
+    RPAREN = "RPAREN"
+    COMMA = "COMMA"
+    OTHER = "OTHER"
+
+    _tokenPattern = re.compile(
+        r"""(?P<STRING>"(?:[^"\\\r\n]|\\.)*"|'(?:[^'\\\r\n]|\\.)*')"""
+        r"|(?P<NUMBER>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+        r"|(?P<IDENT>[A-Za-z_]\w*)"
+        r"|(?P<VARIABLE>\$(?:\{\w+\}|\w+))"
+        r"|(?P<LPAREN>\()"
+        r"|(?P<RPAREN>\))"
+        r"|(?P<COMMA>,)"
+        r"|(?P<SPACE>\s+)"
+        r"|(?P<OTHER>.)",
+        re.DOTALL
+    )
+    _backtickPattern = re.compile(r"`[^\r\n`]*`")
+
+    def backticks(self, string: str) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to Hscript expressions embedded in "string". ` are included.
+        """
+
+        return _backticks(string)
+
+    def tokenize(self, expr: str) -> tuple[AD_exprToken]:
+        """
+        return the tokens of "expr", without whitespaces.
+        """
+
+        return _tokenize(expr)
+
+    def strings(self, expr: str) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to string literals in "expr". " and ' are included.
+        """
+
+        return tuple(AD_exprMatch(expr, (token.start, token.end)) for token in _tokenize(expr) if token.kind == self.STRING)
+
+    def calls(self, expr: str) -> tuple[AD_exprCall]:
+        """
+        return the function calls in "expr", with their arguments.
+        Calls are ordered by closing position, so nested calls come before the call containing them.
+        """
+
+        return _calls(expr)
+
+    def inputReferences(self, expr: str, functions: typing.Union[AD_hscriptSignatures, typing.Mapping[str, typing.Iterable[int]]]) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to input references in "expr".
+        Note that there are subgroups : 1 is the expression function
+                                        2 is the int number referencing the input
+
+        functions
+        For each function name, the positions of the arguments that are geometry references. (see AD_hscriptSignatures)
+        """
+
+        inputRefs: list[AD_exprMatch] = []
+
+        for call in _calls(expr):
+            positions = functions.get(call.name)
+            if positions == None:
+                continue
+            for position in positions:
+                if position < len(call.args):
+                    arg = call.args[position]
+                    if len(arg) == 1 and arg[0].kind == self.NUMBER and arg[0].text.isdigit():
+                        inputRefs.append(AD_exprMatch(expr, (call.start, arg[0].end), (call.start, call.start + len(call.name)), (arg[0].start, arg[0].end)))
+
+        inputRefs.sort(key=lambda match: match.start(2))
+
+        return tuple(inputRefs)
+
+    def variables(self, expr: str, variables: typing.Union[AD_hscriptVariables, typing.Mapping[str, tuple[int, str]]]) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to the variables of "variables" in "expr", $ and {} included. Variables in string literals are skipped.
+        Note that there is a subgroup : 1 is the variable name
+
+        variables
+        The variables which can be rewritten. (see AD_hscriptVariables)
+        """
+
+        matches: list[AD_exprMatch] = []
+
+        for token in _tokenize(expr):
+            if token.kind == self.VARIABLE:
+                nameStart = token.start + (2 if token.text.startswith("${") else 1)
+                nameEnd = token.end - (1 if token.text.startswith("${") else 0)
+                if expr[nameStart:nameEnd] in variables:
+                    matches.append(AD_exprMatch(expr, (token.start, token.end), (nameStart, nameEnd)))
+
+        return tuple(matches)
+
+    def channelReferences(self, expr: str, functions: typing.Union[typing.Mapping[str, typing.Iterable[int]], None] = None) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to channel references with a constant path in "expr", like ch("../xform1/tx").
+        Note that there are subgroups : 1 is the expression function
+                                        2 is the string literal of the channel path, quotes included
+
+        functions
+        For each function name, the positions of the arguments that are channel paths. HSCRIPT_CHANNEL_FUNCTIONS if None.
+        """
+
+        if functions == None:
+            functions = HSCRIPT_CHANNEL_FUNCTIONS
+        channelRefs: list[AD_exprMatch] = []
+
+        for call in _calls(expr):
+            positions = functions.get(call.name)
+            if positions == None:
+                continue
+            for position in positions:
+                if position < len(call.args):
+                    arg = call.args[position]
+                    if len(arg) == 1 and arg[0].kind == self.STRING:
+                        channelRefs.append(AD_exprMatch(expr, (call.start, arg[0].end), (call.start, call.start + len(call.name)), (arg[0].start, arg[0].end)))
+
+        channelRefs.sort(key=lambda match: match.start(2))
+
+        return tuple(channelRefs)
+
+@functools.lru_cache(maxsize=4096)
+def _backticks(string: str) -> tuple[AD_exprMatch]:
+
+    return tuple(AD_exprMatch(string, match.span()) for match in AD_hscriptLexer._backtickPattern.finditer(string))
+
+@functools.lru_cache(maxsize=4096)
+def _tokenize(expr: str) -> tuple[AD_exprToken]:
+
+    tokens: list[AD_exprToken] = []
+
+    for match in AD_hscriptLexer._tokenPattern.finditer(expr):
+        kind = match.lastgroup
+        if kind != "SPACE":
+            tokens.append(AD_exprToken(kind, match.group(), match.start(), match.end()))
+
+    return tuple(tokens)
+
+@functools.lru_cache(maxsize=4096)
+def _calls(expr: str) -> tuple[AD_exprCall]:
+
+    return _tokensCalls(_tokenize(expr), len(expr))
+
+def _tokensCalls(tokens: tuple[AD_exprToken], length: int) -> tuple[AD_exprCall]:
+    """
+    return the function calls of "tokens", the tokens of a text of "length" characters. Shared by the Hscript and VEX lexers, which use the same token kinds for identifiers, parentheses and commas.
+    """
+
+    calls: list[AD_exprCall] = []
+    # One frame per open parenthesis : [ callName or None for a grouping parenthesis, callStart, closedArgs, currentArgStartIndex ]
+    stack: list[list] = []
+
+    for i, token in enumerate(tokens):
+        if token.kind == AD_hscriptLexer.LPAREN:
+            if i > 0 and tokens[i-1].kind == AD_hscriptLexer.IDENT:
+                stack.append([tokens[i-1].text, tokens[i-1].start, [], i+1])
+            else:
+                stack.append([None, token.start, [], i+1])
+
+        elif token.kind == AD_hscriptLexer.COMMA:
+            if len(stack) > 0 and stack[-1][0] != None:
+                frame = stack[-1]
+                frame[2].append(tokens[frame[3]:i])
+                frame[3] = i+1
+
+        elif token.kind == AD_hscriptLexer.RPAREN:
+            if len(stack) > 0:
+                frame = stack.pop()
+                if frame[0] != None:
+                    if frame[3] < i or len(frame[2]) > 0:
+                        frame[2].append(tokens[frame[3]:i])
+                    calls.append(AD_exprCall(frame[0], frame[1], token.end, tuple(frame[2])))
+
+    # Unclosed calls still expose their complete arguments
+    for frame in reversed(stack):
+        if frame[0] != None:
+            calls.append(AD_exprCall(frame[0], frame[1], length, tuple(frame[2])))
+
+    return tuple(calls)
+
+class AD_vexLexer():
+    """
+    A single pass tokenizer of VEX snippets, finding the geometry paths ("op:../box1") and the channel references (ch("../xform1/tx")) of the code.
+    Comments are skipped and string literals are single tokens, so paths in comments and channel calls in strings are not found.
+    Every token pattern either matches in one step or consumes the rest of the snippet, so snippets are scanned in linear time.
+    """
+
+    STRING = "STRING"
+    IDENT = "IDENT"
+    LPAREN = "LPAREN"
+    RPAREN = "RPAREN"
+    COMMA = "COMMA"
+    OTHER = "OTHER"
+
+    _tokenPattern = re.compile(
+        r"(?P<COMMENT>//[^\r\n]*|/\*.*?(?:\*/|\Z))"
+        r"""|(?P<STRING>"(?:[^"\\\r\n]|\\.)*"?|'(?:[^'\\\r\n]|\\.)*'?)"""
+        r"|(?P<IDENT>[A-Za-z_]\w*)"
+        r"|(?P<LPAREN>\()"
+        r"|(?P<RPAREN>\))"
+        r"|(?P<COMMA>,)"
+        r"|(?P<SPACE>\s+)"
+        r"|(?P<OTHER>[^\s\w\"'(),/]+|/)",
+        re.DOTALL
+    )
+
+    def tokenize(self, snippet: str) -> tuple[AD_exprToken]:
+        """
+        return the tokens of "snippet", without whitespaces nor comments.
+        """
+
+        return _vexTokenize(snippet)
+
+    def calls(self, snippet: str) -> tuple[AD_exprCall]:
+        """
+        return the function calls in "snippet", with their arguments. (see AD_hscriptLexer.calls())
+        """
+
+        return _vexCalls(snippet)
+
+    def geometryPaths(self, snippet: str) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to the string literals of "snippet" which are op: geometry paths, wherever they are. Quotes are included.
+        Note that there is a subgroup : 1 is the node path, without op:
+        """
+
+        paths: list[AD_exprMatch] = []
+
+        for token in _vexTokenize(snippet):
+            if token.kind == self.STRING and token.text[1:4] == "op:":
+                quote = 1 if len(token.text) > 1 and token.text[-1] == token.text[0] else 0
+                paths.append(AD_exprMatch(snippet, (token.start, token.end), (token.start + 4, token.end - quote)))
+
+        return tuple(paths)
+
+    def geometryArguments(self, snippet: str) -> tuple[AD_exprMatch]:
+        """
+        return the op: geometry paths of self.geometryPaths() which are the whole geometry argument of a call, like point("op:../box1", "P", 0).
+        VEX functions take their geometry as first argument, an op: path anywhere else, like string g = "op:../box1", is a string value.
+        """
+
+        starts = set()
+        for call in _vexCalls(snippet):
+            if len(call.args) > 0 and len(call.args[0]) == 1 and call.args[0][0].kind == self.STRING:
+                starts.add(call.args[0][0].start)
+
+        return tuple(match for match in self.geometryPaths(snippet) if match.start() in starts)
+
+    def channelReferences(self, snippet: str, functions: typing.Iterable[str] = VEX_CHANNEL_FUNCTIONS) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to channel references with a constant path in "snippet", like ch("../xform1/tx").
+        Note that there are subgroups : 1 is the function
+                                        2 is the string literal of the channel path, quotes included
+        """
+
+        tokens = _vexTokenize(snippet)
+        channelRefs: list[AD_exprMatch] = []
+
+        for i in range(len(tokens) - 3):
+            if tokens[i].kind == self.IDENT and tokens[i+1].kind == self.LPAREN and tokens[i+2].kind == self.STRING and tokens[i+3].kind in (self.RPAREN, self.COMMA) and tokens[i].text in functions:
+                channelRefs.append(AD_exprMatch(snippet, (tokens[i].start, tokens[i+2].end), (tokens[i].start, tokens[i].end), (tokens[i+2].start, tokens[i+2].end)))
+
+        return tuple(channelRefs)
+
+@functools.lru_cache(maxsize=1024)
+def _vexTokenize(snippet: str) -> tuple[AD_exprToken]:
+
+    tokens: list[AD_exprToken] = []
+
+    for match in AD_vexLexer._tokenPattern.finditer(snippet):
+        kind = match.lastgroup
+        if kind != "SPACE" and kind != "COMMENT":
+            tokens.append(AD_exprToken(kind, match.group(), match.start(), match.end()))
+
+    return tuple(tokens)
+
+@functools.lru_cache(maxsize=1024)
+def _vexCalls(snippet: str) -> tuple[AD_exprCall]:
+
+    return _tokensCalls(_vexTokenize(snippet), len(snippet))
+
+class AD_vexSnippetAnalysis(typing.NamedTuple):
+    """
+    The analysis of a VEX snippet. It only depends on the text, so it can be computed in any thread or process.
+
+    paths
+    The node paths of the op: geometry paths, without op:.
+
+    channels
+    The constant channel paths of the channel references.
+
+    pathMatches
+    The AD_exprMatch of each op: geometry path. (see AD_vexLexer.geometryPaths())
+
+    argumentMatches
+    The AD_exprMatch of pathMatches which are the geometry argument of a call. (see AD_vexLexer.geometryArguments())
+    """
+
+    paths: tuple[str]
+    channels: tuple[str]
+    pathMatches: tuple[AD_exprMatch]
+    argumentMatches: tuple[AD_exprMatch] = ()
+
+def analyseVexSnippet(snippet: str) -> AD_vexSnippetAnalysis:
+    """
+    return the AD_vexSnippetAnalysis of "snippet".
+    """
+
+    lexer = AD_vexLexer()
+    pathMatches = lexer.geometryPaths(snippet)
+    paths = tuple(dict.fromkeys(match.group(1) for match in pathMatches))
+    channels = tuple(dict.fromkeys(match.group(2).strip("\"'") for match in lexer.channelReferences(snippet)))
+
+    return AD_vexSnippetAnalysis(paths, channels, pathMatches, lexer.geometryArguments(snippet))
+
+class AD_pythonExprParser():
+    """
+    A parser of Python parm expressions, built on the ast module. The syntax tree of each expression is parsed once and cached by text.
+    Only constant references are detected : hou.node("../box1"), hou.pwd().node("../box1"), hou.pwd().inputs()[0] and hou.pwd().input(0).
+    """
+
+    def tree(self, expr: str) -> typing.Union[ast.Module, None]:
+        """
+        return the cached syntax tree of "expr", None if it is not valid Python.
+        The returned tree is shared, it must not be modified.
+        """
+
+        return _pythonTree(expr)
+
+    def nodeReferences(self, expr: str) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to hou.node() and hou.pwd().node() calls with a constant path in "expr".
+        Note that there is a subgroup : 1 is the string literal of the path, quotes included
+        """
+
+        return _pythonReferences(expr)[0]
+
+    def inputReferences(self, expr: str) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to hou.pwd().inputs()[i] and hou.pwd().input(i) with a constant input number in "expr".
+        Note that there is a subgroup : 1 is the int literal of the input number
+        """
+
+        return _pythonReferences(expr)[1]
+
+@functools.lru_cache(maxsize=4096)
+def _pythonTree(expr: str) -> typing.Union[ast.Module, None]:
+
+    try:
+        return ast.parse(expr)
+    except (SyntaxError, ValueError):
+        return None
+
+def _isHouCall(node: ast.AST, name: str) -> bool:
+    return node.__class__ == ast.Call and node.func.__class__ == ast.Attribute and node.func.attr == name and node.func.value.__class__ == ast.Name and node.func.value.id == "hou"
+
+def _isPwdCall(node: ast.AST) -> bool:
+    return _isHouCall(node, "pwd") and len(node.args) == 0 and len(node.keywords) == 0
+
+def _isConstant(node: ast.AST, valueClass: type) -> bool:
+    return node.__class__ == ast.Constant and node.value.__class__ == valueClass
+
+@functools.lru_cache(maxsize=4096)
+def _pythonReferences(expr: str) -> tuple[tuple[AD_exprMatch], tuple[AD_exprMatch]]:
+
+    tree = _pythonTree(expr)
+    if tree == None:
+        return ((), ())
+
+    # ast columns are utf-8 byte offsets in their line
+    lines = expr.splitlines(keepends=True)
+    lineStarts = [0]
+    for line in lines:
+        lineStarts.append(lineStarts[-1] + len(line))
+
+    def offset(lineno: int, col: int) -> int:
+        line = lines[lineno - 1]
+        if line.isascii():
+            return lineStarts[lineno - 1] + col
+        return lineStarts[lineno - 1] + len(line.encode("utf-8")[:col].decode("utf-8", errors="ignore"))
+
+    def span(node: ast.AST) -> tuple[int, int]:
+        return (offset(node.lineno, node.col_offset), offset(node.end_lineno, node.end_col_offset))
+
+    nodeRefs: list[AD_exprMatch] = []
+    inputRefs: list[AD_exprMatch] = []
+    for node in ast.walk(tree):
+        if node.__class__ == ast.Call and node.func.__class__ == ast.Attribute and len(node.args) == 1 and len(node.keywords) == 0:
+            owner = node.func.value
+            # hou.node("path") or hou.pwd().node("path")
+            if node.func.attr == "node" and _isConstant(node.args[0], str) and ((owner.__class__ == ast.Name and owner.id == "hou") or _isPwdCall(owner)):
+                nodeRefs.append(AD_exprMatch(expr, span(node), span(node.args[0])))
+            # hou.pwd().input(i)
+            elif node.func.attr == "input" and _isConstant(node.args[0], int) and _isPwdCall(owner):
+                inputRefs.append(AD_exprMatch(expr, span(node), span(node.args[0])))
+
+        # hou.pwd().inputs()[i]
+        elif node.__class__ == ast.Subscript and _isConstant(node.slice, int):
+            inputs = node.value
+            if inputs.__class__ == ast.Call and inputs.func.__class__ == ast.Attribute and inputs.func.attr == "inputs" and len(inputs.args) == 0 and _isPwdCall(inputs.func.value):
+                inputRefs.append(AD_exprMatch(expr, span(node), span(node.slice)))
+
+    nodeRefs.sort(key=lambda match: match.start())
+    inputRefs.sort(key=lambda match: match.start())
+
+    return (tuple(nodeRefs), tuple(inputRefs))
+
+class AD_pythonExprAnalysis(typing.NamedTuple):
+    """
+    The analysis of a Python expression. It only depends on the text, so it can be computed in any thread or process.
+
+    paths
+    The constant node paths of the node references.
+
+    inputs
+    The constant input numbers of the input references.
+
+    pathMatches
+    The AD_exprMatch of each node reference. (see AD_pythonExprParser.nodeReferences())
+
+    inputMatches
+    The AD_exprMatch of each input reference. (see AD_pythonExprParser.inputReferences())
+    """
+
+    paths: tuple[str]
+    inputs: tuple[int]
+    pathMatches: tuple[AD_exprMatch]
+    inputMatches: tuple[AD_exprMatch]
+
+def analysePythonExpr(expr: str) -> AD_pythonExprAnalysis:
+    """
+    return the AD_pythonExprAnalysis of "expr". Invalid Python has no reference.
+    """
+
+    parser = AD_pythonExprParser()
+    pathMatches = parser.nodeReferences(expr)
+    inputMatches = parser.inputReferences(expr)
+    paths = tuple(dict.fromkeys(ast.literal_eval(match.group(1)) for match in pathMatches))
+    inputs = tuple(dict.fromkeys(ast.literal_eval(match.group(1)) for match in inputMatches))
+
+    return AD_pythonExprAnalysis(paths, inputs, pathMatches, inputMatches)
+
+class AD_parmTextAnalysis(typing.NamedTuple):
+    """
+    The analysis of the text of a parm : tuple[ rawValue, tuple[ hscriptKeyframesExpressions ], tuple[ pythonKeyframesExpressions ] ] (see AD_HSopCompiler.parmFingerprint())
+    It only depends on the text, so it can be computed in any thread or process.
+
+    exprs
+    The Hscript expressions of the parm : its Hscript keyframes expressions, or the expressions in ` of its raw value if it has no keyframe.
+
+    paths
+    The string literals of the Hscript expressions without quotes, each one may be a node path, and the node paths of the Python expressions.
+
+    inputs
+    The input numbers referenced in the expressions, by input references or by local variables.
+
+    matches
+    tuple[ tuple[ expr, stringsMatches, inputReferencesMatches, variablesMatches ] ] for each expression.
+
+    channels
+    The constant channel paths of the channel references of the expressions, like ../xform1/tx for ch("../xform1/tx"). (see AD_hscriptLexer.channelReferences())
+
+    pythonExprs
+    The Python keyframes expressions of the parm. Their references are in "paths" and "inputs". (see analysePythonExpr())
+    """
+
+    exprs: tuple[str]
+    paths: tuple[str]
+    inputs: tuple[int]
+    matches: tuple[tuple[str, tuple[AD_exprMatch], tuple[AD_exprMatch], tuple[AD_exprMatch]]]
+    channels: tuple[str] = ()
+    pythonExprs: tuple[str] = ()
+
+def analyseParmText(text: tuple[str, tuple[str], tuple[str]], functions: typing.Union[AD_hscriptSignatures, typing.Mapping[str, typing.Iterable[int]]], variables: typing.Union[AD_hscriptVariables, typing.Mapping[str, tuple[int, str]], None] = None) -> AD_parmTextAnalysis:
+    """
+    return the AD_parmTextAnalysis of "text" : tuple[ rawValue, tuple[ hscriptKeyframesExpressions ], tuple[ pythonKeyframesExpressions ] ]
+
+    functions
+    For each function name, the positions of the arguments that are geometry references. (see AD_hscriptSignatures)
+
+    variables
+    The local variables which can be rewritten. (see AD_hscriptVariables) None detects no variable.
+    """
+
+    lexer = AD_hscriptLexer()
+    rawValue, keyframesExprs, pythonExprs = text
+
+    if len(keyframesExprs) > 0 or len(pythonExprs) > 0:
+        exprs = tuple(keyframesExprs)
+    else:
+        exprs = tuple(match.group().strip("`") for match in lexer.backticks(rawValue))
+
+    paths: dict[str, None] = {}
+    inputs: dict[int, None] = {}
+    channels: dict[str, None] = {}
+    matches: list[tuple[str, tuple[AD_exprMatch], tuple[AD_exprMatch], tuple[AD_exprMatch]]] = []
+    for expr in exprs:
+        strings = lexer.strings(expr)
+        inputRefs = lexer.inputReferences(expr, functions)
+        variableRefs = lexer.variables(expr, variables) if variables != None else ()
+        for string in strings:
+            paths.setdefault(string.group().strip("\"'"))
+        for inputRef in inputRefs:
+            inputs.setdefault(int(inputRef.group(2)))
+        for variableRef in variableRefs:
+            inputs.setdefault(variables.get(variableRef.group(1))[0])
+        for channelRef in lexer.channelReferences(expr):
+            channels.setdefault(channelRef.group(2).strip("\"'"))
+        matches.append((expr, strings, inputRefs, variableRefs))
+    for expr in pythonExprs:
+        pythonAnalysis = analysePythonExpr(expr)
+        for path in pythonAnalysis.paths:
+            paths.setdefault(path)
+        for inputIndex in pythonAnalysis.inputs:
+            inputs.setdefault(inputIndex)
+
+    return AD_parmTextAnalysis(exprs, tuple(paths), tuple(inputs), tuple(matches), tuple(channels), tuple(pythonExprs))
+
+def analyseParmTexts(texts: typing.Iterable[tuple[str, tuple[str], tuple[str]]], functions: typing.Union[AD_hscriptSignatures, typing.Mapping[str, typing.Iterable[int]]], variables: typing.Union[AD_hscriptVariables, typing.Mapping[str, tuple[int, str]], None] = None) -> tuple[AD_parmTextAnalysis]:
+    """
+    return the AD_parmTextAnalysis of each text of "texts". (see analyseParmText())
+    """
+
+    return tuple(analyseParmText(text, functions, variables) for text in texts)
+
+def analyseParmTextsInPool(texts: typing.Iterable[tuple[str, tuple[str], tuple[str]]], functions: typing.Union[AD_hscriptSignatures, typing.Mapping[str, typing.Iterable[int]]], executor: concurrent.futures.Executor, chunkSize: int = 512, variables: typing.Union[AD_hscriptVariables, typing.Mapping[str, tuple[int, str]], None] = None) -> dict[tuple[str, tuple[str], tuple[str]], AD_parmTextAnalysis]:
+    """
+    return { text : AD_parmTextAnalysis } for each text of "texts", analysed by chunks of "chunkSize" texts in "executor". (see analyseParmTexts())
+    With a concurrent.futures.ProcessPoolExecutor, "functions" and "variables" must be picklable : AD_hscriptSignatures, AD_hscriptVariables or dicts.
+    """
+
+    texts = tuple(dict.fromkeys(texts))
+    chunks = [texts[i:i+chunkSize] for i in range(0, len(texts), chunkSize)]
+
+    analyses: dict[tuple[str, tuple[str], tuple[str]], AD_parmTextAnalysis] = {}
+    for chunk, chunkAnalyses in zip(chunks, executor.map(analyseParmTexts, chunks, [functions]*len(chunks), [variables]*len(chunks))):
+        analyses.update(zip(chunk, chunkAnalyses))
+
+    return analyses
+
+# Shared default tables, used by AD_HSopCompiler
+hscriptSignatures = AD_hscriptSignatures(HSCRIPT_GEOMETRY_FUNCTIONS)
+hscriptVariables = AD_hscriptVariables(HSCRIPT_LOCAL_VARIABLES)
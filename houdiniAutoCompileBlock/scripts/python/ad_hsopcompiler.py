@@ -15,8 +15,24 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import typing, os, re
+import typing, os, sys, re, ast, glob, json, time, hashlib, logging, warnings, threading, contextlib, multiprocessing, concurrent.futures
 import hou
+from ad_compilerules import AD_compileRules, AD_compileBlocker, compileRules
+from ad_exprtools import AD_hscriptLexer, AD_hscriptSignatures, AD_hscriptVariables, AD_exprMatch, AD_parmTextAnalysis, AD_vexSnippetAnalysis, AD_pythonExprAnalysis, analyseParmText, analyseParmTextsInPool, analyseVexSnippet, analysePythonExpr, hscriptSignatures, hscriptVariables
+
+# The debug output of the compiler, shown once this logger is enabled for logging.DEBUG, e.g. logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger("ad_hsopcompiler")
+
+def debugEnabled(debug=False) -> bool:
+    """
+    return True if the debug output is to be logged, i.e. if the "ad_hsopcompiler" logger is enabled for logging.DEBUG.
+    The "debug" arguments of the compiler methods are deprecated : True warns and no longer prints.
+    """
+
+    if debug == True:
+        warnings.warn("debug=True is deprecated, enable the \"ad_hsopcompiler\" logger for logging.DEBUG instead", DeprecationWarning, stacklevel=3)
+
+    return logger.isEnabledFor(logging.DEBUG)
 
 class AD_regexTools():
     """
@@ -26,1074 +42,2796 @@ class AD_regexTools():
     def __init__(self) -> None:
         pass
 
-    def matchesMask(self, matches: list[re.Match]) -> tuple[int]:
+    def applyEdits(self, string: str, edits: typing.Iterable[tuple[int, int, str]], debug=False) -> str:
         """
-        return an int tuple of length len(matches[0].string)). 1 if corresponding index is in a match 0 if not.
+        return "string" where each string[start:end] is replaced by repl, for each (start, end, repl) in "edits".
+        All the edits are applied in a single pass. Their indexes refer to the original "string".
+        Raises ValueError if two edits overlap.
         """
 
-        mask: list[int] = [0 for i in range(0, len(matches[0].string))]
-        for match in matches:
-            for i in range(match.start(), match.end()):
-                mask[i] = 1
-
-        return tuple(mask)
-    
-    def invertMatchesMask(self, mask: list[int]) -> tuple[int]:
-        """
-        return the inverted int list. 0 = 1 and 1 = 0.
-        """
+        sortedEdits = sorted(edits, key=lambda edit: (edit[0], edit[1]))
+        pieces: list[str] = []
+        cursor = 0
 
-        newMask = [1-i for i in mask]
+        for start, end, repl in sortedEdits:
+            if start < cursor or end < start:
+                raise ValueError(f"Overlapping edit ({start}, {end}, {repl!r}) in : {string}")
+            pieces.append(string[cursor:start])
+            pieces.append(repl)
+            cursor = end
+        pieces.append(string[cursor:])
 
-        return tuple(newMask)
+        newString = "".join(pieces)
 
-    def _findallMatches(self, pattern: typing.Union[str, re.Pattern], string: str, pos: int = 0, endpos: int = None) -> tuple[re.Match]:
-        """
-        return the tuple of all re.Match objects in "string" corresponding to "pattern".
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{string} -> {len(sortedEdits)} edits :")
+            logger.debug(newString)
 
-        pos
-        start of search
+        return newString
 
-        endpos
-        end of search
+    def pathEndDigits(self, path) -> typing.Union[int, None]:
+        """
+        return the int at the end of "path". e.g. if "path" = "/obj/geo1/null1/spare_input1" the returned value will be 1.
+        return None if no digits where found.
         """
+        searchResult = re.search(r"\d+$", path)
 
-        allMatches: list[re.Match] = []
-        if endpos == None:
-            endpos = len(string)
+        if searchResult != None:
 
-        if pattern.__class__ != re.Pattern:
-            patternObj = re.compile(pattern)
+            return int(searchResult.group())
+        
         else:
-            patternObj = pattern
-        searchString = string[:]
-        match = patternObj.search(searchString, pos=pos, endpos=endpos)
+            
+            return None
+
+class AD_HSopGraph():
+    """
+    A dependency graph index of the sop nodes of a network.
+    It is built once, from wire inputs and from the references found by AD_HSopCompiler.referencedNodes() and AD_HSopCompiler.channelReferencedNodes(), and answers the block queries of AD_HSopCompiler.
+    Nodes created or rewired afterwards are added with self.update(), without building the index again.
+    """
 
-        while match != None:
-            allMatches.append(match)
-            match = patternObj.search(searchString, match.end(), endpos=endpos)
+    def __init__(self, compiler: "AD_HSopCompiler", network: hou.Node, debug=False) -> None:
+        self.network: hou.Node = network
+        self.nodes: tuple[hou.SopNode] = tuple(network.children())
+        # node -> its position in self.nodes, descendants are kept in this order
+        self._order: dict[hou.SopNode, int] = {node: i for i, node in enumerate(self.nodes)}
+
+        # node -> nodes it depends on (inputs first, then references)
+        self._ancestors: dict[hou.SopNode, tuple[hou.SopNode]] = {}
+        # node -> nodes of the network depending on it
+        self._descendants: dict[hou.SopNode, list[hou.SopNode]] = {node: [] for node in self.nodes}
+        # node -> nodes wired to its inputs
+        self._inputs: dict[hou.SopNode, tuple[hou.SopNode]] = {}
+        # node -> nodes of the network wired to its outputs
+        self._outputs: dict[hou.SopNode, list[hou.SopNode]] = {node: [] for node in self.nodes}
+        # block_end -> paired block_begin nodes
+        self._blockBegins: dict[hou.SopNode, list[hou.SopNode]] = {}
+
+        for node in self.nodes:
+            self._inputs[node] = tuple(input for input in node.inputs() if input != None)
+            self._ancestors[node] = self._nodeAncestors(compiler, node)
+
+            if node.type().name() == "block_begin":
+                blockEnd = compiler.blockEndNode(node)
+                if blockEnd != None:
+                    self._blockBegins.setdefault(blockEnd, []).append(node)
+
+        for node in self.nodes:
+            for ancestor in self._ancestors[node]:
+                if ancestor in self._descendants:
+                    self._descendants[ancestor].append(node)
+            for input in dict.fromkeys(self._inputs[node]):
+                if input in self._outputs:
+                    self._outputs[input].append(node)
 
-        return tuple(allMatches)
-    
-    def findallMatches(self, pattern: typing.Union[str, re.Pattern], string: str, mask: typing.Union[list[int], None] = None, debug=False) -> tuple[re.Match]:
-        """
-        return the tuple of all Match objects in "string" corresponding to "pattern".
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{network} -> dependency graph built for {len(self.nodes)} nodes")
 
-        mask
-        if an re.Match object is fully contained in a portion of "mask" where all items are equal 0, then the re.Match object is not returned.
+    def _nodeAncestors(self, compiler: "AD_HSopCompiler", node: hou.SopNode) -> tuple[hou.SopNode]:
+        """
+        return the nodes "node" directly depends on : its inputs first (self._inputs, read before), then the references read from the scene.
         """
 
-        tempAllMatches: list[re.Match] = list(self._findallMatches(pattern, string))
-        allMatches = tempAllMatches[:]
+        refs = tuple(ref.node for ref in compiler.referencedNodes(node))
+        channelRefs = compiler.channelReferencedNodes(node)
 
-        if mask != None:
-            for match in tempAllMatches:
-                keep = 0
-                for i in range(match.start(), match.end()):
-                    if i != 0:
-                        keep = 1
-                        break
-                if keep == 0:
-                    allMatches.remove(match)
+        return tuple(dict.fromkeys(self._inputs[node] + refs + channelRefs))
 
-        # Debug output
-        if debug == True:
-            print(f"{string} -> pattern = {pattern} -> {len(allMatches)} matches found :")
-            for match in allMatches:
-                print(match)
+    def update(self, compiler: "AD_HSopCompiler", nodes: typing.Iterable[hou.SopNode]):
+        """
+        Indexes "nodes" again : nodes of the network created or rewired since the index was built.
+        Only their own edges are read from the scene, the rest of the index is kept.
+        """
 
-        return tuple(allMatches)
-    
-    def subMatch(self, match: re.Match, repl: str, string: str, group: int = 0, index: typing.Union[list[int], None] = None, debug=False) -> tuple[str, tuple[int]]:
+        nodes = tuple(nodes)
+        # New nodes are indexed first, so the edges between them are kept
+        for node in nodes:
+            if node not in self._ancestors:
+                self._order[node] = len(self.nodes)
+                self.nodes = self.nodes + (node,)
+                self._ancestors[node] = ()
+                self._descendants[node] = []
+                self._inputs[node] = ()
+                self._outputs[node] = []
+                if node.type().name() == "block_begin":
+                    blockEnd = compiler.blockEndNode(node)
+                    if blockEnd != None:
+                        self._blockBegins.setdefault(blockEnd, []).append(node)
+
+        for node in nodes:
+            for ancestor in self._ancestors.get(node, ()):
+                if ancestor in self._descendants and node in self._descendants[ancestor]:
+                    self._descendants[ancestor].remove(node)
+            for input in self._inputs.get(node, ()):
+                if input in self._outputs and node in self._outputs[input]:
+                    self._outputs[input].remove(node)
+
+            self._inputs[node] = tuple(input for input in node.inputs() if input != None)
+            self._ancestors[node] = self._nodeAncestors(compiler, node)
+            for ancestor in self._ancestors[node]:
+                if ancestor in self._descendants:
+                    self._descendants[ancestor].append(node)
+                    self._descendants[ancestor].sort(key=self._order.__getitem__)
+            for input in dict.fromkeys(self._inputs[node]):
+                if input in self._outputs:
+                    self._outputs[input].append(node)
+                    self._outputs[input].sort(key=self._order.__getitem__)
+
+    def __contains__(self, node: hou.SopNode) -> bool:
+        return node in self._ancestors
+
+    def directAncestors(self, node: hou.SopNode) -> tuple[hou.SopNode]:
+        """
+        return the nodes "node" directly depends on : its inputs and the nodes it references.
         """
-        return "string" where "match" is replaced by "repl".
-        The portion of the string which will be replaced is equivalent to string[match.start(group):match.end(group)].
 
-        group
-        If different from 0, only the corresponding "match" subgroup will be replaced.
+        return self._ancestors.get(node, ())
 
-        index
-        This method is using this list of indexes instead of directly using the indexes of items in "string".
-        It can be helpful for offset the indexes, and, therefore, the match wich will be replaced.
-        This argument being not ideal to use, this can be deleted in future updates.
+    def directDescendants(self, node: hou.SopNode) -> tuple[hou.SopNode]:
+        """
+        return the nodes of the network which directly depend on "node" : its outputs and the nodes referencing it.
         """
 
-        if index == None:
-            index = [i for i in range(0, len(string))]
+        return tuple(self._descendants.get(node, ()))
 
-        startReplIndex = index.index(match.start(group))
-        if match.end(group) >= len(index):
-            endReplIndex = len(index)
-        else:
-            endReplIndex = index.index(match.end(group))
+    def pairedBlockBegins(self, blockEnd: hou.SopNode) -> tuple[hou.SopNode]:
+        """
+        return the block_begin nodes of the network paired to "blockEnd".
+        """
+
+        return tuple(self._blockBegins.get(blockEnd, ()))
 
-        # print(string)
-        # for i in index:
-        #     print(i, end="")
-        # print("")
+    def _walk(self, node: hou.SopNode, adjacency: dict, stop: typing.Iterable[hou.SopNode]) -> tuple[hou.SopNode]:
+        """
+        return the nodes reachable from "node" through "adjacency", in breadth first order.
+        Nodes in "stop" are neither returned nor walked through. Only the direct neighbours of "node" may be outside the network.
+        """
 
-        newString = string[:startReplIndex] + repl + string[endReplIndex:]
-        # print(newString)
-        newIndex: list[int] = index[:startReplIndex]
-        newIndex.extend([index[startReplIndex] for i in range(0, len(repl))])
-        newIndex.extend(index[endReplIndex:])
+        stopSet: set[hou.SopNode] = set(stop) if stop != None else set()
+        visited: set[hou.SopNode] = {node,}
+        result: list[hou.SopNode] = []
 
-        # for i in newIndex:
-        #     print(i, end="")
-        # print("")
+        for neighbour in adjacency.get(node, ()):
+            if neighbour not in stopSet and neighbour not in visited:
+                visited.add(neighbour)
+                result.append(neighbour)
 
-        # Debug output
-        if debug == True:
-            print(f"{match} to {repl}")
-            print(newString)
+        i = 0
+        while i < len(result):
+            for neighbour in adjacency.get(result[i], ()):
+                if neighbour not in stopSet and neighbour not in visited and neighbour in self._ancestors:
+                    visited.add(neighbour)
+                    result.append(neighbour)
+            i = i + 1
 
-        return (newString, newIndex)
+        return tuple(result)
 
-    def pathEndDigits(self, path) -> typing.Union[int, None]:
+    def ancestors(self, node: hou.SopNode, stop: typing.Iterable[hou.SopNode] = None) -> tuple[hou.SopNode]:
         """
-        return the int at the end of "path". e.g. if "path" = "/obj/geo1/null1/spare_input1" the returned value will be 1.
-        return None if no digits where found.
+        return all the nodes "node" depends on. See AD_HSopCompiler.allAncestors().
         """
-        searchResult = re.search(r"\d+$", path)
 
-        if searchResult != None:
+        return self._walk(node, self._ancestors, stop)
 
-            return int(searchResult.group())
-        
-        else:
-            
-            return None
-        
-    def listToOrString(self, list: list[str]):
+    def descendants(self, node: hou.SopNode, stop: typing.Iterable[hou.SopNode] = None) -> tuple[hou.SopNode]:
+        """
+        return all the nodes which depend on "node". See AD_HSopCompiler.allDescendants().
+        """
 
-        string: str = ""
+        return self._walk(node, self._descendants, stop)
 
-        for item in list:
-            if item == list[-1]:
-                string = string + item
-            else:
-                string = string + item + "|"
-        
-        return string
+    def wiredDescendants(self, node: hou.SopNode, stop: typing.Iterable[hou.SopNode] = None) -> tuple[hou.SopNode]:
+        """
+        return all the nodes wired after "node", following the outputs only. References are not walked.
+        """
 
-class AD_HSopCompiler():
+        return self._walk(node, self._outputs, stop)
+
+class AD_nodeReference(typing.NamedTuple):
     """
-    A bunch of methods that helps with convert a sop network in order to compile it.
+    A node referenced by parms, by path or by input. (see AD_HSopCompiler.referencedNodes())
     """
 
-    def __init__(self) -> None:
-        self.reg = AD_regexTools()
-        self.spareInputTemplate = hou.StringParmTemplate(name='spare_input', label='Spare Input ', num_components=1, string_type=hou.stringParmType.NodeReference, default_value=("",), tags={ "cook_dependent" : "1",  "opfilter" : "!!SOP!!",  "oprelative" : ".", })
-        self.nodeFirstExprFunctions = (
-            "arclen",
-            "arclenD",
-            "attriblist",
-            "bbox",
-            "centroid",
-            "curvature",
-            "degree",
-            "detail",
-            "detailattriblist",
-            "detailattribsize",
-            "detailattribtype",
-            "details",
-            "detailsmap",
-            "detailsnummap",
-            "detailvals",
-            "edgegrouplist",
-            "edgegroupmask",
-            "groupbyval",
-            "groupbyvals",
-            "hasdetailattrib",
-            "haspointattrib",
-            "hasprimattrib",
-            "hasvertexattrib",
-            "isclosed",
-            "iscollided",
-            "isspline",
-            "isstuck",
-            "iswrapu",
-            "iswrapv",
-            "listbyval",
-            "listbyvals",
-            "metaweight",
-            "mindist",
-            "nearpoint",
-            "normal",
-            "npoints",
-            "npointsgroup",
-            "nprims",
-            "nprimsgroup",
-            "nuniquevals",
-            "nvertices",
-            "nverticesgroup",
-            "point",
-            "pointattriblist",
-            "pointattribsize",
-            "pointattribtype",
-            "pointavg",
-            "pointdist",
-            "pointgrouplist",
-            "pointgroupmask",
-            "pointlist",
-            "pointneighbours",
-            "pointpattern",
-            "points",
-            "pointsmap",
-            "pointsnummap",
-            "pointvals",
-            "prim",
-            "primattriblist",
-            "primattribsize",
-            "primattribtype",
-            "primdist",
-            "primduv",
-            "primgrouplist",
-            "primgroupmask",
-            "primlist",
-            "primneighbours",
-            "prims",
-            "primsmap",
-            "primsnummap",
-            "primuv",
-            "primvals",
-            "realuv",
-            "seampoints",
-            "spknot",
-            "surflen",
-            "uniqueval",
-            "uniquevals",
-            "unituv",
-            "uvdist",
-            "vertex",
-            "vertexattriblist",
-            "vertexattribsize",
-            "vertexattribtype",
-            "vertexgrouplist",
-            "vertexgroupmask",
-            "vertexs",
-            "vertexsmap",
-            "vertexsnummap",
-            "vertexvals",
-            "volumeaverage",
-            "volumegradient",
-            "volumeindex",
-            "volumeindextopos",
-            "volumemax",
-            "volumemin",
-            "volumepostoindex",
-            "volumeres",
-            "volumesample",
-            "volumevoxeldiameter"
-        )
-        self.nodeSecondExprFunctions = (
-            "haspoint",
-            "hasprim"
-        )
-        self.nodeThirdExprFunctions = (
-            "mindist",
-            "pointdist",
-            "primdist"
-        )
-        self.nodeFourthExprFunctions = (
-            "xyzdist"
-        )
-        self.nodeFifthExprFunctions = (
-            "uvdist"
-        )
+    node: hou.SopNode
+    parms: tuple[hou.Parm]
 
-    def blockEndNode(self, blockNode: hou.SopNode, debug = False) -> typing.Union[hou.SopNode, None]:
-        """
-        return the hou.SopNode object of type name block_end paired to "blockNode".
+class AD_channelReference(typing.NamedTuple):
+    """
+    A channel of another node referenced by a parm expression, like ch("../xform1/tx"). (see AD_HSopCompiler.channelReferences())
+    Spare inputs do not carry channels, so these references are reported instead of being rewritten.
 
-        blockNode
-        Must be either from type name block_end or block_begin.
-        """
+    parm
+    Path of the parm containing the reference.
 
-        if blockNode.type().name() == "block_end":
+    channel
+    The channel path, as written in the expression.
 
-            # Debug output
-            if debug == True:
-                print(f"{blockNode.name()} -> block_end :\n{blockNode.name()}")
-                print("")
+    node
+    Path of the node owning the channel.
+    """
 
-            return blockNode
-        
-        elif blockNode.type().name() == "block_begin":
+    parm: str
+    channel: str
+    node: str
 
-            # Debug output
-            if debug == True:
-                print(f"{blockNode.name()} -> block_end :\n{hou.node(blockNode.evalParm('./blockpath'))}")
-                print("")
+class AD_spareInput(typing.NamedTuple):
+    """
+    A spare input of a node, referencing "node". (see AD_HSopCompiler.neededSpareInputs())
 
-            return hou.node(blockNode.evalParm("./blockpath"))
-        
-        else:
+    path
+    Path of the spare input parm.
 
-            # Debug output
-            if debug == True:
-                print(f"Error: {blockNode.name()} is not an instance from SOP block_end or SOP block_begin type.")
-                print("")
+    exists
+    False if the spare input has to be created.
 
-            return None
+    number
+    The number at the end of "path", the spare input is referenced as -(number+1) in expressions.
+    """
 
-    def pairedBlockBeginNodes(self, blockEnd: hou.SopNode, debug = False) -> typing.Union[tuple[hou.SopNode], None]:
+    path: str
+    node: hou.SopNode
+    exists: bool
+    number: int
+
+class AD_spareInputs():
+    """
+    The spare inputs of a node, indexed by referenced node. Iterates over AD_spareInput objects.
+    """
+
+    __slots__ = ("inputs", "_numbers")
+
+    def __init__(self, inputs: typing.Iterable[AD_spareInput] = ()) -> None:
+        self.inputs: tuple[AD_spareInput] = tuple(inputs)
+        # referenced node -> number of the first spare input referencing it
+        self._numbers: dict[hou.SopNode, int] = {}
+        for spare in self.inputs:
+            self._numbers.setdefault(spare.node, spare.number)
+
+    def number(self, node: hou.SopNode) -> typing.Union[int, None]:
+        """
+        return the number of the spare input referencing "node", None if there is none.
         """
-        return the list of hou.SopNode objects of type name block_begin paired to "blockEnd".
 
-        blockEnd
-        Must be from type name block_end.
+        return self._numbers.get(node)
+
+    def reference(self, node: hou.SopNode) -> typing.Union[int, None]:
+        """
+        return the geometry reference of "node" in expressions : -1 for spare_input0, -2 for spare_input1... None if no spare input references it.
         """
 
-        blockBeginNodes: list[hou.SopNode] = []
+        number = self._numbers.get(node)
 
-        if blockEnd.type().name() == "block_end":
+        return -(number + 1) if number != None else None
 
-            for parm in blockEnd.parmsReferencingThis():
-                node: hou.SopNode = parm.node()
-                if node.type().name() == "block_begin":
-                    if node.parm("./blockpath") == parm:
-                        blockBeginNodes.append(node)
+    def __iter__(self) -> typing.Iterator[AD_spareInput]:
+        return iter(self.inputs)
 
-            # Debug output
-            if debug == True:
-                print(f"{blockEnd.name()} -> {len(blockBeginNodes)} paired block_begin nodes :")
-                for node in blockBeginNodes:
-                    print(node)
-                print("")
-            return tuple(blockBeginNodes)
+    def __len__(self) -> int:
+        return len(self.inputs)
 
-        else:
-            # Debug output
-            if debug == True:
-                print(f"Error: {blockEnd.name()} is not an instance from SOP block_end type.")
-                print("")
-            return None
+    def __getitem__(self, index: int) -> AD_spareInput:
+        return self.inputs[index]
 
-    def allAncestors(self, node: hou.SopNode, stop: list[hou.SopNode] = None, debug = False) -> tuple[hou.SopNode]:
-        """
-        return the list of hou.SopNode objects from which "node" depends on. It includes node inputs and all references from self.referencedNodes().
+    def __repr__(self) -> str:
+        return f"AD_spareInputs({self.inputs!r})"
 
-        stop
-        These nodes and their ancestors are not returned.
-        Note that if ancestors of a node that is in "stop" are ancestors of an ancestor of "node" that is not in stop, then they are included.
-        """
+class AD_plannedNode(typing.NamedTuple):
+    """
+    A node which does not exist yet. It is created when its AD_compilePlan is applied.
 
-        ancestors: list[hou.SopNode] = []
-
-        directInputs: list[hou.SopNode] = node.inputs()
-        for directInput in directInputs:
-            if directInput not in stop and directInput not in ancestors:
-                ancestors.append(directInput)
-        # directRefs: list[hou.SopNode] = node.references(include_children = False)
-        directRefs: list[hou.SopNode] = [ref[0] for ref in self.referencedNodes(node)]
-        for directRef in directRefs:
-            if directRef not in stop and directRef not in ancestors:
-                ancestors.append(directRef)
-
-        for ancestor in ancestors:
-            inputs: list[hou.SopNode] = ancestor.inputs()
-            for input in inputs:
-                if input != None and input != node:
-                    if input not in stop and input not in ancestors:
-                        ancestors.append(input)
-            # refs: list[hou.SopNode] = ancestor.references(include_children = False)
-            refs: list[hou.SopNode] = [ref[0] for ref in self.referencedNodes(ancestor)]
-            if len(refs) > 0:
-                for ref in refs:
-                    if ref not in stop and ref != node and ref.parent() == node.parent() and ref not in ancestors:
-                        ancestors.append(ref)
-        
-        # Debug output
-        if debug == True:
-            maxPrint = 50
-            print(f"{node.name()} -> {len(ancestors)} ancestors :")
-            for node in ancestors[:maxPrint]:
-                print(node)
-            if len(ancestors) > maxPrint:
-                print(f"and {len(ancestors)-maxPrint} more...")
-            print("")
+    name
+    Unique name of the node in its plan, the created node is named by Houdini.
 
-        return tuple(ancestors)
+    kind
+    Node type name : block_begin, compile_begin or compile_end.
 
-    def allDescendants(self, node: hou.SopNode, stop: list[hou.SopNode] = None, debug = False) -> tuple[hou.SopNode]:
-        """
-        return the list of hou.SopNode objects which depends on "node". It includes node outputs and all dependants from hou.Node.dependents() that verify "node" in self.referencedNodes(dependant).
+    network
+    Path of the network the node is created in.
+    """
 
-        stop
-        These nodes and their descendants are not returned.
-        Note that if descendants of a node that is in "stop" are descendants of an descendants of "node" that is not in stop, then they are included.
-        """
+    name: str
+    kind: str
+    network: str
 
-        descendants: list[hou.SopNode] = []
-        
-        directOutputs: list[hou.SopNode] = node.outputs()
-        for directOutput in directOutputs:
-            if directOutput not in stop and directOutput not in descendants:
-                descendants.append(directOutput)
-        directDeps: list[hou.SopNode] = node.dependents(include_children = False)
-        for directDep in directDeps:
-            if directDep not in stop and directDep not in descendants:
-                if node in [ref[0] for ref in self.referencedNodes(directDep)]:
-                    descendants.append(directDep)
-
-        for descendant in descendants:
-            outputs: list[hou.SopNode] = descendant.outputs()
-            for output in outputs:
-                if output != None and output != node:
-                    if output not in stop and output not in descendants:
-                        descendants.append(output)
-            deps: list[hou.SopNode] = descendant.dependents(include_children = False)
-            if len(deps) > 0:
-                for dep in deps:
-                    if dep not in stop and dep != node and dep.parent() == node.parent() and dep not in descendants:
-                        # print(f"{descendant} -> dep = {dep} -> {descendant in [ref[0] for ref in self.referencedNodes(dep)]}")
-                        if descendant in [ref[0] for ref in self.referencedNodes(dep)]:
-                            descendants.append(dep)
+    def parent(self) -> hou.Node:
+        return hou.node(self.network)
 
-        # Debug output
-        if debug == True:
-            maxPrint = 50
-            print(f"{node.name()} -> {len(descendants)} descendants :")
-            for node in descendants[:maxPrint]:
-                print(node)
-            if len(descendants) > maxPrint:
-                print(f"and {len(descendants)-maxPrint} more...")
-            print("")
+    def path(self) -> str:
+        return f"{self.network}/<{self.name}>"
 
-        return tuple(descendants)
+    def __str__(self) -> str:
+        return self.path()
 
-    def allNodesInBlock(self, blockNode: hou.SopNode, debug = False) -> tuple[hou.SopNode]:
-        """
-        return the list of hou.SopNode objects which are in the "blockNode" corresponding block.
-        """
+# A node of a plan : the path of an existing node or a planned node
+AD_planRef = typing.Union[str, AD_plannedNode]
 
-        allNodes: list[hou.SopNode] = []
+class AD_plannedInsertion(typing.NamedTuple):
+    """
+    A node inserted on connections : its input 0 is connected to "source" and it replaces "source" on the inputs of "targets".
 
-        blockEnd: hou.SopNode = self.blockEndNode(blockNode)
-        blockEnd_pairedBlockBeginNodes = self.pairedBlockBeginNodes(blockEnd)[:]
-        blockEnd_ancestors = self.allAncestors(blockEnd, stop=blockEnd_pairedBlockBeginNodes)[:]
+    targets
+    tuple[ tuple[ targetNode, inputIndex ] ]
 
-        blocksBeginDescendant: list[hou.SopNode] = []
-        for blockBegin in blockEnd_pairedBlockBeginNodes:
-            blockBeginDescendant = self.allDescendants(blockBegin, stop=[blockEnd,])[:]
-            blocksBeginDescendant.extend(blockBeginDescendant)
+    blockpath
+    Node set on the blockpath parm of the inserted node, if any.
+    """
 
-        allNodes.append(blockEnd)
-        for ancestor in  blockEnd_ancestors:
-            if ancestor in blocksBeginDescendant:
-                allNodes.append(ancestor)
-        allNodes.extend(blockEnd_pairedBlockBeginNodes)
-        
-        # Debug output
-        if debug == True:
-            maxPrint = 50
-            print(f"{blockEnd.name()} -> {len(allNodes)} nodes in block :")
-            for node in allNodes[:maxPrint]:
-                print(node)
-            if len(allNodes) > maxPrint:
-                print(f"and {len(allNodes)-maxPrint} more...")
-            print("")
+    node: AD_plannedNode
+    source: typing.Union[AD_planRef, None]
+    sourceOutput: int
+    targets: tuple[tuple[AD_planRef, int]]
+    blockpath: typing.Union[AD_planRef, None]
 
-        return tuple(allNodes)
+class AD_plannedSpareInput(typing.NamedTuple):
+    """
+    A spare input to create : node/spare_input<number> referencing "target".
+    """
 
-    def entryPoints(self, blockNode: hou.SopNode, debug = False) -> tuple[hou.NodeConnection]:
-        """
-        return the list of hou.NodeConnection objects which are entries of the "blockNode" corresponding block. The output of each connection is in block and the input is outside the block.
-        Note that is does not include the connections before the block_begin nodes of the corresponding block.
-        """
+    node: str
+    number: int
+    target: AD_planRef
 
-        entryPointsConnections: list[hou.NodeConnection] = []
+class AD_plannedParmEdit(typing.NamedTuple):
+    """
+    A parm value to replace, "old" is the current value.
 
-        blockEnd = self.blockEndNode(blockNode, debug=debug)
-        blockBegins = self.pairedBlockBeginNodes(blockEnd, debug=debug)[:]
-        allNodes = self.allNodesInBlock(blockNode, debug=debug)[:]
+    keyframe
+    Index of the edited keyframe in parm.keyframes(), None if the raw value of the parm is edited.
+    """
 
-        for node in allNodes:
-            if node not in blockBegins:
-                for input in node.inputConnectors():
-                    for connection in input:
-                        if connection.inputNode() not in allNodes:
-                            entryPointsConnections.append(connection)
+    parm: str
+    keyframe: typing.Union[int, None]
+    old: str
+    new: str
 
-        # Debug output
-        if debug == True:
-            print(f"{blockEnd.name()} -> {len(entryPointsConnections)} entry points :")
-            for connection in entryPointsConnections:
-                print(connection)
-            print("")
-        
-        return tuple(entryPointsConnections)
-    
-    def createBlockBeginNodes(self, blockNode: hou.SopNode, debug=False) -> tuple[hou.SopNode]:
-        """
-        return the list of hou.SopNode objects which are created by this method.
+class AD_plannedLoopSetting(typing.NamedTuple):
+    """
+    A parm of a block_end set so that the compiled loop runs faster, and why. "new" equal to "old" records a setting left as it is.
+    "old" and "new" are None for a setting the block_end has no parm for, recorded so that the choice is reported.
+    """
 
-        Creates block_begin nodes on each connection in self.entryPoints(blockNode). The nodes are paired to there corresponding block_end node.
-        """
+    blockEnd: str
+    parm: str
+    old: typing.Union[int, None]
+    new: typing.Union[int, None]
+    reason: str
 
-        createdNodes: list[hou.SopNode] = []
+class AD_compilePlan(typing.NamedTuple):
+    """
+    Every change of the scene needed to compile a block, computed by AD_HSopCompiler.planBlock() without changing the scene.
+    It is applied by AD_HSopCompiler.applyPlan(). Insertions are applied in order, planned nodes may refer to the ones before them.
 
-        entryPoints = self.entryPoints(blockNode, debug=debug)
-        blockEnd: hou.SopNode = self.blockEndNode(blockNode)
-        parent: hou.Node = blockEnd.parent()
+    blockEnd
+    Path of the block_end of the compiled block.
 
-        for connection in entryPoints:
-            newBlockBegin: hou.SopNode = parent.createNode("block_begin")
-            createdNodes.append(newBlockBegin)
+    blockEnds
+    Paths of the block_end nodes in the block, nested ones included.
 
-            newBlockBegin_input: tuple[hou.SopNode, int] = (connection.inputNode(), connection.outputIndex())
-            newBlockBegin_output: tuple[hou.SopNode, int] = (connection.outputNode(), connection.inputIndex())
+    nodes
+    The nodes in the block once the plan is applied.
 
-            newBlockBegin.setInput(0, newBlockBegin_input[0], newBlockBegin_input[1])
-            newBlockBegin_output[0].setInput(newBlockBegin_output[1], newBlockBegin, 0)
+    blockers
+    The nodes of the block which can not be compiled. A plan with blockers can not be applied. (see AD_HSopCompiler.compileBlockers())
 
-            newBlockBegin.parm("./method").set("input")
-            newBlockBegin.parm("./blockpath").set(newBlockBegin.relativePathTo(blockEnd))
+    loopSettings
+    The settings of the block_end nodes of the block. (see AD_HSopCompiler.loopSettings())
 
-            newBlockBegin.moveToGoodPosition(move_inputs=False, move_outputs=False, move_unconnected=False)
-        
-        # Debug output
-        if debug == True:
-            print(f"{blockEnd} -> {len(createdNodes)} block_begin nodes created :")
-            for node in createdNodes:
-                print(node)
-            print("")
-        
-        return tuple(createdNodes)
-    
-    def createCompileBlockNodes(self, blockNode: hou.SopNode, debug=False) -> tuple[hou.SopNode]:
+    channelReferences
+    The references of the nodes of the block to channels of other nodes, left as they are. (see AD_HSopCompiler.channelReferences())
+    """
+
+    blockEnd: str
+    blockEnds: tuple[str]
+    insertions: tuple[AD_plannedInsertion]
+    spareInputs: tuple[AD_plannedSpareInput]
+    parmEdits: tuple[AD_plannedParmEdit]
+    nodes: tuple[AD_planRef]
+    blockers: tuple[AD_compileBlocker] = ()
+    loopSettings: tuple[AD_plannedLoopSetting] = ()
+    channelReferences: tuple[AD_channelReference] = ()
+
+    def isEmpty(self) -> bool:
+        """
+        return True if applying the plan does not change the scene.
         """
-        return the list of hou.SopNode objects which are created by this method.
 
-        Creates compile_begin nodes on each input and output connection that are at the inputs and output of "blockNode" corresponding block.
+        return len(self.insertions) == 0 and len(self.spareInputs) == 0 and len(self.parmEdits) == 0 and all(setting.old == setting.new for setting in self.loopSettings)
+
+    def asDict(self) -> dict:
+        """
+        return the plan as a JSON serializable dict. Planned nodes are written as their path. (see AD_plannedNode.path())
         """
 
-        createdNodes: list[hou.SopNode] = []
+        def ref(node: typing.Union[AD_planRef, None]) -> typing.Union[str, None]:
+            return node.path() if isinstance(node, AD_plannedNode) else node
+
+        return {
+            "blockEnd": self.blockEnd,
+            "blockEnds": list(self.blockEnds),
+            "insertions": [{"node": ref(insertion.node), "type": insertion.node.kind, "source": ref(insertion.source), "sourceOutput": insertion.sourceOutput, "targets": [[ref(target), index] for target, index in insertion.targets], "blockpath": ref(insertion.blockpath)} for insertion in self.insertions],
+            "spareInputs": [{"node": spare.node, "number": spare.number, "target": ref(spare.target)} for spare in self.spareInputs],
+            "parmEdits": [{"parm": edit.parm, "keyframe": edit.keyframe, "old": edit.old, "new": edit.new} for edit in self.parmEdits],
+            "nodes": [ref(node) for node in self.nodes],
+            "blockers": [{"node": blocker.node, "type": blocker.type, "reason": blocker.reason} for blocker in self.blockers],
+            "loopSettings": [setting._asdict() for setting in self.loopSettings],
+            "channelReferences": [reference._asdict() for reference in self.channelReferences],
+        }
+
+    def __str__(self) -> str:
+        lines: list[str] = [f"Plan for {self.blockEnd} :"]
+        for blocker in self.blockers:
+            lines.append(f"! {blocker.node} ({blocker.type}) : {blocker.reason}")
+        for insertion in self.insertions:
+            targets = ", ".join(f"{target}[{index}]" for target, index in insertion.targets)
+            lines.append(f"+ {insertion.node.kind} {insertion.node} : {insertion.source}[{insertion.sourceOutput}] -> {targets}")
+        for spare in self.spareInputs:
+            lines.append(f"+ {spare.node}/spare_input{spare.number} -> {spare.target}")
+        for edit in self.parmEdits:
+            at = f" (keyframe {edit.keyframe})" if edit.keyframe != None else ""
+            lines.append(f"~ {edit.parm}{at} :")
+            lines.append(f"    - {edit.old}")
+            lines.append(f"    + {edit.new}")
+        for setting in self.loopSettings:
+            if setting.old == None:
+                lines.append(f"= {setting.blockEnd} {setting.parm} : not available ({setting.reason})")
+            elif setting.new != setting.old:
+                lines.append(f"~ {setting.blockEnd}/{setting.parm} : {setting.old} -> {setting.new} ({setting.reason})")
+            else:
+                lines.append(f"= {setting.blockEnd}/{setting.parm} : {setting.old} ({setting.reason})")
+        for reference in self.channelReferences:
+            lines.append(f"? {reference.parm} references the channel {reference.channel} of {reference.node}")
 
-        blockEnd: hou.SopNode = self.blockEndNode(blockNode)
-        blocksBegin: tuple[hou.SopNode] = self.pairedBlockBeginNodes(blockEnd)
-        parent: hou.SopNode = blockEnd.parent()
+        return "\n".join(lines)
 
-        inputConnections: list[hou.NodeConnection] = []
-        outputConnections: list[hou.NodeConnection] = []
+class AD_HSopCompiler():
+    """
+    A bunch of methods that helps with convert a sop network in order to compile it.
 
-        for blockBegin in blocksBegin:
-            for connection in blockBegin.inputConnections():
-                inputConnections.append(connection)
-        
-        for connection in blockEnd.outputConnections():
-            outputConnections.append(connection)
+    incremental
+    If True, nodes and blocks whose fingerprint did not change since they were last compiled are skipped. (see self.isNodeUpToDate() and self.isBlockUpToDate())
 
-        newCompileEnd: hou.SopNode = parent.createNode("compile_end")
-        createdNodes.append(newCompileEnd)
-        newCompileEnd.setInput(0, blockEnd, 0)
+    analysisWorkers
+    Number of plain Python processes analysing the parms texts of a network before its dependency graph is built. (see self.prefetchAnalysis() and self.analysisExecutor())
+    1 analyses each parm on the main thread when it is needed.
 
-        for connection in outputConnections:
-            connection.outputNode().setInput(connection.inputIndex(), newCompileEnd, 0)
+    compileRules
+    The node types which can not be compiled, blocks containing one are not compiled. (see self.compileBlockers())
+    None disables the check.
 
-        newCompileEnd.moveToGoodPosition(move_inputs=False, move_outputs=False, move_unconnected=False)
+    measureFrames
+    If not None, compiled blocks are cooked at these frames before and after being compiled, and their cook times are added to the report. (see self.measureCook())
+    """
 
-        for connection in inputConnections:
-            newCompileBegin: hou.SopNode = parent.createNode("compile_begin")
-            createdNodes.append(newCompileBegin)
+    # User data keys where the compile state is stored
+    NODE_FINGERPRINT_KEY: str = "ad_hsopcompiler_fingerprint"
+    BLOCK_NODES_KEY: str = "ad_hsopcompiler_blocknodes"
+    # block_end "method" menu values : Feedback Each Iteration, Merge Each Iteration (see loopSettings())
+    GATHER_FEEDBACK: int = 0
+    GATHER_MERGE: int = 1
+    # block_end "itermethod" menu values : Auto Detect from Inputs, By Pieces or Points, By Count
+    ITERATE_AUTO: int = 0
+    ITERATE_BY_PIECES: int = 1
+    ITERATE_BY_COUNT: int = 2
+    # Kinds of parm tuples (see parmTupleKind())
+    PARM_NONE: str = "none"
+    PARM_NUMERIC: str = "numeric"
+    PARM_STRING: str = "string"
+    PARM_NODE_REFERENCE: str = "nodeReference"
+    PARM_VEX: str = "vex"
+    # Parm template types without value
+    VALUELESS_PARM_TYPES: tuple[str] = (hou.parmTemplateType.FolderSet, hou.parmTemplateType.Folder, hou.parmTemplateType.Label, hou.parmTemplateType.Separator, hou.parmTemplateType.Button)
+    # Below this number of parms texts, starting a pool costs more than it saves
+    PARALLEL_ANALYSIS_MIN_TEXTS: int = 2000
+    # Environment variable of the Python interpreter running the analysis workers (see workerExecutable())
+    WORKER_PYTHON_ENV: str = "HOUDINI_AUTOCOMPILEBLOCK_PYTHON"
+    # Executable names starting a Houdini, never used for the analysis workers
+    HOUDINI_EXECUTABLES: tuple[str] = ("houdini", "hython", "hbatch", "happrentice", "hindie", "hescape")
+    # Python interpreters shipped with Houdini, relative to $HFS : Linux, macOS, Windows
+    HFS_PYTHON_PATTERNS: tuple[str] = ("python/bin/python3", "Frameworks/Python.framework/Versions/Current/bin/python3", "python3*/python.exe")
+    # node type name -> names of its parms holding VEX code (see self.vexSnippetAnalysis())
+    VEX_SNIPPET_PARMS: dict[str, tuple[str]] = {
+        "attribwrangle": ("snippet",),
+        "pointwrangle": ("snippet",),
+        "primitivewrangle": ("snippet",),
+        "vertexwrangle": ("snippet",),
+        "volumewrangle": ("snippet",),
+        "deformationwrangle": ("snippet",),
+    }
+
+    def __init__(self, profiler: typing.Union["AD_compileProfiler", None] = None, incremental=True, analysisWorkers: int = 1, compileRules: typing.Union[AD_compileRules, None] = compileRules, measureFrames: typing.Union[typing.Iterable[float], None] = None, measureRepeat: int = 1) -> None:
+        self.reg = AD_regexTools()
+        self.spareInputTemplate = hou.StringParmTemplate(name='spare_input', label='Spare Input ', num_components=1, string_type=hou.stringParmType.NodeReference, default_value=("",), tags={ "cook_dependent" : "1",  "opfilter" : "!!SOP!!",  "oprelative" : ".", })
+        self.lexer = AD_hscriptLexer()
+        # Hscript functions taking geometry arguments, shared by all compilers. (see ad_exprtools.AD_hscriptSignatures)
+        self.signatures: AD_hscriptSignatures = hscriptSignatures
+        # Hscript local variables rewritten as function calls, shared by all compilers. (see ad_exprtools.AD_hscriptVariables)
+        self.variables: AD_hscriptVariables = hscriptVariables
+        # Node types which can not be compiled, shared by all compilers by default. (see ad_compilerules.AD_compileRules)
+        self.compileRules: typing.Union[AD_compileRules, None] = compileRules
+        self._graphs: dict[hou.Node, AD_HSopGraph] = {}
+        # (parm, fingerprint) -> analysis results, only while inside self.analysisScope()
+        self._parmAnalysis: typing.Union[dict[tuple[hou.Parm, tuple], dict[str, tuple]], None] = None
+        # expr -> (stringsMatches, inputReferencesMatches, variablesMatches) analysed in a pool, only while inside self.analysisScope()
+        self._exprMatches: typing.Union[dict[str, tuple[tuple[AD_exprMatch], tuple[AD_exprMatch], tuple[AD_exprMatch]]], None] = None
+        self.analysisWorkers: int = analysisWorkers
+        # (network, path) -> node or None, only while inside self.analysisScope() (see self.pathToNode())
+        self._paths: typing.Union[dict[tuple[typing.Union[hou.Node, None], str], typing.Union[hou.SopNode, None]], None] = None
+        # node -> its network, only while inside self.analysisScope()
+        self._networks: typing.Union[dict[hou.Node, hou.Node], None] = None
+        # node -> parms which can reference other nodes, only while inside self.analysisScope() (see self.expressionParms())
+        self._expressionParms: typing.Union[dict[hou.SopNode, tuple[hou.Parm]], None] = None
+        # nodeTypeName -> parmTupleName -> (kind, skippedAtDefault), for the parm tuples of the node types (see self.typeParmTupleKinds())
+        self._parmTupleKinds: dict[str, dict[str, tuple[str, bool]]] = {}
+        # Name of the compile phase being run. (see self.compilePhase())
+        self.currentPhase: str = "idle"
+        # Records a span for each compile phase when not None. (see AD_compileProfiler)
+        self.profiler: typing.Union[AD_compileProfiler, None] = profiler
+        self.incremental: bool = incremental
+        self.measureFrames: typing.Union[tuple[float], None] = tuple(measureFrames) if measureFrames != None else None
+        # Cooks per frame when measuring, the best time is kept
+        self.measureRepeat: int = measureRepeat
+        # Nodes created by the current compile run, laid out when it ends, only while inside self.sceneEdit()
+        self._layoutNodes: typing.Union[list[hou.SopNode], None] = None
+        # (node, inputIndex) -> (plannedInput, outputIndex), inputs the scene will have once a plan is applied. (see self.planBlock())
+        self._plannedInputs: typing.Union[dict[tuple[hou.SopNode, int], tuple[typing.Union[hou.SopNode, AD_plannedNode], int]], None] = None
+
+    @contextlib.contextmanager
+    def compilePhase(self, name: str, node: typing.Union[hou.Node, None] = None):
+        """
+        Context in which self.currentPhase is "name". Phases can be nested, the innermost one is the current one.
+        Phases of a compile run : compileCheck, cookMeasure, discovery, blockBeginCreation, compileNodesCreation, spareInputPlanning, spareInputCreation, expressionRewriting, loopConfiguration, layout
+        If self.profiler is not None, the phase is recorded as a span, with the path of "node" as argument.
+        """
 
-            newCompileBegin_input: tuple[hou.SopNode, int] = (connection.inputNode(), connection.outputIndex())
-            newCompileBegin_output: tuple[hou.SopNode, int] = (connection.outputNode(), connection.inputIndex())
+        previousPhase = self.currentPhase
+        self.currentPhase = name
+        profiler = self.profiler
+        startTime = time.perf_counter() if profiler != None else None
+        try:
+            yield
+        finally:
+            self.currentPhase = previousPhase
+            if startTime != None:
+                profiler.addSpan(name, startTime, time.perf_counter(), {"node": node.path()} if node != None else None)
+
+    @contextlib.contextmanager
+    def analysisScope(self):
+        """
+        Context in which the results of the parm analysis methods (self.parmTextAnalysis(), self.exprsInParm(), self.referencedNodesInParm(), self.referencedInputsInParm()), of self.expressionParms() and of self.pathToNode() are cached.
+        Results are keyed by parm and by self.parmFingerprint(), so a parm edited inside the scope is analysed again.
+        Nested scopes share the cache of the outermost one, which is dropped when it exits.
 
-            newCompileBegin.setInput(0, newCompileBegin_input[0], newCompileBegin_input[1])
-            newCompileBegin_output[0].setInput(newCompileBegin_output[1], newCompileBegin, 0)
+        The outermost scope is a compile run : dependency graphs built before it are dropped when it starts, and the ones built inside it when it exits.
+        """
 
-            newCompileBegin.parm("./blockpath").set(newCompileBegin.relativePathTo(newCompileEnd))
+        if self._parmAnalysis != None:
+            yield
+            return
+
+        self.clearGraphs()
+        self._parmAnalysis = {}
+        self._exprMatches = {}
+        self._paths = {}
+        self._networks = {}
+        self._expressionParms = {}
+        try:
+            yield
+        finally:
+            self._parmAnalysis = None
+            self._exprMatches = None
+            self._paths = None
+            self._networks = None
+            self._expressionParms = None
+            self.clearGraphs()
+
+    @contextlib.contextmanager
+    def sceneEdit(self, label: str):
+        """
+        Context in which a compile run writes to the scene. All the writes are a single undo named "label", and the created nodes are laid out once, when it exits. (see self.layoutNodes())
+        If an exception is raised inside it, the writes are undone before the exception is raised again. (see self.rollbackSceneEdit())
+        Nested contexts are part of the outermost one.
+        """
 
-            newCompileBegin.moveToGoodPosition(move_inputs=False, move_outputs=False, move_unconnected=False)
+        if self._layoutNodes != None:
+            yield
+            return
+
+        self._layoutNodes = []
+        undoLabels = hou.undos.undoLabels()
+        try:
+            with hou.undos.group(label):
+                yield
+                with self.compilePhase("layout"):
+                    self.layoutNodes(self._layoutNodes)
+        except Exception:
+            self.rollbackSceneEdit(label, undoLabels)
+            raise
+        finally:
+            self._layoutNodes = None
+
+    def rollbackSceneEdit(self, label: str, undoLabels: tuple[str]):
+        """
+        Undoes the undo named "label" if it was added on top of "undoLabels", the undo labels before it started. (see self.sceneEdit())
+        The cached paths, graphs and expression parms are dropped, as the undone nodes do not exist anymore.
+        Nothing can be undone while undos are disabled.
+        """
 
-        # Debug output
-        if debug == True:
-            print(f"{blockEnd} -> {len(createdNodes)} compile nodes created :")
-            for node in createdNodes:
-                print(node)
-            print("")
+        if hou.undos.areEnabled() == True:
+            labels = hou.undos.undoLabels()
+            if labels != undoLabels and len(labels) > 0 and labels[0] == label:
+                hou.undos.performUndo()
 
-        return tuple(createdNodes)
+        self.clearPaths()
+        self.clearGraphs()
+        if self._expressionParms != None:
+            self._expressionParms.clear()
 
-    def existingSpareInputs(self, node: hou.SopNode, debug=False) -> tuple[hou.Parm]:
+    def layoutNodes(self, nodes: typing.Iterable[hou.SopNode]):
         """
-        return the list of hou.Parm objects which are spare inputs in "node".
+        Moves each of "nodes" next to its connections, in a single pass once they are all wired.
         """
 
-        spareInputs: list[hou.Parm] = []
-        spareParms: list[hou.Parm] = node.spareParms()
-
-        for parm in spareParms:
-            if re.search(r"/spare_input\d+$", parm.path()) != None:
-                spareInputs.append(parm)
+        for node in nodes:
+            node.moveToGoodPosition(move_inputs=False, move_outputs=False, move_unconnected=False)
 
-        # Debug output
-        if debug == True:
-            print(f"{node} -> {len(spareInputs)} existing spare inputs :")
-            for spareInput in spareInputs:
-                node = spareInput.node().node(spareInput.rawValue())
-                if node != None:
-                    print(f"{spareInput} referencing {node}")
-                else:
-                    print(f"{spareInput} referencing unknown node at {spareInput.rawValue()}")
-            print("")
-        
-        return tuple(spareInputs)
-    
-    def referencedNodes(self, target: typing.Union[hou.Parm, hou.SopNode], debug=False) -> tuple[tuple[hou.SopNode, tuple[hou.Parm]]]:
+    def parmFingerprint(self, parm: hou.Parm) -> tuple[str, tuple[str], tuple[str]]:
+        """
+        return the content of "parm" the analysis depends on : tuple[ rawValue, tuple[ hscriptKeyframesExpressions ], tuple[ pythonKeyframesExpressions ] ]
         """
-        return the list of hou.SopNode objects which are referenced in "target" which is either a hou.Parm object or a hou.SopNode object.
-        The returned tuple is tuple[ tuple[ referencedNode, tuple[ parmsWhichReferenceIt, ] ] ]
-        References are from self.referencedNodesInParm()
-        """
-
-        referencedNodes: list[list[typing.Union[hou.SopNode, list[hou.Parm]]]] = []
-
-        if target.__class__ == hou.SopNode:
-            node = target
-            parms: list[hou.Parm] = node.parms()
-            for parm in parms:
-                # Find refs from path
-                parmNodeRefs: list[hou.SopNode] = list(self.referencedNodesInParm(parm))
-                # Find refs from input
-                parmInputRefs: list[hou.SopNode] = []
-                inputsIndexes: list[int] = list(self.referencedInputsInParm(parm))
-
-                for index in inputsIndexes:
-                    inputNode = parm.node().input(index)
-                    if inputNode != None and inputNode not in parmInputRefs:
-                        parmInputRefs.append(inputNode)
-
-                parmRefs: list[hou.SopNode] = parmNodeRefs
-                parmRefs.extend(parmInputRefs)                
-                if len(parmRefs) > 0:
-                    # Append if not in list
-                    for ref in parmRefs:
-                        found = 0
-                        for i in referencedNodes:
-                            if ref == i[0]:
-                                i[1].append(parm)
-                                found = 1
-                                break
-                        if found == 0:
-                            referencedNodes.append([ref, [parm,]])
-        else:
-            referencedNodes.extend(self.referencedNodesInParm(target))
-            referencedNodes.extend(list([target.node().input(index) for index in self.referencedInputsInParm(parm)]))
-                    
-        # Debug output
-        if debug == True:
-            print(f"{target} -> {len(referencedNodes)} existing references in embedded Hscript :")
-            for ref in referencedNodes:
-                print(f"{ref[0]} in :")
-                for parm in ref[1]:
-                    print(parm)
-            print("")
-
-        # Converting to tuple
-        for i in range(0,len(referencedNodes)):
-            for j in range(0,len(referencedNodes[i])):
-                if j == 1:
-                    referencedNodes[i][j] = tuple(referencedNodes[i][j])
-            referencedNodes[i] = tuple(referencedNodes[i])
-        referencedNodes = tuple(referencedNodes)
 
-        return referencedNodes
+        hscriptExprs: list[str] = []
+        pythonExprs: list[str] = []
+        for key in parm.keyframes():
+            if key.expressionLanguage() == hou.exprLanguage.Python:
+                pythonExprs.append(key.expression())
+            else:
+                hscriptExprs.append(key.expression())
 
-    def referencedNodesInParm(self, parm: hou.Parm) -> tuple[hou.SopNode]:
+        return (parm.rawValue(), tuple(hscriptExprs), tuple(pythonExprs))
+
+    def _analyseParm(self, parm: hou.Parm, name: str, function: typing.Callable[[hou.Parm, tuple[str, tuple[str], tuple[str]]], tuple], fingerprint: typing.Union[tuple[str, tuple[str], tuple[str]], None] = None) -> tuple:
         """
-        return the list of hou.SopNode objects which are referenced in "parm".
-        This takes into account keyframes.
+        return function(parm, fingerprint), cached under "name" while inside self.analysisScope().
 
-        References are either string node paths or input references.
-        e.g. : detail(0, 'attrName', 2)
-                      ^
-            -> 1 input reference -> 0 -> returned value will be the hou.SopNode connected in input 0
-        e.g. : detail("../null1", 'attrName', 2)
-                      ^
-            -> 1 node reference -> "../null1" -> returned value will be the hou.SopNode self.pathToNode("../null1", parm)
+        fingerprint
+        self.parmFingerprint(parm), read if None.
         """
 
-        refs: list[hou.SopNode] = []
-        exprs: list[str] = self.exprsInParm(parm)[:]
+        if fingerprint == None:
+            fingerprint = self.parmFingerprint(parm)
+        if self._parmAnalysis == None:
+            return function(parm, fingerprint)
 
-        if len(exprs) > 0:
-            for expr in exprs:
+        entry = self._parmAnalysis.setdefault((parm, fingerprint), {})
+        if name not in entry:
+            entry[name] = function(parm, fingerprint)
 
-                # Finds out explicitly referenced nodes
-                stringsMatches = self.matchStrings(expr)[:]
-                for stringMatch in stringsMatches:
-                    node = self.pathToNode(stringMatch.group().strip("\"'"), parm)
-                    if node != None and node not in refs:
-                        refs.append(node)
-        
-        if parm.parmTemplate().type() == hou.parmTemplateType.String:
-            if parm.parmTemplate().stringType() == hou.stringParmType.NodeReference or parm.parmTemplate().stringType() == hou.stringParmType.NodeReferenceList:
-                rawValue: str = parm.rawValue()
-                splittedRawValue = rawValue.split(" ")
-                for path in splittedRawValue:
-                    node = self.pathToNode(path, parm)
-                    if node != None and node not in refs:
-                        refs.append(node)
+        return entry[name]
 
-        return tuple(refs)
-    
-    def exprsInParm(self, parm: hou.Parm) -> tuple[str]:
+    def parmTextAnalysis(self, parm: hou.Parm) -> AD_parmTextAnalysis:
+        """
+        return the analysis of the expressions of "parm" : expressions, string literals, input references and local variables. (see ad_exprtools.analyseParmText())
         """
-        return the list of strings that are Hscript expressions in "parm".
-        This takes into account keyframes.
 
-        If an expression is in `, the expression will be returned without it.
+        return self._analyseParm(parm, "text", self._parmTextAnalysis)
+
+    def _parmTextAnalysis(self, parm: hou.Parm, fingerprint: tuple[str, tuple[str], tuple[str]]) -> AD_parmTextAnalysis:
+        return analyseParmText(fingerprint, self.signatures, self.variables)
+
+    def isVexSnippetParm(self, parm: hou.Parm) -> bool:
+        """
+        return True if "parm" holds VEX code. (see self.VEX_SNIPPET_PARMS)
         """
 
-        exprs: list[str] = []
+        return parm.name() in self.VEX_SNIPPET_PARMS.get(parm.node().type().name(), ())
 
-        keyframes = parm.keyframes()
-        if len(keyframes) > 0:
-            for key in keyframes:
-                exprs.append(key.expression())
-        else:
-            exprs.extend([expr.group().strip("`") for expr in self.matchHscript(parm.rawValue())])
+    def vexSnippetAnalysis(self, parm: hou.Parm) -> AD_vexSnippetAnalysis:
+        """
+        return the analysis of the VEX code of "parm" : op: geometry paths and channel references. (see ad_exprtools.analyseVexSnippet())
+        """
 
-        return tuple(exprs)
+        return self._analyseParm(parm, "vex", self._vexSnippetAnalysis)
 
-    def pathToNode(self, path: str, parent: typing.Union[hou.Parm, hou.SopNode], debug=False):
+    def _vexSnippetAnalysis(self, parm: hou.Parm, fingerprint: tuple[str, tuple[str], tuple[str]]) -> AD_vexSnippetAnalysis:
+        return analyseVexSnippet(fingerprint[0])
+
+    def prefetchAnalysis(self, nodes: typing.Iterable[hou.SopNode], workers: typing.Union[int, None] = None, executor: typing.Union[concurrent.futures.Executor, None] = None) -> int:
         """
-        return the hou.SopNode object corresponding to "path". "parent" helps to deal with relative paths.
+        Analyses the texts of all the parms of "nodes" at once, in a pool of "workers" (default : self.analysisWorkers), and caches the results for the current self.analysisScope(). (see self.analysisExecutor())
+        The parms are read on the calling thread, only the text analysis runs in the pool. (see ad_exprtools.analyseParmTextsInPool())
+        Does nothing outside of self.analysisScope(), with less than 2 workers or cpus, if there are less than self.PARALLEL_ANALYSIS_MIN_TEXTS texts to analyse, or if the pool can not be started.
+        return the number of analysed texts.
+
+        executor
+        Pool to use instead of a new self.analysisExecutor().
         """
 
-        if parent.__class__ == hou.Parm:
+        workers = min(workers or self.analysisWorkers, os.cpu_count() or 1)
+        if self._parmAnalysis == None or (executor == None and workers < 2):
+            return 0
+
+        # text -> parms
+        texts: dict[tuple[str, tuple[str], tuple[str]], list[hou.Parm]] = {}
+        for node in nodes:
+            for parm in self.expressionParms(node):
+                fingerprint = self.parmFingerprint(parm)
+                if "text" not in self._parmAnalysis.get((parm, fingerprint), {}):
+                    texts.setdefault(fingerprint, []).append(parm)
+
+        if len(texts) < self.PARALLEL_ANALYSIS_MIN_TEXTS:
+            return 0
+
+        try:
+            if executor == None:
+                pool = self.analysisExecutor(workers)
+                if pool == None:
+                    return 0
+                with pool:
+                    analyses = analyseParmTextsInPool(texts, self.signatures, pool, variables=self.variables)
+            else:
+                analyses = analyseParmTextsInPool(texts, self.signatures, executor, variables=self.variables)
+        except (OSError, concurrent.futures.BrokenExecutor):
+            # The workers could not start, the parms are analysed when they are needed
+            return 0
+
+        for fingerprint, analysis in analyses.items():
+            for parm in texts[fingerprint]:
+                self._parmAnalysis.setdefault((parm, fingerprint), {})["text"] = analysis
+            for expr, strings, inputRefs, variableRefs in analysis.matches:
+                self._exprMatches[expr] = (strings, inputRefs, variableRefs)
 
-            try:
-                node = hou.node(parent.node().node(path).path())
-            except:
-                node = None
+        return len(analyses)
 
-        else:
+    def analysisExecutor(self, workers: int) -> typing.Union[concurrent.futures.Executor, None]:
+        """
+        return a new process pool of "workers" for self.prefetchAnalysis(), None if no Python interpreter can run it. (see self.workerExecutable())
+        The workers only run ad_exprtools, which does not need hou : they are plain Python processes, spawned and never forked, so no Houdini is started nor licensed per worker, and the multithreaded Houdini process is never forked. The same pool is used in the Houdini UI and in hython.
+        """
 
-            try:
-                node = hou.node(parent.node(path).path())
-            except:
-                node = None
+        executable = self.workerExecutable()
+        if executable == None:
+            return None
 
-        return node
-    
-    def referencedInputsInParm(self, parm: hou.Parm) -> tuple[int]:
+        context = multiprocessing.get_context("spawn")
+        context.set_executable(executable)
+
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+    def workerExecutable(self) -> typing.Union[str, None]:
         """
-        return the list of referenced inputs in "parm".
-        e.g. : detail(0, 'attrName', 2)
-                      ^
-            -> 1 input reference -> returned value will be 0
+        return the plain Python interpreter of the analysis worker processes, the first found of :
+        the interpreter in the self.WORKER_PYTHON_ENV environment variable,
+        the current Python executable if it is not a Houdini executable (houdini, hython...),
+        the Python interpreter shipped with Houdini in $HFS.
+        None if there is none.
         """
 
-        refs: list[int] = []
-        exprs: list[str] = self.exprsInParm(parm)[:]
+        executable = os.environ.get(self.WORKER_PYTHON_ENV)
+        if executable:
+            return executable
 
-        if len(exprs) > 0:
-            for expr in exprs:
-                inputRefsMatches = self.matchHscriptInputReferences(expr)
-                for inputMatch in inputRefsMatches:
-                    inputRef = int(inputMatch.group(2))
-                    if inputRef not in refs:
-                        refs.append(inputRef)
+        name = os.path.splitext(os.path.basename(sys.executable or ""))[0].lower()
+        if sys.executable and not name.startswith(self.HOUDINI_EXECUTABLES):
+            return sys.executable
 
-        return tuple(refs)
+        hfs = os.environ.get("HFS")
+        if hfs != None:
+            for pattern in self.HFS_PYTHON_PATTERNS:
+                for executable in sorted(glob.glob(os.path.join(hfs, pattern))):
+                    if os.path.isfile(executable):
+                        return executable
+
+        return None
 
-    #                                                                          parm path, Node, existing or not
-    def neededSpareInputs(self, node: hou.SopNode, debug=False) -> tuple[tuple[str, hou.SopNode, bool]]:
+    def graph(self, network: hou.Node, debug=False) -> AD_HSopGraph:
         """
-        return the list of needed spare inputs in "node".
-        Returned tuple : tuple[ tuple[ spareInputPath, nodeReferencedBySpareInput, isTheSpareInputExisting ] ]
-        (if isTheSpareInputExisting == False the it needs to be created)
-        
-        A spare input is needed in a node referencing another node. References from self.referencedNodes().
+        return the AD_HSopGraph dependency graph index of "network".
+        Inside self.analysisScope(), the index is built on the first call and reused until the scope exits or self.clearGraphs() is called.
+        Outside of it, a new index is built on each call, so the user edits made in between are seen.
         """
 
-        referencedNodes = self.referencedNodes(node, debug=debug)[:]
+        graph = self._graphs.get(network)
+        if graph == None:
+            if self.analysisWorkers > 1:
+                with self.compilePhase("parallelAnalysis"):
+                    self.prefetchAnalysis(network.children())
 
-        existingSpareInputs = self.existingSpareInputs(node, debug=debug)[:]
-        sortedExistingSpareInputs = sorted([spare.path() for spare in existingSpareInputs])
-        sortedExistingSpareInputs = [hou.parm(path) for path in sortedExistingSpareInputs]
+            # The graph indexes the scene as it is, not as planned
+            plannedInputs = self._plannedInputs
+            self._plannedInputs = None
+            try:
+                with self.compilePhase("discovery"):
+                    graph = AD_HSopGraph(self, network, debug=debug)
+            finally:
+                self._plannedInputs = plannedInputs
+            if self._parmAnalysis != None:
+                self._graphs[network] = graph
 
-        if len(existingSpareInputs) > 0:
-            spareInputStart = self.reg.pathEndDigits(sortedExistingSpareInputs[-1].path()) + 1
+        return graph
+
+    def updateGraphs(self, nodes: typing.Iterable[hou.SopNode]):
+        """
+        Updates the dependency graph indexes already built with "nodes", created or rewired since. (see AD_HSopGraph.update())
+        """
+
+        # network -> its nodes of "nodes"
+        networksNodes: dict[hou.Node, list[hou.SopNode]] = {}
+        for node in nodes:
+            networksNodes.setdefault(node.parent(), []).append(node)
+
+        # The graph indexes the scene as it is, not as planned
+        plannedInputs = self._plannedInputs
+        self._plannedInputs = None
+        try:
+            for network, networkNodes in networksNodes.items():
+                graph = self._graphs.get(network)
+                if graph != None:
+                    graph.update(self, dict.fromkeys(networkNodes))
+        finally:
+            self._plannedInputs = plannedInputs
+
+    def clearGraphs(self, network: typing.Union[hou.Node, None] = None):
+        """
+        Forgets the dependency graph index of "network", or of all networks if "network" is None.
+        Must be called after the network has been edited.
+        """
+
+        if network == None:
+            self._graphs.clear()
         else:
-            spareInputStart = 0
-        spareInputIndex = spareInputStart
-        newSpareDefaultPath = node.path() + "/spare_input"
+            self._graphs.pop(network, None)
 
-        neededSpareInputs: list[tuple[str, hou.SopNode, bool]] = []
-        for ref in referencedNodes:
-            found = 0
-            for parm in ref[1]:
-                if parm.node() == node:
-                    if parm.parmTemplate().type() == hou.parmTemplateType.String:
-                        if parm.parmTemplate().stringType() == hou.stringParmType.NodeReference or parm.parmTemplate().stringType() == hou.stringParmType.NodeReferenceList:
-                            if len(self.exprsInParm(parm)) == 0:
-                                found = 1
-            for existingSpareInput in existingSpareInputs:
-                if ref[0] == hou.node(existingSpareInput.rawValue()):
-                    neededSpareInputs.append((existingSpareInput.path(), ref[0], True))
-                    found = 1
-            if found == 0 and ref[0].parent() == node.parent():
-                neededSpareInputs.append((newSpareDefaultPath + str(spareInputIndex), ref[0], False))
-                spareInputIndex = spareInputIndex + 1
+    def isNodeReferenceParm(self, parm: hou.Parm) -> bool:
+        """
+        return True if "parm" is a node reference or node reference list string parm.
+        """
 
-        # Debug output
-        if debug == True:
-            print(f"{node} -> Starting spare input creation at {spareInputStart}")
-            print(f"{node} -> {len([spare for spare in neededSpareInputs if spare[2] == False])} new spare input needed :")
-            for spare in neededSpareInputs:
-                if spare[2] == False:
-                    print(f"{spare[0]} referencing {spare[1]}")
-            print("")
+        parmTemplate = parm.parmTemplate()
+        if parmTemplate.type() != hou.parmTemplateType.String:
+            return False
 
-        return tuple(neededSpareInputs)
-    
-    def createNeededSpareInputs(self, neededSpareInputs: tuple[tuple[str, hou.SopNode, bool]], debug=False):
+        return parmTemplate.stringType() == hou.stringParmType.NodeReference or parmTemplate.stringType() == hou.stringParmType.NodeReferenceList
+
+    def parmTupleKind(self, parmTemplate: hou.ParmTemplate, vexParmNames: typing.Iterable[str] = ()) -> tuple[str, bool]:
         """
-        Creates the needed spare inputs.
+        return tuple[ kind, skippedAtDefault ] of the parm tuple of "parmTemplate", read from the template only. (see self.expressionParms())
+
+        kind
+        self.PARM_NONE for the parms without value, which can not reference nodes : folders, labels, separators and buttons.
+        self.PARM_NUMERIC for the parms which only reference nodes by keyframes.
+        self.PARM_STRING, self.PARM_NODE_REFERENCE and self.PARM_VEX for the string parms, whose raw value can also reference nodes.
+
+        skippedAtDefault
+        True if the tuple can not reference nodes while it is at its default : its default has no expression, no backtick, no node path and no VEX code.
+        Always False for a single numeric parm, whose keyframes are read as cheaply as hou.ParmTuple.isAtDefault().
         """
 
-        for spare in neededSpareInputs:
-            if spare[2] == False:
-                spareInputNumber: int  = self.reg.pathEndDigits(spare[0])
-                node: hou.SopNode  = hou.node(os.path.dirname(spare[0]))
-                referencedNode: hou.SopNode = spare[1]
-                self.createSpareInput(node, spareInputNumber, referencedNode, debug=debug)
-    
-    def createSpareInput(self, node: hou.SopNode, spareInputNumber: int = 0, referencedNode: hou.SopNode = None, debug=False):
+        templateType = parmTemplate.type()
+        if templateType in self.VALUELESS_PARM_TYPES:
+            return (self.PARM_NONE, True)
+
+        defaultExpressions = parmTemplate.defaultExpression() if hasattr(parmTemplate, "defaultExpression") else ()
+        skippedAtDefault: bool = all(expr == "" for expr in defaultExpressions)
+
+        if templateType != hou.parmTemplateType.String:
+            return (self.PARM_NUMERIC, skippedAtDefault and parmTemplate.numComponents() > 1)
+
+        defaultValues: tuple[str] = tuple(parmTemplate.defaultValue())
+        if parmTemplate.name() in vexParmNames:
+            kind = self.PARM_VEX
+        elif parmTemplate.stringType() == hou.stringParmType.NodeReference or parmTemplate.stringType() == hou.stringParmType.NodeReferenceList:
+            kind = self.PARM_NODE_REFERENCE
+        else:
+            kind = self.PARM_STRING
+        if kind != self.PARM_STRING and any(value != "" for value in defaultValues):
+            skippedAtDefault = False
+        if any("`" in value for value in defaultValues):
+            skippedAtDefault = False
+
+        return (kind, skippedAtDefault)
+
+    def typeParmTupleKinds(self, nodeType: hou.NodeType) -> dict[str, tuple[str, bool]]:
+        """
+        return { parmTupleName : (kind, skippedAtDefault) } for the parm tuples of "nodeType", read once from its parm templates and cached per node type. (see self.parmTupleKind())
+        Spare parms and multiparm instances are not part of it.
         """
-        Creates a spare input on "node" refererencing "referencedNode".
 
-        spareInputNumber
-        The number at the end of the path of the created spare input.
+        typeName: str = nodeType.name()
+        parmTupleKinds = self._parmTupleKinds.get(typeName)
+        if parmTupleKinds != None:
+            return parmTupleKinds
+
+        vexParmNames: tuple[str] = self.VEX_SNIPPET_PARMS.get(typeName, ())
+        parmTupleKinds = {}
+        for parmTemplate in nodeType.parmTemplateGroup().entriesWithoutFolders():
+            parmTupleKinds[parmTemplate.name()] = self.parmTupleKind(parmTemplate, vexParmNames)
+
+        self._parmTupleKinds[typeName] = parmTupleKinds
+        return parmTupleKinds
+
+    def expressionParms(self, node: hou.SopNode) -> tuple[hou.Parm]:
+        """
+        return the parms of "node" which can reference other nodes : parms with keyframes, parms with backtick expressions, non empty node reference string parms and VEX snippets.
+        Only these parms are analysed. (see self.referencedNodes())
+        Parm tuples are sorted from the parm templates of the node type (see self.typeParmTupleKinds()), spare parms and multiparm instances from their own template.
+        Parm tuples without value, and the ones at their default which can not reference nodes, are skipped without reading their parms. Only the raw value of string parms is read.
+        Inside self.analysisScope(), the result is cached per node until spare inputs are added to it.
         """
 
-        newSpareInputTemplate = self.spareInputTemplate.clone()
-        newSpareInputTemplate.setName(newSpareInputTemplate.name()+str(spareInputNumber))
-        newSpareInputTemplate.setLabel(newSpareInputTemplate.label()+str(spareInputNumber))
+        if self._expressionParms != None:
+            parms = self._expressionParms.get(node)
+            if parms != None:
+                return parms
+
+        nodeType: hou.NodeType = node.type()
+        parmTupleKinds: dict[str, tuple[str, bool]] = self.typeParmTupleKinds(nodeType)
+        vexParmNames: tuple[str] = self.VEX_SNIPPET_PARMS.get(nodeType.name(), ())
+        expressionParms: list[hou.Parm] = []
+
+        for parmTuple in node.parmTuples():
+            parmTupleKind = parmTupleKinds.get(parmTuple.name())
+            if parmTupleKind == None:
+                parmTupleKind = self.parmTupleKind(parmTuple.parmTemplate(), vexParmNames)
+
+            kind, skippedAtDefault = parmTupleKind
+            if kind == self.PARM_NONE:
+                continue
+            if skippedAtDefault == True and parmTuple.isAtDefault(compare_expressions=True):
+                continue
+
+            for parm in parmTuple:
+                if len(parm.keyframes()) > 0:
+                    expressionParms.append(parm)
+                    continue
+                if kind == self.PARM_NUMERIC:
+                    continue
 
-        node.addSpareParmTuple(newSpareInputTemplate)
-        spare = node.parm(f"./{newSpareInputTemplate.name()}")
-        spare.set(node.relativePathTo(referencedNode))
+                rawValue: str = parm.rawValue()
+                if "`" in rawValue:
+                    expressionParms.append(parm)
+                elif rawValue != "" and kind != self.PARM_STRING:
+                    expressionParms.append(parm)
 
-        # Debug output
-        if debug == True:
-            print(f"{node} -> New spare input created:\n{spare} referencing {referencedNode}\n")
+        expressionParms = tuple(expressionParms)
+        if self._expressionParms != None:
+            self._expressionParms[node] = expressionParms
 
+        return expressionParms
 
-    def matchHscript(self, string: str) -> tuple[re.Match]:
+    def _inputOf(self, node: hou.SopNode, index: int) -> typing.Union[hou.SopNode, AD_plannedNode, None]:
         """
-        return the list of re.Match objects that correspond to Hscript expressions in "string". ` are included.
+        return the node connected to the input "index" of "node", or the planned one while planning. (see self.planBlock())
         """
-        
-        HscriptPattern = r"`[^\r\n`]*`"
 
-        allMatches: tuple[re.Match] = self.reg.findallMatches(HscriptPattern, string)
-        
-        return allMatches
+        if self._plannedInputs != None:
+            plannedInput = self._plannedInputs.get((node, index))
+            if plannedInput != None:
+                return plannedInput[0]
 
-    def matchStrings(self, expr: str) -> tuple[re.Match]:
+        return node.input(index)
+
+    def _inputConnections(self, node: hou.SopNode) -> tuple[tuple[int, typing.Union[hou.SopNode, AD_plannedNode, None], int]]:
         """
-        return the list of re.Match objects that correspond to strings in "string". " and ' are included.
+        return tuple[ tuple[ inputIndex, inputNode, outputIndex ] ] for each connection to the inputs of "node", planned connections included. (see self._inputOf())
         """
 
-        stringPatterns = [
-            r"\"[^\r\n'\"]*\"",
-            r"'[^\r\n'\"]*'"
-        ]
+        connections: list[tuple[int, typing.Union[hou.SopNode, AD_plannedNode, None], int]] = []
+        for index, input in enumerate(node.inputConnectors()):
+            for connection in input:
+                plannedInput = self._plannedInputs.get((node, index)) if self._plannedInputs != None else None
+                if plannedInput != None:
+                    connections.append((index, plannedInput[0], plannedInput[1]))
+                else:
+                    connections.append((index, connection.inputNode(), connection.outputIndex()))
 
-        allStrings: list[re.Match] = []
+        return tuple(connections)
 
-        for pattern in stringPatterns:
-            allStrings.extend(self.reg.findallMatches(pattern, expr))
-        
-        return tuple(allStrings)
-    
-    def matchHscriptInputReferences(self, expr: str, debug=False) -> tuple[re.Match]:
+    def nodeFingerprint(self, node: hou.SopNode) -> str:
         """
-        return the list of re.Match objects that correspond to input references in "string". " and ' are included.
-        Note that there are subgroups : $1 returns the expression function
-                                        $2 returns the int number referencing the input
+        return a digest of what the conversion of "node" depends on : its type, its inputs, its spare inputs, and the raw values and keyframes of the parms which can reference nodes. (see self.expressionParms())
+        The other parms are not read, editing them does not change the conversion.
         """
 
-        inputReferenceFirstPattern  = f"({self.reg.listToOrString(self.nodeFirstExprFunctions)})"  r"\([ ]*(\d+)[ ]*[,\)]"
-        inputReferenceSecondPattern = f"({self.reg.listToOrString(self.nodeSecondExprFunctions)})" r"\([^\r\n,]+,[ ]*(\d+)[ ]*[,\)]"
-        inputReferenceThirdPattern  = f"({self.reg.listToOrString(self.nodeThirdExprFunctions)})"  r"\([^\r\n,]+,[^\r\n,]+,[ ]*(\d+)[ ]*[,\)]"
-        inputReferenceFourthPattern = f"({self.reg.listToOrString(self.nodeFourthExprFunctions)})" r"\([^\r\n,]+,[^\r\n,]+,[^\r\n,]+,[ ]*(\d+)[ ]*[,\)]"
-        inputReferenceFifthPattern  = f"({self.reg.listToOrString(self.nodeFifthExprFunctions)})"  r"\([^\r\n,]+,[^\r\n,]+,[^\r\n,]+,[^\r\n,]+,[ ]*(\d+)[ ]*[,\)]"
-        inputReferencePatterns: tuple[str] = (
-            inputReferenceFirstPattern,
-            inputReferenceSecondPattern,
-            inputReferenceThirdPattern,
-            inputReferenceFourthPattern,
-            inputReferenceFifthPattern
-        )
-        
-        strings = self.matchStrings(expr)
-        if len(strings) > 0:
-            mask = self.reg.invertMatchesMask(self.reg.matchesMask(strings))
-        else:
-            mask = None
+        inputs = tuple(input.path() if input != None else None for input in node.inputs())
+        spareInputs = tuple(parm.name() for parm in node.spareParms() if re.match(r"spare_input\d+$", parm.name()) != None)
+        parms = tuple((parm.name(), self.parmFingerprint(parm)) for parm in self.expressionParms(node))
 
-        allInputRefs: list[re.Match] = []
-        for inputReferencesPattern in inputReferencePatterns:
-            allInputRefs.extend(self.reg.findallMatches(inputReferencesPattern, expr, mask=mask))
+        return hashlib.sha1(repr((node.type().name(), inputs, spareInputs, parms)).encode()).hexdigest()
 
-        # Debug output
-        if debug == True:
-            print(f"{expr} -> {len(allInputRefs)} input references found :")
-            for match in allInputRefs:
-                print(f"{match} at index {match.start(2)}: {match.group(2)}")
+    def isNodeUpToDate(self, node: hou.SopNode) -> bool:
+        """
+        return True if "node" did not change since it was last made compilable. (see self.stampNode())
+        """
 
-        return tuple(allInputRefs)
+        fingerprint = node.userData(self.NODE_FINGERPRINT_KEY)
 
-    def makeExprCompilable(self, parent: typing.Union[hou.Parm, hou.SopNode], expr: str, neededSpareInputs: tuple[tuple[str, hou.SopNode, bool]], debug=False) -> str:
+        return fingerprint != None and fingerprint == self.nodeFingerprint(node)
+
+    def stampNode(self, node: hou.SopNode):
+        """
+        Stores the fingerprint of "node" in its user data.
         """
-        return the converted "expr" with spare inputs references instead of node paths and inputs references.
 
-        parent
-        The "parent" of the expression. The parm caontaining the expression or the node containing this parm.
+        node.setUserData(self.NODE_FINGERPRINT_KEY, self.nodeFingerprint(node))
 
-        neededSpareInputs
-        The needed spare input of the node.
-        This argument may be deleted in future updates.
+    def isBlockUpToDate(self, blockNode: hou.SopNode) -> bool:
+        """
+        return True if "blockNode" corresponding block was compiled and none of its nodes changed since. (see self.stampBlock())
+        Only the nodes recorded at compile time are checked : a node can only join the block by changing the inputs or parms of one of them.
         """
 
-        newExpr = expr
+        blockEnd = self.blockEndNode(blockNode)
+        if blockEnd == None:
+            return False
 
-        # Replacing node path references
-        stringsMatches = self.matchStrings(expr)
-        indexMap = None
-        for stringMatch in stringsMatches:
-            node = self.pathToNode(stringMatch.group().strip("\"'"), parent)
-            if node != None:
-                spareRefNum = None
-                for spare in neededSpareInputs:
-                    if spare[1] == node:
-                        spareRefNum = (self.reg.pathEndDigits(spare[0]) + 1)*-1
-                        break
-                if spareRefNum != None:
-                    subMatchResult = self.reg.subMatch(stringMatch, str(spareRefNum), newExpr, index=indexMap)
-                    newExpr = subMatchResult[0]
-                    indexMap = subMatchResult[1]
-        
-        # Replacing inputs references
-        inputRefMatches = self.matchHscriptInputReferences(expr, debug=debug)
-        indexMap = None
-        for inputRefMatch in inputRefMatches:
-            inputIndex = int(inputRefMatch.group(2))
-            if parent.__class__ == hou.SopNode:
-                inputNode = parent.input(inputIndex)
-            else:
-                inputNode = parent.node().input(inputIndex)
-            if inputNode != None:
-                spareRefNum = None
-                for spare in neededSpareInputs:
-                    if spare[1] == inputNode:
-                        spareRefNum = (self.reg.pathEndDigits(spare[0]) + 1)*-1
-                        break
-                if spareRefNum != None:
-                    subMatchResult = self.reg.subMatch(inputRefMatch, str(spareRefNum), newExpr, 2, index=indexMap)
-                    newExpr = subMatchResult[0]
-                    indexMap = subMatchResult[1]
+        blockNodes = blockEnd.userData(self.BLOCK_NODES_KEY)
+        if blockNodes == None:
+            return False
+
+        parent = blockEnd.parent()
+        for name in json.loads(blockNodes):
+            node = parent.node(name)
+            if node == None or not self.isNodeUpToDate(node):
+                return False
+
+        return True
+
+    def stampBlock(self, blockNode: hou.SopNode, blockNodes: typing.Iterable[hou.SopNode]):
+        """
+        Stores the names of "blockNodes" in the user data of "blockNode" corresponding block_end. "blockNodes" must be stamped. (see self.stampNode())
+        """
+
+        self.blockEndNode(blockNode).setUserData(self.BLOCK_NODES_KEY, json.dumps([node.name() for node in blockNodes]))
+
+    def blockEndNode(self, blockNode: hou.SopNode, debug = False) -> typing.Union[hou.SopNode, None]:
+        """
+        return the hou.SopNode object of type name block_end paired to "blockNode".
+
+        blockNode
+        Must be either from type name block_end or block_begin.
+        """
+
+        if blockNode.type().name() == "block_end":
+
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(f"{blockNode.name()} -> block_end :\n{blockNode.name()}")
+
+            return blockNode
         
-        # Debug output
-        if debug == True:
-            print(f"{expr} -> {len(stringsMatches)} strings found in expression :")
-            for string in stringsMatches:
-                print(string.group())
-            print("")
+        elif blockNode.type().name() == "block_begin":
+
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(f"{blockNode.name()} -> block_end :\n{blockNode.parm('./blockpath').evalAsNode()}")
+
+            return blockNode.parm("./blockpath").evalAsNode()
         
-        return newExpr
+        else:
+
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(f"Error: {blockNode.name()} is not an instance from SOP block_end or SOP block_begin type.")
+
+            return None
 
-    def makeParmCompilable(self, parm: hou.Parm, neededSpareInputs: tuple[tuple[str, hou.SopNode, bool]], debug=False):
+    def pairedBlockBeginNodes(self, blockEnd: hou.SopNode, debug = False) -> typing.Union[tuple[hou.SopNode], None]:
         """
-        Convert parm Hscript expressions with spare inputs references instead of node paths and inputs references. (see self.makeExprCompilable())
+        return the list of hou.SopNode objects of type name block_begin paired to "blockEnd".
 
-        neededSpareInputs
-        The needed spare input of the node.
-        This argument may be deleted in future updates.
+        blockEnd
+        Must be from type name block_end.
         """
 
-        keyframes: list[hou.BaseKeyframe] = parm.keyframes()[:]
+        if blockEnd.type().name() == "block_end":
 
-        if len(keyframes) > 0:
+            blockBeginNodes = self.graph(blockEnd.parent()).pairedBlockBegins(blockEnd)
 
-            for key in keyframes:
-                rawValue: str = key.expression()
-                newRawValue: str = self.makeExprCompilable(parm, rawValue, neededSpareInputs)
-                key.setExpression(newRawValue)
-                parm.setKeyframe(key)
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(f"{blockEnd.name()} -> {len(blockBeginNodes)} paired block_begin nodes :")
+                for node in blockBeginNodes:
+                    logger.debug(node)
+            return tuple(blockBeginNodes)
 
-                # Debug output
-                if debug == True and newRawValue != rawValue:
-                    if key == keyframes[0]:
-                        print(f"{parm} -> Converting parm expressions :")
-                    print(f"At frame : {key.frame()}")
-                    print(f"from : {rawValue}")
-                    print(f"to :   {newRawValue}")
-                    if key == keyframes[-1]:
-                        print("")
         else:
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(f"Error: {blockEnd.name()} is not an instance from SOP block_end type.")
+            return None
 
-            if parm.parmTemplate().type() == hou.parmTemplateType.String:
-                rawValue: str = parm.rawValue()
-                newRawValue: str = rawValue
-
-                indexMap = None
-                exprs = self.matchHscript(rawValue)
-                for expr in exprs:
-                    newExpr = "`" + self.makeExprCompilable(parm, expr.group().strip("`"), neededSpareInputs) + "`"
-                    subMatchResult = self.reg.subMatch(expr, newExpr, newRawValue, index=indexMap)
-                    newRawValue = subMatchResult[0]
-                    indexMap = subMatchResult[1]
-                
-                parm.set(newRawValue)
-                
-                # Debug output
-                if debug == True and newRawValue != rawValue:
-                    print(f"{parm} -> Converting parm expressions :")
-                    print(f"from : {rawValue}")
-                    print(f"to :   {newRawValue}")
-                    print("")
+    def allAncestors(self, node: hou.SopNode, stop: list[hou.SopNode] = None, debug = False) -> tuple[hou.SopNode]:
+        """
+        return the list of hou.SopNode objects from which "node" depends on. It includes node inputs and all references from self.referencedNodes().
 
-    def makeNodeCompilable(self, node: hou.SopNode, debug=False):
+        stop
+        These nodes and their ancestors are not returned.
+        Note that if ancestors of a node that is in "stop" are ancestors of an ancestor of "node" that is not in stop, then they are included.
         """
-        Convert parm Hscript expressions with spare inputs references instead of node paths and inputs references. (see self.makeParmCompilable())
-        Creates needed spare inputs. (see self.createNeededSpareInputs())
+
+        ancestors = self.graph(node.parent()).ancestors(node, stop=stop)
+
+        # Debug output
+        if debugEnabled(debug):
+            maxPrint = 50
+            logger.debug(f"{node.name()} -> {len(ancestors)} ancestors :")
+            for node in ancestors[:maxPrint]:
+                logger.debug(node)
+            if len(ancestors) > maxPrint:
+                logger.debug(f"and {len(ancestors)-maxPrint} more...")
+
+        return ancestors
+
+    def allDescendants(self, node: hou.SopNode, stop: list[hou.SopNode] = None, debug = False) -> tuple[hou.SopNode]:
+        """
+        return the list of hou.SopNode objects which depends on "node". It includes node outputs and all dependants from hou.Node.dependents() that verify "node" in self.referencedNodes(dependant).
+
+        stop
+        These nodes and their descendants are not returned.
+        Note that if descendants of a node that is in "stop" are descendants of an descendants of "node" that is not in stop, then they are included.
+        """
+
+        descendants = self.graph(node.parent()).descendants(node, stop=stop)
+
+        # Debug output
+        if debugEnabled(debug):
+            maxPrint = 50
+            logger.debug(f"{node.name()} -> {len(descendants)} descendants :")
+            for node in descendants[:maxPrint]:
+                logger.debug(node)
+            if len(descendants) > maxPrint:
+                logger.debug(f"and {len(descendants)-maxPrint} more...")
+
+        return descendants
+
+    def allNodesInBlock(self, blockNode: hou.SopNode, debug = False) -> tuple[hou.SopNode]:
         """
+        return the list of hou.SopNode objects which are in the "blockNode" corresponding block.
+        These are the nodes wired after its block_begin nodes which its block_end depends on. A node only referenced by nodes of the block, even by ch(), is not in it.
+        """
+
+        allNodes: list[hou.SopNode] = []
 
-        neededSpareInputs = self.neededSpareInputs(node, debug=False)
-        self.createNeededSpareInputs(neededSpareInputs, debug=debug)
+        # A single graph answers all the queries of the call
+        with self.analysisScope():
+            blockEnd: hou.SopNode = self.blockEndNode(blockNode)
+            blockEnd_pairedBlockBeginNodes = self.pairedBlockBeginNodes(blockEnd)[:]
+            blockEnd_ancestors = self.allAncestors(blockEnd, stop=blockEnd_pairedBlockBeginNodes)[:]
+
+            blocksBeginDescendant: set[hou.SopNode] = set()
+            for blockBegin in blockEnd_pairedBlockBeginNodes:
+                blocksBeginDescendant.update(self.graph(blockBegin.parent()).wiredDescendants(blockBegin, stop=[blockEnd,]))
+
+        allNodes.append(blockEnd)
+        for ancestor in  blockEnd_ancestors:
+            if ancestor in blocksBeginDescendant:
+                allNodes.append(ancestor)
+        allNodes.extend(blockEnd_pairedBlockBeginNodes)
         
-        referencedNodes = self.referencedNodes(node, debug=False)
-        parms: list[hou.Parm] = []
-        for referencedNode in referencedNodes:
-            for parm in referencedNode[1]:
-                if parm not in parms:
-                    parms.append(parm)
+        # Debug output
+        if debugEnabled(debug):
+            maxPrint = 50
+            logger.debug(f"{blockEnd.name()} -> {len(allNodes)} nodes in block :")
+            for node in allNodes[:maxPrint]:
+                logger.debug(node)
+            if len(allNodes) > maxPrint:
+                logger.debug(f"and {len(allNodes)-maxPrint} more...")
 
-        for parm in parms:
-            self.makeParmCompilable(parm, neededSpareInputs, debug=debug)
-    
-    def compileBlock(self, blockNode: hou.SopNode, debug=False):
+        return tuple(allNodes)
+
+    def entryPoints(self, blockNode: hou.SopNode, debug = False) -> tuple[hou.NodeConnection]:
         """
-        Compile the "blockNode" corresponding block.
+        return the list of hou.NodeConnection objects which are entries of the "blockNode" corresponding block. The output of each connection is in block and the input is outside the block.
+        Note that is does not include the connections before the block_begin nodes of the corresponding block.
+        """
+
+        entryPointsConnections: list[hou.NodeConnection] = []
+
+        with self.analysisScope():
+            blockEnd = self.blockEndNode(blockNode, debug=debug)
+            blockBegins = self.pairedBlockBeginNodes(blockEnd, debug=debug)[:]
+            blockNodes = self.allNodesInBlock(blockNode, debug=debug)
+        allNodes = set(blockNodes)
+
+        for node in blockNodes:
+            if node not in blockBegins:
+                for input in node.inputConnectors():
+                    for connection in input:
+                        if connection.inputNode() not in allNodes:
+                            entryPointsConnections.append(connection)
+
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{blockEnd.name()} -> {len(entryPointsConnections)} entry points :")
+            for connection in entryPointsConnections:
+                logger.debug(connection)
+        
+        return tuple(entryPointsConnections)
+    
+    def createBlockBeginNodes(self, blockNode: hou.SopNode, debug=False) -> tuple[hou.SopNode]:
         """
+        return the list of hou.SopNode objects which are created by this method.
 
-        allBlockEnd: list[hou.SopNode] = []
-        for node in self.allNodesInBlock(blockNode):
-            if node.type().name() == "block_end":
-                allBlockEnd.append(node)
+        Creates block_begin nodes on each connection in self.entryPoints(blockNode). The nodes are paired to there corresponding block_end node.
+        """
 
-        for blockEnd in allBlockEnd:
-            self.createBlockBeginNodes(blockEnd, debug=debug)
+        blockEnd: hou.SopNode = self.blockEndNode(blockNode)
+        with self.sceneEdit(f"Create block_begin nodes for {blockEnd.path()}"):
+            createdNodes = self.applyInsertions(self._planBlockBegins(blockEnd, {}))
+        
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{blockEnd} -> {len(createdNodes)} block_begin nodes created :")
+            for node in createdNodes:
+                logger.debug(node)
         
-        self.createCompileBlockNodes(blockNode, debug=debug)
+        return createdNodes
+    
+    def createCompileBlockNodes(self, blockNode: hou.SopNode, debug=False) -> tuple[hou.SopNode]:
+        """
+        return the list of hou.SopNode objects which are created by this method.
+
+        Creates compile_begin nodes on each input and output connection that are at the inputs and output of "blockNode" corresponding block.
+        """
+
+        blockEnd: hou.SopNode = self.blockEndNode(blockNode)
+        with self.sceneEdit(f"Create compile nodes for {blockEnd.path()}"):
+            createdNodes = self.applyInsertions(self._planCompileNodes(blockEnd, (), {}))
+
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{blockEnd} -> {len(createdNodes)} compile nodes created :")
+            for node in createdNodes:
+                logger.debug(node)
+
+        return createdNodes
+
+    def _plannedRef(self, node: typing.Union[hou.SopNode, AD_plannedNode, None]) -> typing.Union[AD_planRef, None]:
+        if node == None or isinstance(node, AD_plannedNode):
+            return node
+        return node.path()
+
+    def _planBlockBegins(self, blockEnd: hou.SopNode, plannedInputs: dict, start: int = 0) -> tuple[AD_plannedInsertion]:
+        """
+        return the block_begin insertions needed on the entry points of "blockEnd" corresponding block. (see self.entryPoints())
+        Connections already planned in "plannedInputs" are taken into account, and the planned ones are added to it.
+
+        start
+        Number of the first planned node.
+        """
+
+        insertions: list[AD_plannedInsertion] = []
+
+        blockBegins: set[hou.SopNode] = set(self.pairedBlockBeginNodes(blockEnd))
+        blockNodes = self.allNodesInBlock(blockEnd)
+        allNodes: set[hou.SopNode] = set(blockNodes)
+        network = blockEnd.parent().path()
+
+        for node in blockNodes:
+            if node not in blockBegins:
+                for index, inputNode, outputIndex in self._inputConnections(node):
+                    if inputNode not in allNodes:
+                        newBlockBegin = AD_plannedNode(f"block_begin{start + len(insertions)}", "block_begin", network)
+                        insertions.append(AD_plannedInsertion(newBlockBegin, self._plannedRef(inputNode), outputIndex, ((node.path(), index),), blockEnd.path()))
+                        plannedInputs[(node, index)] = (newBlockBegin, 0)
+
+        return tuple(insertions)
+
+    def _planCompileNodes(self, blockEnd: hou.SopNode, plannedInsertions: typing.Iterable[AD_plannedInsertion], plannedInputs: dict, start: int = 0) -> tuple[AD_plannedInsertion]:
+        """
+        return the compile_begin and compile_end insertions needed around "blockEnd" corresponding block.
+        Connections already going through compile nodes are kept, so a compiled block can be compiled again.
+
+        plannedInsertions
+        Planned insertions of block_begin nodes, which are paired to "blockEnd" once applied.
+        """
+
+        insertions: list[AD_plannedInsertion] = []
+        network = blockEnd.parent().path()
+
+        # tuple[ inputNode, outputIndex, blockBegin, inputIndex ]
+        inputConnections: list[tuple[typing.Union[hou.SopNode, AD_plannedNode, None], int, typing.Union[hou.SopNode, AD_plannedNode], int]] = []
+        for blockBegin in self.pairedBlockBeginNodes(blockEnd):
+            for index, inputNode, outputIndex in self._inputConnections(blockBegin):
+                if isinstance(inputNode, AD_plannedNode) or inputNode == None or inputNode.type().name() != "compile_begin":
+                    inputConnections.append((inputNode, outputIndex, blockBegin, index))
+        for insertion in plannedInsertions:
+            if insertion.node.kind == "block_begin" and insertion.blockpath == blockEnd.path():
+                inputNode = insertion.source if isinstance(insertion.source, AD_plannedNode) or insertion.source == None else hou.node(insertion.source)
+                inputConnections.append((inputNode, insertion.sourceOutput, insertion.node, 0))
+
+        compileEnd: typing.Union[AD_planRef, None] = None
+        outputConnections: list[tuple[AD_planRef, int]] = []
+        for connection in blockEnd.outputConnections():
+            if connection.outputNode().type().name() == "compile_end" and connection.inputIndex() == 0:
+                compileEnd = connection.outputNode().path()
+            else:
+                outputConnections.append((connection.outputNode().path(), connection.inputIndex()))
+
+        if compileEnd == None:
+            compileEnd = AD_plannedNode(f"compile_end{start}", "compile_end", network)
+            insertions.append(AD_plannedInsertion(compileEnd, blockEnd.path(), 0, tuple(outputConnections), None))
+
+        for inputNode, outputIndex, blockBegin, index in inputConnections:
+            newCompileBegin = AD_plannedNode(f"compile_begin{start + len(insertions)}", "compile_begin", network)
+            insertions.append(AD_plannedInsertion(newCompileBegin, self._plannedRef(inputNode), outputIndex, ((self._plannedRef(blockBegin), index),), compileEnd))
+            plannedInputs[(blockBegin, index)] = (newCompileBegin, 0)
+
+        return tuple(insertions)
+
+    def _resolve(self, ref: typing.Union[AD_planRef, None], createdNodes: dict[AD_plannedNode, hou.SopNode]) -> typing.Union[hou.SopNode, None]:
+        """
+        return the node of "ref", "createdNodes" maps the planned nodes to the created ones.
+        """
+
+        if ref == None:
+            return None
+        if isinstance(ref, AD_plannedNode):
+            return createdNodes[ref]
+        return hou.node(ref)
+
+    def applyInsertions(self, insertions: typing.Iterable[AD_plannedInsertion], createdNodes: typing.Union[dict[AD_plannedNode, hou.SopNode], None] = None) -> tuple[hou.SopNode]:
+        """
+        Creates the nodes of "insertions", in order. (see AD_plannedInsertion)
+        The created nodes are laid out at the end of the current self.sceneEdit(), or at the end of this method outside of it.
+        return the created nodes.
+
+        createdNodes
+        Planned nodes already created, the nodes created by this method are added to it.
+        """
+
+        if createdNodes == None:
+            createdNodes = {}
+        newNodes: list[hou.SopNode] = []
+        rewiredNodes: list[hou.SopNode] = []
+
+        for insertion in insertions:
+            parent: hou.Node = insertion.node.parent()
+            newNode: hou.SopNode = parent.createNode(insertion.node.kind)
+            createdNodes[insertion.node] = newNode
+            newNodes.append(newNode)
+
+            newNode.setInput(0, self._resolve(insertion.source, createdNodes), insertion.sourceOutput)
+            for target, index in insertion.targets:
+                targetNode = self._resolve(target, createdNodes)
+                targetNode.setInput(index, newNode, 0)
+                rewiredNodes.append(targetNode)
+
+            if insertion.node.kind == "block_begin":
+                newNode.parm("./method").set("input")
+            if insertion.blockpath != None:
+                newNode.parm("./blockpath").set(newNode.relativePathTo(self._resolve(insertion.blockpath, createdNodes)))
+
+        if self._layoutNodes != None:
+            self._layoutNodes.extend(newNodes)
+        else:
+            self.layoutNodes(newNodes)
+
+        if len(newNodes) > 0:
+            self.clearPaths()
+            self.updateGraphs(newNodes + rewiredNodes)
+
+        return tuple(newNodes)
+
+    def existingSpareInputs(self, node: hou.SopNode, debug=False) -> tuple[hou.Parm]:
+        """
+        return the list of hou.Parm objects which are spare inputs in "node".
+        """
+
+        spareInputs: list[hou.Parm] = []
+        spareParms: list[hou.Parm] = node.spareParms()
+
+        for parm in spareParms:
+            if re.search(r"/spare_input\d+$", parm.path()) != None:
+                spareInputs.append(parm)
+
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{node} -> {len(spareInputs)} existing spare inputs :")
+            for spareInput in spareInputs:
+                node = spareInput.node().node(spareInput.rawValue())
+                if node != None:
+                    logger.debug(f"{spareInput} referencing {node}")
+                else:
+                    logger.debug(f"{spareInput} referencing unknown node at {spareInput.rawValue()}")
+        
+        return tuple(spareInputs)
+    
+    def referencedNodes(self, target: typing.Union[hou.Parm, hou.SopNode], debug=False) -> tuple[AD_nodeReference]:
+        """
+        return the list of hou.SopNode objects which are referenced in "target" which is either a hou.Parm object or a hou.SopNode object.
+        The returned tuple is tuple[ AD_nodeReference( referencedNode, tuple[ parmsWhichReferenceIt, ] ) ]
+        References are from self.referencedNodesInParm() and self.referencedInputsInParm(), only the parms of self.expressionParms() of a node are analysed.
+        """
+
+        # referenced node -> parms referencing it
+        references: dict[hou.SopNode, list[hou.Parm]] = {}
+
+        if target.__class__ == hou.Parm:
+            parms: tuple[hou.Parm] = (target,)
+        else:
+            parms: tuple[hou.Parm] = self.expressionParms(target)
+
+        for parm in parms:
+            # Find refs from path
+            parmRefs: list[hou.SopNode] = list(self.referencedNodesInParm(parm))
+            # Find refs from input
+            for index in self.referencedInputsInParm(parm):
+                inputNode = self._inputOf(parm.node(), index)
+                if inputNode != None and inputNode not in parmRefs:
+                    parmRefs.append(inputNode)
+
+            for ref in parmRefs:
+                references.setdefault(ref, []).append(parm)
+
+        referencedNodes = tuple(AD_nodeReference(node, tuple(refParms)) for node, refParms in references.items())
+                    
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{target} -> {len(referencedNodes)} existing references in embedded Hscript :")
+            for ref in referencedNodes:
+                logger.debug(f"{ref.node} in :")
+                for parm in ref.parms:
+                    logger.debug(parm)
+
+        return referencedNodes
+
+    def referencedNodesInParm(self, parm: hou.Parm) -> tuple[hou.SopNode]:
+        """
+        return the list of hou.SopNode objects which are referenced in "parm".
+        This takes into account keyframes.
+
+        References are either string node paths, input references or op: paths of VEX snippets.
+        e.g. : detail(0, 'attrName', 2)
+                      ^
+            -> 1 input reference -> 0 -> returned value will be the hou.SopNode connected in input 0
+        e.g. : detail("../null1", 'attrName', 2)
+                      ^
+            -> 1 node reference -> "../null1" -> returned value will be the hou.SopNode self.pathToNode("../null1", parm)
+        """
+
+        return self._analyseParm(parm, "referencedNodes", self._referencedNodesInParm)
+
+    def _referencedNodesInParm(self, parm: hou.Parm, fingerprint: tuple[str, tuple[str], tuple[str]]) -> tuple[hou.SopNode]:
+
+        refs: list[hou.SopNode] = []
+
+        # Finds out explicitly referenced nodes
+        for path in self._analyseParm(parm, "text", self._parmTextAnalysis, fingerprint).paths:
+            node = self.pathToNode(path, parm)
+            if node != None and node not in refs:
+                refs.append(node)
+        
+        if self.isVexSnippetParm(parm):
+            for path in self._analyseParm(parm, "vex", self._vexSnippetAnalysis, fingerprint).paths:
+                node = self.pathToNode(path, parm)
+                if node != None and node not in refs:
+                    refs.append(node)
+
+        if self.isNodeReferenceParm(parm):
+            rawValue: str = fingerprint[0]
+            splittedRawValue = rawValue.split(" ")
+            for path in splittedRawValue:
+                node = self.pathToNode(path, parm)
+                if node != None and node not in refs:
+                    refs.append(node)
+
+        return tuple(refs)
+    
+    def exprsInParm(self, parm: hou.Parm) -> tuple[str]:
+        """
+        return the list of strings that are Hscript expressions in "parm".
+        This takes into account keyframes.
+
+        If an expression is in `, the expression will be returned without it.
+        """
+
+        return self.parmTextAnalysis(parm).exprs
+
+    def channelReferencesInParm(self, parm: hou.Parm) -> tuple[tuple[str, hou.Node]]:
+        """
+        return tuple[ tuple[ channelPath, node ] ] for each channel of another node referenced in "parm" expressions or VEX snippet, like ch("../xform1/tx").
+        This takes into account keyframes. Channels of the node of "parm" and of nodes which do not exist are not returned.
+        """
+
+        return self._analyseParm(parm, "channels", self._channelReferencesInParm)
+
+    def _channelReferencesInParm(self, parm: hou.Parm, fingerprint: tuple[str, tuple[str], tuple[str]]) -> tuple[tuple[str, hou.Node]]:
+
+        refs: list[tuple[str, hou.Node]] = []
+
+        channels = self._analyseParm(parm, "text", self._parmTextAnalysis, fingerprint).channels
+        if self.isVexSnippetParm(parm):
+            channels = channels + self._analyseParm(parm, "vex", self._vexSnippetAnalysis, fingerprint).channels
+
+        for channel in channels:
+            if "/" not in channel:
+                continue
+            node = self.pathToNode(channel.rsplit("/", 1)[0] or "/", parm)
+            if node != None and node != parm.node():
+                refs.append((channel, node))
+
+        return tuple(refs)
+
+    def channelReferencedNodes(self, node: hou.SopNode) -> tuple[hou.Node]:
+        """
+        return the nodes owning the channels referenced by the parms of "node". (see self.channelReferencesInParm())
+        """
+
+        return tuple(dict.fromkeys(referencedNode for parm in self.expressionParms(node) for channel, referencedNode in self.channelReferencesInParm(parm)))
+
+    def channelReferences(self, node: hou.SopNode) -> tuple[AD_channelReference]:
+        """
+        return an AD_channelReference for each channel of another node referenced by the parms of "node". (see self.channelReferencesInParm())
+        The referenced nodes are dependencies of "node" in the dependency graph, but they do not get spare inputs.
+        """
+
+        return tuple(AD_channelReference(parm.path(), channel, referencedNode.path()) for parm in self.expressionParms(node) for channel, referencedNode in self.channelReferencesInParm(parm))
+
+    def pathToNode(self, path: str, parent: typing.Union[hou.Parm, hou.SopNode], debug=False):
+        """
+        return the hou.SopNode object corresponding to "path". "parent" helps to deal with relative paths.
+        return None if "path" is not the path of a node.
+
+        Inside self.analysisScope(), results are cached, misses included. Absolute paths and paths starting with ../ are cached per network, other relative paths per node.
+        """
+
+        node: hou.Node = parent.node() if parent.__class__ == hou.Parm else parent
+
+        if path.startswith("/"):
+            key = (None, path)
+        elif path.startswith("../") and self._networks != None:
+            network = self._networks.get(node)
+            if network == None:
+                network = node.parent()
+                self._networks[node] = network
+            key = (network, path)
+        else:
+            key = (node, path)
+
+        if self._paths != None and key in self._paths:
+            return self._paths[key]
+
+        try:
+            referencedNode = node.node(path)
+        except hou.Error:
+            referencedNode = None
+
+        if self._paths != None:
+            self._paths[key] = referencedNode
+
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{path} from {node} -> {referencedNode}")
+
+        return referencedNode
+
+    def clearPaths(self):
+        """
+        Drops the paths cached by self.pathToNode(). Needed when nodes are created, renamed or deleted inside self.analysisScope().
+        """
+
+        if self._paths != None:
+            self._paths.clear()
+
+    def referencedInputsInParm(self, parm: hou.Parm) -> tuple[int]:
+        """
+        return the list of referenced inputs in "parm".
+        e.g. : detail(0, 'attrName', 2)
+                      ^
+            -> 1 input reference -> returned value will be 0
+        """
+
+        return self.parmTextAnalysis(parm).inputs
+
+    def neededSpareInputs(self, node: hou.SopNode, debug=False) -> AD_spareInputs:
+        """
+        return the list of needed spare inputs in "node".
+        Returned AD_spareInputs : tuple[ AD_spareInput( spareInputPath, nodeReferencedBySpareInput, isTheSpareInputExisting, spareInputNumber ) ]
+        (if isTheSpareInputExisting == False the it needs to be created)
+        
+        A spare input is needed in a node referencing another node. References from self.referencedNodes().
+        No spare input is needed for a node reference parm holding a plain path, without Hscript or Python expression.
+        """
+
+        referencedNodes = self.referencedNodes(node, debug=debug)
+        existingSpareInputs = self.existingSpareInputs(node, debug=debug)
+
+        # referenced node -> existing spare inputs referencing it
+        existingTargets: dict[hou.SopNode, list[hou.Parm]] = {}
+        for existingSpareInput in existingSpareInputs:
+            target = self.pathToNode(existingSpareInput.rawValue(), existingSpareInput)
+            if target != None:
+                existingTargets.setdefault(target, []).append(existingSpareInput)
+
+        if len(existingSpareInputs) > 0:
+            spareInputStart = max(self.reg.pathEndDigits(spare.path()) for spare in existingSpareInputs) + 1
+        else:
+            spareInputStart = 0
+        spareInputIndex = spareInputStart
+        newSpareDefaultPath = node.path() + "/spare_input"
+
+        neededSpareInputs: list[AD_spareInput] = []
+        for ref in referencedNodes:
+            found = 0
+            for parm in ref.parms:
+                if parm.node() == node:
+                    if parm.parmTemplate().type() == hou.parmTemplateType.String:
+                        if parm.parmTemplate().stringType() == hou.stringParmType.NodeReference or parm.parmTemplate().stringType() == hou.stringParmType.NodeReferenceList:
+                            # A plain path is a dependency already, Hscript and Python expressions are not
+                            analysis = self.parmTextAnalysis(parm)
+                            if len(analysis.exprs) == 0 and len(analysis.pythonExprs) == 0:
+                                found = 1
+            for existingSpareInput in existingTargets.get(ref.node, ()):
+                neededSpareInputs.append(AD_spareInput(existingSpareInput.path(), ref.node, True, self.reg.pathEndDigits(existingSpareInput.path())))
+                found = 1
+            if found == 0 and ref.node.parent() == node.parent():
+                neededSpareInputs.append(AD_spareInput(newSpareDefaultPath + str(spareInputIndex), ref.node, False, spareInputIndex))
+                spareInputIndex = spareInputIndex + 1
+
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{node} -> Starting spare input creation at {spareInputStart}")
+            logger.debug(f"{node} -> {len([spare for spare in neededSpareInputs if spare.exists == False])} new spare input needed :")
+            for spare in neededSpareInputs:
+                if spare.exists == False:
+                    logger.debug(f"{spare.path} referencing {spare.node}")
+
+        return AD_spareInputs(neededSpareInputs)
+    
+    def _spareInputs(self, neededSpareInputs: typing.Iterable[tuple]) -> AD_spareInputs:
+        """
+        return "neededSpareInputs" as AD_spareInputs. Also accepts tuple[ spareInputPath, referencedNode, existing ] items.
+        """
+
+        if isinstance(neededSpareInputs, AD_spareInputs):
+            return neededSpareInputs
+
+        return AD_spareInputs(spare if isinstance(spare, AD_spareInput) else AD_spareInput(spare[0], spare[1], spare[2], self.reg.pathEndDigits(spare[0])) for spare in neededSpareInputs)
+
+    def createNeededSpareInputs(self, neededSpareInputs: AD_spareInputs, debug=False):
+        """
+        Creates the needed spare inputs, grouped by node. (see self.createSpareInputs())
+        """
+
+        # node path -> [ ( spareInputNumber, referencedNode ) ]
+        nodesSpareInputs: dict[str, list[tuple[int, hou.SopNode]]] = {}
+        for spare in self._spareInputs(neededSpareInputs):
+            if spare.exists == False:
+                nodesSpareInputs.setdefault(os.path.dirname(spare.path), []).append((spare.number, spare.node))
+
+        with self.sceneEdit("Create spare inputs"):
+            for nodePath, spareInputs in nodesSpareInputs.items():
+                self.createSpareInputs(hou.node(nodePath), spareInputs, debug=debug)
+    
+    def createSpareInput(self, node: hou.SopNode, spareInputNumber: int = 0, referencedNode: hou.SopNode = None, debug=False):
+        """
+        Creates a spare input on "node" refererencing "referencedNode". (see self.createSpareInputs())
+
+        spareInputNumber
+        The number at the end of the path of the created spare input.
+        """
+
+        self.createSpareInputs(node, ((spareInputNumber, referencedNode),), debug=debug)
+
+    def createSpareInputs(self, node: hou.SopNode, spareInputs: typing.Iterable[tuple[int, hou.SopNode]], debug=False):
+        """
+        Creates a spare input on "node" for each tuple[ spareInputNumber, referencedNode ] of "spareInputs".
+        All the spare inputs are added to the parm template group of "node" at once, so its parm interface is rebuilt a single time.
+        """
+
+        spareInputs = tuple(spareInputs)
+        if len(spareInputs) == 0:
+            return
+
+        parmTemplateGroup: hou.ParmTemplateGroup = node.parmTemplateGroup()
+        for spareInputNumber, referencedNode in spareInputs:
+            newSpareInputTemplate = self.spareInputTemplate.clone()
+            newSpareInputTemplate.setName(newSpareInputTemplate.name()+str(spareInputNumber))
+            newSpareInputTemplate.setLabel(newSpareInputTemplate.label()+str(spareInputNumber))
+            parmTemplateGroup.append(newSpareInputTemplate)
+        node.setParmTemplateGroup(parmTemplateGroup)
+
+        for spareInputNumber, referencedNode in spareInputs:
+            spare = node.parm(f"./spare_input{spareInputNumber}")
+            spare.set(node.relativePathTo(referencedNode))
+
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(f"{node} -> New spare input created:\n{spare} referencing {referencedNode}")
+
+        if self._expressionParms != None:
+            self._expressionParms.pop(node, None)
+
+
+    def matchHscript(self, string: str) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to Hscript expressions in "string". ` are included.
+        """
+        
+        return self.lexer.backticks(string)
+
+    def matchStrings(self, expr: str) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to strings in "string". " and ' are included.
+        """
+
+        if self._exprMatches != None and expr in self._exprMatches:
+            return self._exprMatches[expr][0]
+
+        return self.lexer.strings(expr)
+    
+    def matchHscriptInputReferences(self, expr: str, debug=False) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to input references in "string". Strings literals are skipped.
+        Note that there are subgroups : $1 returns the expression function
+                                        $2 returns the int number referencing the input
+        """
+
+        if self._exprMatches != None and expr in self._exprMatches:
+            allInputRefs = self._exprMatches[expr][1]
+        else:
+            allInputRefs = self.lexer.inputReferences(expr, self.signatures)
+
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{expr} -> {len(allInputRefs)} input references found :")
+            for match in allInputRefs:
+                logger.debug(f"{match} at index {match.start(2)}: {match.group(2)}")
+
+        return allInputRefs
+
+    def matchHscriptVariables(self, expr: str) -> tuple[AD_exprMatch]:
+        """
+        return the list of AD_exprMatch objects that correspond to the local variables of self.variables in "expr". Strings literals are skipped.
+        Note that there is a subgroup : $1 returns the variable name
+        """
+
+        if self._exprMatches != None and expr in self._exprMatches:
+            return self._exprMatches[expr][2]
+
+        return self.lexer.variables(expr, self.variables)
+
+    def makeExprCompilable(self, parent: typing.Union[hou.Parm, hou.SopNode], expr: str, neededSpareInputs: AD_spareInputs, debug=False) -> str:
+        """
+        return the converted "expr" with spare inputs references instead of node paths and inputs references.
+        Local variables like $CEX are replaced by the equivalent function call on a spare input reference, e.g. centroid(-1, D_X). (see ad_exprtools.AD_hscriptVariables)
+
+        parent
+        The "parent" of the expression. The parm caontaining the expression or the node containing this parm.
+
+        neededSpareInputs
+        The needed spare input of the node.
+        This argument may be deleted in future updates.
+        """
+
+        edits: list[tuple[int, int, str]] = []
+        spareInputs = self._spareInputs(neededSpareInputs)
+
+        # Replacing node path references
+        stringsMatches = self.matchStrings(expr)
+        for stringMatch in stringsMatches:
+            node = self.pathToNode(stringMatch.group().strip("\"'"), parent)
+            if node != None:
+                spareRefNum = spareInputs.reference(node)
+                if spareRefNum != None:
+                    edits.append((stringMatch.start(), stringMatch.end(), str(spareRefNum)))
+        
+        # Replacing inputs references
+        inputRefMatches = self.matchHscriptInputReferences(expr, debug=debug)
+        for inputRefMatch in inputRefMatches:
+            inputIndex = int(inputRefMatch.group(2))
+            if parent.__class__ == hou.SopNode:
+                inputNode = self._inputOf(parent, inputIndex)
+            else:
+                inputNode = self._inputOf(parent.node(), inputIndex)
+            if inputNode != None:
+                spareRefNum = spareInputs.reference(inputNode)
+                if spareRefNum != None:
+                    edits.append((inputRefMatch.start(2), inputRefMatch.end(2), str(spareRefNum)))
+
+        # Replacing local variables
+        for variableMatch in self.matchHscriptVariables(expr):
+            inputIndex, replacement = self.variables.get(variableMatch.group(1))
+            inputNode = self._inputOf(parent if parent.__class__ == hou.SopNode else parent.node(), inputIndex)
+            if inputNode != None:
+                spareRefNum = spareInputs.reference(inputNode)
+                if spareRefNum != None:
+                    edits.append((variableMatch.start(), variableMatch.end(), replacement.format(input=spareRefNum)))
+
+        newExpr = self.reg.applyEdits(expr, edits)
+        
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{expr} -> {len(stringsMatches)} strings found in expression :")
+            for string in stringsMatches:
+                logger.debug(string.group())
+        
+        return newExpr
+
+    def makePythonExprCompilable(self, parent: typing.Union[hou.Parm, hou.SopNode], expr: str, neededSpareInputs: AD_spareInputs) -> str:
+        """
+        return the converted Python "expr" with spare inputs instead of node paths and inputs references. (see ad_exprtools.AD_pythonExprParser)
+        e.g. : hou.node("../box1").geometry() and hou.pwd().inputs()[0].geometry()
+            -> hou.pwd().parm("spare_input0").evalAsNode().geometry() if spare_input0 references box1 and input 0
+        """
+
+        edits: list[tuple[int, int, str]] = []
+        spareInputs = self._spareInputs(neededSpareInputs)
+        node: hou.SopNode = parent if parent.__class__ == hou.SopNode else parent.node()
+        analysis: AD_pythonExprAnalysis = analysePythonExpr(expr)
+
+        # Replacing node path references
+        for pathMatch in analysis.pathMatches:
+            refNode = self.pathToNode(ast.literal_eval(pathMatch.group(1)), parent)
+            if refNode != None:
+                spareNum = spareInputs.number(refNode)
+                if spareNum != None:
+                    edits.append((pathMatch.start(), pathMatch.end(), f'hou.pwd().parm("spare_input{spareNum}").evalAsNode()'))
+
+        # Replacing inputs references
+        for inputMatch in analysis.inputMatches:
+            inputNode = self._inputOf(node, ast.literal_eval(inputMatch.group(1)))
+            if inputNode != None:
+                spareNum = spareInputs.number(inputNode)
+                if spareNum != None:
+                    edits.append((inputMatch.start(), inputMatch.end(), f'hou.pwd().parm("spare_input{spareNum}").evalAsNode()'))
+
+        return self.reg.applyEdits(expr, edits)
+
+    def parmEdits(self, parm: hou.Parm, neededSpareInputs: AD_spareInputs) -> tuple[AD_plannedParmEdit]:
+        """
+        return the edits converting "parm" Hscript expressions with spare inputs references instead of node paths and inputs references. (see self.makeExprCompilable())
+        Keyframes are edited one by one, string parms as a whole. Unchanged values are not returned.
+        Python keyframes are converted with self.makePythonExprCompilable().
+        In VEX snippets, op: geometry paths are replaced by spare inputs references, e.g. point("op:../box1", "P", 0) becomes point(-1, "P", 0).
+        An op: path which is not the geometry argument of a call stays a string, e.g. string g = "op:../box1" becomes string g = "opinput:-1".
+        """
+
+        edits: list[AD_plannedParmEdit] = []
+        neededSpareInputs = self._spareInputs(neededSpareInputs)
+        keyframes: list[hou.BaseKeyframe] = parm.keyframes()[:]
+
+        if len(keyframes) > 0:
+
+            for i, key in enumerate(keyframes):
+                rawValue: str = key.expression()
+                if key.expressionLanguage() == hou.exprLanguage.Python:
+                    newRawValue: str = self.makePythonExprCompilable(parm, rawValue, neededSpareInputs)
+                else:
+                    newRawValue: str = self.makeExprCompilable(parm, rawValue, neededSpareInputs)
+                if newRawValue != rawValue:
+                    edits.append(AD_plannedParmEdit(parm.path(), i, rawValue, newRawValue))
+
+        elif self.isVexSnippetParm(parm):
+            rawValue: str = parm.rawValue()
+
+            vexAnalysis = self.vexSnippetAnalysis(parm)
+            argumentStarts = set(match.start() for match in vexAnalysis.argumentMatches)
+            pathEdits: list[tuple[int, int, str]] = []
+            for pathMatch in vexAnalysis.pathMatches:
+                node = self.pathToNode(pathMatch.group(1), parm)
+                if node != None:
+                    spareRefNum = neededSpareInputs.reference(node)
+                    if spareRefNum != None:
+                        if pathMatch.start() in argumentStarts:
+                            pathEdits.append((pathMatch.start(), pathMatch.end(), str(spareRefNum)))
+                        else:
+                            # Other op: paths are string values, they stay strings
+                            quote = pathMatch.group()[0]
+                            pathEdits.append((pathMatch.start(), pathMatch.end(), f"{quote}opinput:{spareRefNum}{quote}"))
+            newRawValue: str = self.reg.applyEdits(rawValue, pathEdits)
+
+            if newRawValue != rawValue:
+                edits.append(AD_plannedParmEdit(parm.path(), None, rawValue, newRawValue))
+
+        elif parm.parmTemplate().type() == hou.parmTemplateType.String:
+            rawValue: str = parm.rawValue()
+
+            exprEdits: list[tuple[int, int, str]] = []
+            exprs = self.matchHscript(rawValue)
+            for expr in exprs:
+                newExpr = "`" + self.makeExprCompilable(parm, expr.group().strip("`"), neededSpareInputs) + "`"
+                if newExpr != expr.group():
+                    exprEdits.append((expr.start(), expr.end(), newExpr))
+            newRawValue: str = self.reg.applyEdits(rawValue, exprEdits)
+
+            if newRawValue != rawValue:
+                edits.append(AD_plannedParmEdit(parm.path(), None, rawValue, newRawValue))
+
+        return tuple(edits)
+
+    def applyParmEdits(self, edits: typing.Iterable[AD_plannedParmEdit], debug=False):
+        """
+        Applies "edits". (see self.parmEdits())
+        Raises ValueError if a value is not the one the edit was planned from.
+        """
+
+        for edit in edits:
+            parm: hou.Parm = hou.parm(edit.parm)
+
+            if edit.keyframe != None:
+                key: hou.BaseKeyframe = parm.keyframes()[edit.keyframe]
+                if key.expression() != edit.old:
+                    raise ValueError(f"{edit.parm} keyframe {edit.keyframe} changed since it was planned : {key.expression()}")
+                key.setExpression(edit.new)
+                parm.setKeyframe(key)
+            else:
+                if parm.rawValue() != edit.old:
+                    raise ValueError(f"{edit.parm} changed since it was planned : {parm.rawValue()}")
+                parm.set(edit.new)
+
+            # Debug output
+            if debugEnabled(debug):
+                at = f" at keyframe {edit.keyframe}" if edit.keyframe != None else ""
+                logger.debug(f"{parm} -> Converting parm expressions{at} :")
+                logger.debug(f"from : {edit.old}")
+                logger.debug(f"to :   {edit.new}")
+
+    def makeParmCompilable(self, parm: hou.Parm, neededSpareInputs: AD_spareInputs, debug=False):
+        """
+        Convert parm Hscript expressions with spare inputs references instead of node paths and inputs references. (see self.parmEdits())
+
+        neededSpareInputs
+        The needed spare input of the node.
+        This argument may be deleted in future updates.
+        """
+
+        self.applyParmEdits(self.parmEdits(parm, neededSpareInputs), debug=debug)
+
+    def planNode(self, node: hou.SopNode) -> tuple[tuple[AD_plannedSpareInput], tuple[AD_plannedParmEdit]]:
+        """
+        return the spare inputs to create and the parm edits converting "node". (see self.neededSpareInputs() and self.parmEdits())
+        """
+
+        with self.analysisScope():
+            with self.compilePhase("spareInputPlanning", node):
+                neededSpareInputs = self.neededSpareInputs(node, debug=False)
+                spareInputs = tuple(AD_plannedSpareInput(node.path(), spare.number, self._plannedRef(spare.node)) for spare in neededSpareInputs if spare.exists == False)
+
+            with self.compilePhase("expressionRewriting", node):
+                referencedNodes = self.referencedNodes(node, debug=False)
+                parms = dict.fromkeys(parm for referencedNode in referencedNodes for parm in referencedNode.parms)
+
+                edits: list[AD_plannedParmEdit] = []
+                for parm in parms:
+                    edits.extend(self.parmEdits(parm, neededSpareInputs))
+
+        return spareInputs, tuple(edits)
+
+    def applySpareInputs(self, spareInputs: typing.Iterable[AD_plannedSpareInput], createdNodes: typing.Union[dict[AD_plannedNode, hou.SopNode], None] = None, debug=False):
+        """
+        Creates the spare inputs of "spareInputs", grouped by node. (see self.createSpareInputs())
+
+        createdNodes
+        Maps the planned nodes referenced by spare inputs to the created ones.
+        """
+
+        # node path -> [ ( spareInputNumber, referencedNode ) ]
+        nodesSpareInputs: dict[str, list[tuple[int, hou.SopNode]]] = {}
+        for spare in spareInputs:
+            nodesSpareInputs.setdefault(spare.node, []).append((spare.number, self._resolve(spare.target, createdNodes or {})))
+
+        for nodePath, nodeSpareInputs in nodesSpareInputs.items():
+            self.createSpareInputs(hou.node(nodePath), nodeSpareInputs, debug=debug)
+
+    def makeNodeCompilable(self, node: hou.SopNode, debug=False):
+        """
+        Convert parm Hscript expressions with spare inputs references instead of node paths and inputs references. (see self.makeParmCompilable())
+        Creates needed spare inputs. (see self.createNeededSpareInputs())
+        If self.incremental is True, "node" is skipped if it did not change since it was last made compilable.
+        return False if "node" was skipped, True otherwise.
+        """
+
+        if self.incremental == True and self.isNodeUpToDate(node):
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(f"{node} -> up to date, skipped")
+            return False
+
+        spareInputs, edits = self.planNode(node)
+        with self.sceneEdit(f"Make {node.path()} compilable"):
+            with self.compilePhase("spareInputCreation", node):
+                self.applySpareInputs(spareInputs, debug=debug)
+            with self.compilePhase("expressionRewriting", node):
+                self.applyParmEdits(edits, debug=debug)
+
+            self.stampNode(node)
+
+        return True
+
+    def compileBlockers(self, blockNode: hou.SopNode, debug=False) -> tuple[AD_compileBlocker]:
+        """
+        return an AD_compileBlocker for each node of "blockNode" corresponding block whose type can not be compiled, with the reason why. (see ad_compilerules.AD_compileRules)
+        return an empty tuple if self.compileRules is None.
+        """
+
+        if self.compileRules == None:
+            return ()
+
+        with self.compilePhase("compileCheck", blockNode):
+            blockers = self.compileRules.blockers(self.allNodesInBlock(blockNode))
+
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(f"{blockNode} -> {len(blockers)} non compilable nodes :")
+            for blocker in blockers:
+                logger.debug(f"{blocker.node} ({blocker.type}) : {blocker.reason}")
+
+        return blockers
+
+    def loopSettings(self, blockEnd: hou.SopNode) -> tuple[AD_plannedLoopSetting]:
+        """
+        return the settings of "blockEnd" making its loop faster once compiled.
+        Multithreading is enabled when the iterations are independent, i.e. the gather method is Merge Each Iteration, and there is more than one iteration when it is known. (block_end "iterations" parm, with the By Count iteration method)
+        Feedback loops are left as they are. Older block_end nodes without a "multithread" parm have no settings.
+        Batching is recorded as not available : the block_end has no parm to batch pieces together, a multithreaded compiled loop already shares the pieces between its threads.
+        """
+
+        multithread: typing.Union[hou.Parm, None] = blockEnd.parm("multithread")
+        if multithread == None:
+            return ()
+
+        current = int(multithread.eval())
+        gatherMethod = blockEnd.evalParm("method") if blockEnd.parm("method") != None else None
+        iterations: typing.Union[int, None] = None
+        if blockEnd.parm("itermethod") != None and blockEnd.evalParm("itermethod") == self.ITERATE_BY_COUNT and blockEnd.parm("iterations") != None:
+            iterations = blockEnd.evalParm("iterations")
+
+        if gatherMethod == self.GATHER_FEEDBACK:
+            setting = AD_plannedLoopSetting(blockEnd.path(), "multithread", current, current, "feedback each iteration, iterations depend on each other")
+        elif iterations != None and iterations < 2:
+            setting = AD_plannedLoopSetting(blockEnd.path(), "multithread", current, current, f"{iterations} iteration")
+        else:
+            reason = "merge each iteration, iterations are independent" + (f", {iterations} iterations" if iterations != None else "")
+            setting = AD_plannedLoopSetting(blockEnd.path(), "multithread", current, 1, reason)
+        batching = AD_plannedLoopSetting(blockEnd.path(), "batching", None, None, "the block_end has no parm to batch pieces, a multithreaded compiled loop shares the pieces between its threads")
+
+        return (setting, batching)
+
+    def applyLoopSettings(self, loopSettings: typing.Iterable[AD_plannedLoopSetting], debug=False):
+        """
+        Sets the block_end parms of "loopSettings". (see self.loopSettings())
+        """
+
+        for setting in loopSettings:
+            if setting.new == setting.old:
+                continue
+            hou.node(setting.blockEnd).parm(setting.parm).set(setting.new)
+
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(f"{setting.blockEnd}/{setting.parm} -> {setting.old} to {setting.new} : {setting.reason}")
+
+    def planBlock(self, blockNode: hou.SopNode, debug=False) -> AD_compilePlan:
+        """
+        return the AD_compilePlan compiling "blockNode" corresponding block, without changing the scene. (see self.applyPlan())
+        The plan is what self.compileBlock() would do : block_begin nodes on the entry points of each block, compile nodes around the outermost block, spare inputs and expression edits.
+        If self.incremental is True, nodes which did not change since they were last compiled, and whose inputs do not change, have no edits.
+        The nodes which can not be compiled are listed in the plan blockers. (see self.compileBlockers())
+        The block_end nodes are set to multithread the compiled loop when possible. (see self.loopSettings())
+        The channel references of the nodes of the block are listed in the plan. (see self.channelReferences())
+        """
+
+        blockEnd: hou.SopNode = self.blockEndNode(blockNode)
+        network: hou.Node = blockEnd.parent()
+
+        with self.analysisScope(), self.compilePhase("planBlock", blockNode):
+            with self.compilePhase("discovery"):
+                self.graph(network)
+                blockNodes = self.allNodesInBlock(blockNode)
+                allBlockEnd: list[hou.SopNode] = [node for node in blockNodes if node.type().name() == "block_end"]
+
+            blockers = self.compileBlockers(blockNode)
+            loopSettings = tuple(setting for end in allBlockEnd for setting in self.loopSettings(end))
+            channelReferences = tuple(reference for node in blockNodes for reference in self.channelReferences(node))
+
+            plannedInputs: dict = {}
+            insertions: list[AD_plannedInsertion] = []
+            spareInputs: list[AD_plannedSpareInput] = []
+            parmEdits: list[AD_plannedParmEdit] = []
+
+            previousPlannedInputs = self._plannedInputs
+            self._plannedInputs = plannedInputs
+            try:
+                with self.compilePhase("discovery"):
+                    for end in allBlockEnd:
+                        insertions.extend(self._planBlockBegins(end, plannedInputs, start=len(insertions)))
+                    insertions.extend(self._planCompileNodes(blockEnd, insertions, plannedInputs, start=len(insertions)))
+
+                rewired: set[hou.SopNode] = set(key[0] for key in plannedInputs)
+                for node in blockNodes:
+                    if self.incremental == True and node not in rewired and self.isNodeUpToDate(node):
+                        continue
+                    nodeSpareInputs, nodeEdits = self.planNode(node)
+                    spareInputs.extend(nodeSpareInputs)
+                    parmEdits.extend(nodeEdits)
+            finally:
+                self._plannedInputs = previousPlannedInputs
+
+        nodes = [node.path() for node in blockNodes]
+        nodes.extend(insertion.node for insertion in insertions if insertion.node.kind == "block_begin")
+
+        plan = AD_compilePlan(blockEnd.path(), tuple(node.path() for node in allBlockEnd), tuple(insertions), tuple(spareInputs), tuple(parmEdits), tuple(nodes), blockers, loopSettings, channelReferences)
+
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(plan)
+
+        return plan
+
+    def applyPlan(self, plan: AD_compilePlan, debug=False, report: typing.Union["AD_compileReport", None] = None) -> "AD_compileReport":
+        """
+        Applies "plan" to the scene, and stamps the nodes of the block. (see self.planBlock() and self.stampBlock())
+        The plan must be applied to the scene it was planned from. Raises ValueError before changing anything if the scene changed since. (see self.checkPlan())
+        return "report", or a new AD_compileReport if None, with the compiled block added to it.
+        """
+
+        if report == None:
+            report = AD_compileReport()
+        startTime = time.perf_counter()
+
+        nodes = self._applyPlan(plan, debug=debug)
+        report.addBlock(hou.node(plan.blockEnd), len(nodes), time.perf_counter() - startTime)
+        report.addLoopSettings(plan.loopSettings)
+        report.addChannelReferences(plan.channelReferences)
+
+        return report
+
+    def _applyPlan(self, plan: AD_compilePlan, debug=False) -> tuple[hou.SopNode]:
+        """
+        return the nodes in the block once "plan" is applied. (see self.applyPlan())
+        """
+
+        self.checkPlan(plan)
+        createdNodes: dict[AD_plannedNode, hou.SopNode] = {}
+
+        with self.analysisScope(), self.sceneEdit(f"Compile block {plan.blockEnd}"), self.compilePhase("applyPlan", hou.node(plan.blockEnd)):
+            with self.compilePhase("blockBeginCreation"):
+                self.applyInsertions([insertion for insertion in plan.insertions if insertion.node.kind == "block_begin"], createdNodes)
+            with self.compilePhase("compileNodesCreation"):
+                self.applyInsertions([insertion for insertion in plan.insertions if insertion.node.kind != "block_begin"], createdNodes)
+            with self.compilePhase("spareInputCreation"):
+                self.applySpareInputs(plan.spareInputs, createdNodes, debug=debug)
+            with self.compilePhase("expressionRewriting"):
+                self.applyParmEdits(plan.parmEdits, debug=debug)
+            with self.compilePhase("loopConfiguration"):
+                self.applyLoopSettings(plan.loopSettings, debug=debug)
+
+            nodes = tuple(self._resolve(node, createdNodes) for node in plan.nodes)
+            for node in nodes:
+                self.stampNode(node)
+            # Nested blocks are compiled with their outer block, they share its record
+            for blockEnd in plan.blockEnds:
+                self.stampBlock(hou.node(blockEnd), nodes)
+
+        return nodes
+
+    def checkPlan(self, plan: AD_compilePlan):
+        """
+        Raises ValueError if "plan" can not be applied to the scene : the block has nodes which can not be compiled, a node it refers to does not exist, a spare input already exists or a parm value changed since it was planned.
+        """
+
+        if len(plan.blockers) > 0:
+            raise ValueError(f"{plan.blockEnd} block can not be compiled : " + ", ".join(f"{blocker.node} {blocker.reason}" for blocker in plan.blockers))
+
+        refs: list[typing.Union[AD_planRef, None]] = [plan.blockEnd]
+        refs.extend(plan.blockEnds)
+        for insertion in plan.insertions:
+            refs.append(insertion.source)
+            refs.extend(target for target, index in insertion.targets)
+        refs.extend(spare.target for spare in plan.spareInputs)
+        for ref in refs:
+            if ref != None and not isinstance(ref, AD_plannedNode) and hou.node(ref) == None:
+                raise ValueError(f"{ref} does not exist anymore")
+
+        for spare in plan.spareInputs:
+            node = hou.node(spare.node)
+            if node == None:
+                raise ValueError(f"{spare.node} does not exist anymore")
+            if node.parm(f"spare_input{spare.number}") != None:
+                raise ValueError(f"{spare.node}/spare_input{spare.number} already exists")
+
+        for edit in plan.parmEdits:
+            parm = hou.parm(edit.parm)
+            if parm == None:
+                raise ValueError(f"{edit.parm} does not exist anymore")
+            if edit.keyframe != None:
+                keyframes = parm.keyframes()
+                current = keyframes[edit.keyframe].expression() if edit.keyframe < len(keyframes) else None
+            else:
+                current = parm.rawValue()
+            if current != edit.old:
+                raise ValueError(f"{edit.parm} changed since it was planned : {current}")
+
+        for setting in plan.loopSettings:
+            if setting.old == None:
+                continue
+            parm = hou.parm(f"{setting.blockEnd}/{setting.parm}")
+            if parm == None:
+                raise ValueError(f"{setting.blockEnd}/{setting.parm} does not exist anymore")
+            if int(parm.eval()) != setting.old:
+                raise ValueError(f"{setting.blockEnd}/{setting.parm} changed since it was planned : {parm.eval()}")
+
+    def compileEndNode(self, blockNode: hou.SopNode) -> typing.Union[hou.SopNode, None]:
+        """
+        return the compile_end node wired after "blockNode" corresponding block_end node, None if the block is not compiled.
+        """
+
+        blockEnd = self.blockEndNode(blockNode)
+        if blockEnd == None:
+            return None
+
+        for output in blockEnd.outputs():
+            if output.type().name() == "compile_end":
+                return output
+
+        return None
+
+    def cookTimes(self, node: hou.SopNode, frames: typing.Iterable[float], repeat: int = 1) -> tuple[float]:
+        """
+        return the time in seconds "node" takes to cook at each frame of "frames", forcing the cook. The best time of "repeat" cooks is kept.
+        The current frame is restored afterwards.
+        """
+
+        times: list[float] = []
+        currentFrame = hou.frame()
+        try:
+            for frame in frames:
+                hou.setFrame(frame)
+                best: typing.Union[float, None] = None
+                for i in range(max(1, repeat)):
+                    startTime = time.perf_counter()
+                    node.cook(force=True)
+                    seconds = time.perf_counter() - startTime
+                    if best == None or seconds < best:
+                        best = seconds
+                times.append(best)
+        finally:
+            hou.setFrame(currentFrame)
+
+        return tuple(times)
+
+    def measureCook(self, blockNode: hou.SopNode, before: typing.Union[tuple[float], None] = None, frames: typing.Union[typing.Iterable[float], None] = None) -> "AD_cookMeasurement":
+        """
+        return the AD_cookMeasurement of "blockNode" corresponding block : its cook times before being compiled, after being compiled, and whether it cooked compiled.
+        The block output is the block_end before, the compile_end after. (see self.cookTimes())
+        The block cooked compiled if its compile_end has no errors nor warnings, and if all the nodes of the block can be compiled, i.e. have a verb. (see self.compileBlockers())
+
+        before
+        Cook times of the block_end measured before the block was compiled. None to measure the block as it is now.
+
+        frames
+        The cooked frames, self.measureFrames if None, or the current frame.
+        """
+
+        if frames == None:
+            frames = self.measureFrames if self.measureFrames != None else (hou.frame(),)
+        frames = tuple(frames)
+        blockEnd = self.blockEndNode(blockNode)
+
+        with self.compilePhase("cookMeasure", blockEnd):
+            if before == None:
+                before = self.cookTimes(blockEnd, frames, self.measureRepeat)
+
+            compileEnd = self.compileEndNode(blockEnd)
+            if compileEnd == None:
+                return AD_cookMeasurement(blockEnd.path(), frames, tuple(before), (), False, ("no compile_end node after the block",))
+            after = self.cookTimes(compileEnd, frames, self.measureRepeat)
+            # A node without a verb cooks without errors, but the block around it is not compiled
+            blockers = tuple(f"{blocker.node} ({blocker.type}) can not be compiled : {blocker.reason}" for blocker in self.compileBlockers(blockEnd))
+            messages = tuple(compileEnd.errors()) + tuple(compileEnd.warnings()) + blockers
+
+        return AD_cookMeasurement(blockEnd.path(), frames, tuple(before), after, len(messages) == 0, messages)
+
+    def compileBlock(self, blockNode: hou.SopNode, debug=False, report: typing.Union["AD_compileReport", None] = None) -> "AD_compileReport":
+        """
+        Compile the "blockNode" corresponding block. An already compiled block is updated : only its new entry points get block_begin and compile nodes.
+        If self.incremental is True, the block is skipped if it did not change since it was last compiled, and only its changed nodes are converted again.
+        The block is skipped if it has nodes which can not be compiled, they are added to the report blockers. (see self.compileBlockers())
+        The block is planned, then the plan is applied as a single undo, rolled back if it fails. (see self.planBlock(), self.applyPlan() and self.sceneEdit())
+        If self.measureFrames is not None, the cook times of the block before and after are added to the report. They are not counted in the compile time. (see self.measureCook())
+        return "report", or a new AD_compileReport if None, with the compiled block added to it.
+        """
+
+        if report == None:
+            report = AD_compileReport()
+
+        if self.incremental == True and self.isBlockUpToDate(blockNode):
+            report.addSkipped(self.blockEndNode(blockNode), "up to date")
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(f"{blockNode} -> block up to date, skipped")
+            return report
+
+        startTime = time.perf_counter()
+        with self.analysisScope(), self.compilePhase("compileBlock", blockNode):
+            blockers = self.compileBlockers(blockNode, debug=debug)
+            if len(blockers) > 0:
+                report.addBlockers(self.blockEndNode(blockNode), blockers)
+                return report
+
+            if self.measureFrames != None:
+                measureStart = time.perf_counter()
+                with self.compilePhase("cookMeasure", blockNode):
+                    before = self.cookTimes(self.blockEndNode(blockNode), self.measureFrames, self.measureRepeat)
+                startTime = startTime + time.perf_counter() - measureStart
+
+            plan = self.planBlock(blockNode, debug=debug)
+            nodes = self._applyPlan(plan, debug=debug)
+
+        report.addBlock(self.blockEndNode(blockNode), len(nodes), time.perf_counter() - startTime)
+        report.addLoopSettings(plan.loopSettings)
+        report.addChannelReferences(plan.channelReferences)
+
+        if self.measureFrames != None:
+            measurement = self.measureCook(blockNode, before=before)
+            report.addMeasurement(measurement)
+            # Debug output
+            if debugEnabled(debug):
+                logger.debug(measurement)
+
+        return report
+
+    def allBlockEndNodes(self, parent: hou.Node, recursive=False) -> tuple[hou.SopNode]:
+        """
+        return the list of hou.SopNode objects of type name block_end that are children of "parent".
+
+        recursive
+        If True, also looks into the subnetworks of "parent", except locked ones.
+        """
+
+        if recursive == True:
+            nodes = parent.allSubChildren(recurse_in_locked_nodes=False)
+        else:
+            nodes = parent.children()
+
+        return tuple(node for node in nodes if node.type().name() == "block_end")
+
+    def compileAllBlocks(self, parent: hou.Node, recursive=False, debug=False) -> "AD_compileReport":
+        """
+        Compile all the blocks in "parent". (see self.compileBlocks())
+        return an AD_compileReport.
+
+        recursive
+        If True, also compiles the blocks in the subnetworks of "parent". (see self.allBlockEndNodes())
+        """
+
+        return self.compileBlocks(self.allBlockEndNodes(parent, recursive=recursive), label=f"Compile all blocks in {parent.path()}", debug=debug)
+
+    def compileBlocks(self, blockEnds: typing.Iterable[hou.SopNode], label: str = "Compile blocks", debug=False) -> "AD_compileReport":
+        """
+        Compile the blocks of "blockEnds". Blocks nested in another block of "blockEnds" are compiled with it. (see self.compileBlock())
+        All the blocks share the same dependency graphs and parm analysis cache, and the whole conversion is a single undo named "label", rolled back if a block fails. (see self.sceneEdit())
+        return an AD_compileReport.
+        """
+
+        report = AD_compileReport()
+        startTime = time.perf_counter()
+        blockEnds = tuple(blockEnds)
+
+        if self.incremental == True:
+            for blockEnd in blockEnds:
+                if self.isBlockUpToDate(blockEnd):
+                    report.addSkipped(blockEnd, "up to date")
+            upToDate = set(skipped[0] for skipped in report.skipped)
+            blockEnds = tuple(blockEnd for blockEnd in blockEnds if blockEnd.path() not in upToDate)
+
+        with self.sceneEdit(label):
+            with self.analysisScope(), self.compilePhase("compileBlocks"):
+
+                # Keeps the outermost blocks only
+                with self.compilePhase("discovery"):
+                    innerBlockEnds: set[hou.SopNode] = set()
+                    for blockEnd in blockEnds:
+                        if len(self.pairedBlockBeginNodes(blockEnd)) == 0:
+                            report.addSkipped(blockEnd, "no paired block_begin")
+                            continue
+                        for node in self.allNodesInBlock(blockEnd):
+                            if node != blockEnd and node.type().name() == "block_end":
+                                innerBlockEnds.add(node)
+
+                for blockEnd in blockEnds:
+                    if blockEnd not in innerBlockEnds and len(self.pairedBlockBeginNodes(blockEnd)) > 0:
+                        self.compileBlock(blockEnd, debug=debug, report=report)
+
+        report.elapsed = time.perf_counter() - startTime
+
+        # Debug output
+        if debugEnabled(debug):
+            logger.debug(report)
+
+        return report
+
+class AD_cookMeasurement(typing.NamedTuple):
+    """
+    The cook times of a block before and after being compiled. (see AD_HSopCompiler.measureCook())
+
+    before
+    Cook time in seconds of the block_end at each frame, before the block was compiled.
+
+    after
+    Cook time in seconds of the compile_end at each frame.
+
+    compiled
+    True if the compile_end cooked without errors nor warnings and all the nodes of the block can be compiled, so the block cooked compiled.
+
+    messages
+    The errors and warnings of the compile_end and the nodes of the block which can not be compiled, telling why the block did not cook compiled.
+    """
+
+    blockEnd: str
+    frames: tuple[float]
+    before: tuple[float]
+    after: tuple[float]
+    compiled: bool
+    messages: tuple[str]
+
+    def speedup(self) -> float:
+        """
+        return the total cook time before divided by the total cook time after, 0.0 if it was not measured.
+        """
+
+        after = sum(self.after)
+        return sum(self.before) / after if after > 0 else 0.0
+
+    def asDict(self) -> dict:
+        return {"blockEnd": self.blockEnd, "frames": list(self.frames), "before": list(self.before), "after": list(self.after), "speedup": self.speedup(), "compiled": self.compiled, "messages": list(self.messages)}
+
+    def __str__(self) -> str:
+        status = "cooked compiled" if self.compiled == True else "did not cook compiled : " + ", ".join(self.messages)
+        return f"{self.blockEnd} : {sum(self.before)*1000:.1f}ms -> {sum(self.after)*1000:.1f}ms over {len(self.frames)} frames (x{self.speedup():.2f}), {status}"
+
+class AD_compileReport():
+    """
+    What a compile run did, and how fast.
+
+    blocks
+    One tuple[ blockEndPath, nodesCountInBlock, seconds ] per compiled block.
+
+    skipped
+    One tuple[ blockEndPath, reason ] per block left unchanged.
+
+    blockers
+    One AD_compileBlocker per node which prevented its block from being compiled.
+
+    measurements
+    One AD_cookMeasurement per compiled block, if the cook times were measured.
+
+    loopSettings
+    The settings chosen for the block_end nodes of the compiled blocks, changed or not. (see AD_HSopCompiler.loopSettings())
+
+    channelReferences
+    The references of the nodes of the compiled blocks to channels of other nodes. (see AD_HSopCompiler.channelReferences())
+
+    elapsed
+    Total duration of the run in seconds.
+    """
+
+    def __init__(self) -> None:
+        self.blocks: list[tuple[str, int, float]] = []
+        self.skipped: list[tuple[str, str]] = []
+        self.blockers: list[AD_compileBlocker] = []
+        self.measurements: list[AD_cookMeasurement] = []
+        self.loopSettings: list[AD_plannedLoopSetting] = []
+        self.channelReferences: list[AD_channelReference] = []
+        self.elapsed: float = 0.0
+
+    def addBlock(self, blockEnd: hou.SopNode, nodesCount: int, seconds: float):
+        self.blocks.append((blockEnd.path(), nodesCount, seconds))
+        self.elapsed = self.elapsed + seconds
+
+    def addSkipped(self, blockEnd: hou.SopNode, reason: str):
+        self.skipped.append((blockEnd.path(), reason))
+
+    def addBlockers(self, blockEnd: hou.SopNode, blockers: typing.Iterable[AD_compileBlocker]):
+        blockers = tuple(blockers)
+        self.blockers.extend(blockers)
+        self.addSkipped(blockEnd, f"{len(blockers)} non compilable nodes")
+
+    def addMeasurement(self, measurement: AD_cookMeasurement):
+        self.measurements.append(measurement)
+
+    def addLoopSettings(self, loopSettings: typing.Iterable[AD_plannedLoopSetting]):
+        self.loopSettings.extend(loopSettings)
+
+    def addChannelReferences(self, channelReferences: typing.Iterable[AD_channelReference]):
+        self.channelReferences.extend(channelReferences)
+
+    def nodesCount(self) -> int:
+        return sum(block[1] for block in self.blocks)
+
+    def nodesPerSecond(self) -> float:
+        return self.nodesCount() / self.elapsed if self.elapsed > 0 else 0.0
+
+    def blocksPerSecond(self) -> float:
+        return len(self.blocks) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def asDict(self) -> dict:
+        """
+        return the report as a JSON serializable dict.
+        """
+
+        return {
+            "blocks": [{"path": block[0], "nodes": block[1], "seconds": block[2]} for block in self.blocks],
+            "skipped": [{"path": skipped[0], "reason": skipped[1]} for skipped in self.skipped],
+            "blockers": [{"node": blocker.node, "type": blocker.type, "reason": blocker.reason} for blocker in self.blockers],
+            "measurements": [measurement.asDict() for measurement in self.measurements],
+            "loopSettings": [setting._asdict() for setting in self.loopSettings],
+            "channelReferences": [reference._asdict() for reference in self.channelReferences],
+            "elapsed": self.elapsed,
+            "nodesPerSecond": self.nodesPerSecond(),
+            "blocksPerSecond": self.blocksPerSecond(),
+        }
+
+    def __str__(self) -> str:
+        lines: list[str] = [f"{len(self.blocks)} blocks compiled ({self.nodesCount()} nodes) in {self.elapsed:.3f}s : {self.blocksPerSecond():.1f} blocks/s, {self.nodesPerSecond():.1f} nodes/s. {len(self.skipped)} blocks skipped."]
+        for blocker in self.blockers:
+            lines.append(f"{blocker.node} ({blocker.type}) can not be compiled : {blocker.reason}")
+        for setting in self.loopSettings:
+            if setting.old == None:
+                lines.append(f"{setting.blockEnd} {setting.parm} not available : {setting.reason}")
+            elif setting.new != setting.old:
+                lines.append(f"{setting.blockEnd}/{setting.parm} set to {setting.new} : {setting.reason}")
+        for reference in self.channelReferences:
+            lines.append(f"{reference.parm} references the channel {reference.channel} of {reference.node}")
+        for measurement in self.measurements:
+            lines.append(str(measurement))
+
+        return "\n".join(lines)
+
+class AD_compileProfiler():
+    """
+    Records the compile phases of an AD_HSopCompiler as timed spans, exported in the Chrome trace event format. (chrome://tracing, https://ui.perfetto.dev)
+
+        compiler = AD_HSopCompiler(profiler=AD_compileProfiler())
+        compiler.compileBlock(node)
+        compiler.profiler.saveTrace("compile_trace.json")
+
+    Spans are only recorded while the compiler has a profiler. Without one, a phase costs a single attribute test.
+    """
+
+    def __init__(self) -> None:
+        # (name, start, end, thread id, args), times from time.perf_counter()
+        self.spans: list[tuple[str, float, float, int, typing.Union[dict, None]]] = []
+        self.origin: float = time.perf_counter()
+
+    def addSpan(self, name: str, start: float, end: float, args: typing.Union[dict, None] = None):
+        self.spans.append((name, start, end, threading.get_ident(), args))
+
+    @contextlib.contextmanager
+    def span(self, name: str, args: typing.Union[dict, None] = None):
+        """
+        Context recorded as a span named "name". Used for the spans which are not compile phases.
+        """
+
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.addSpan(name, startTime, time.perf_counter(), args)
+
+    def clear(self):
+        self.spans.clear()
+        self.origin = time.perf_counter()
+
+    def totals(self) -> dict[str, dict]:
+        """
+        return { name : { "count": int, "seconds": float } } for the recorded spans. Nested spans are also counted in their parents.
+        """
+
+        totals: dict[str, dict] = {}
+        for name, start, end, threadId, args in self.spans:
+            total = totals.setdefault(name, {"count": 0, "seconds": 0.0})
+            total["count"] = total["count"] + 1
+            total["seconds"] = total["seconds"] + end - start
+
+        return totals
+
+    def traceEvents(self) -> list[dict]:
+        """
+        return the recorded spans as Chrome trace complete events ("ph": "X"), in microseconds since self.origin.
+        """
+
+        pid = os.getpid()
+        events: list[dict] = []
+        for name, start, end, threadId, args in self.spans:
+            event = {"name": name, "cat": "compile", "ph": "X", "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6, "pid": pid, "tid": threadId}
+            if args != None:
+                event["args"] = args
+            events.append(event)
+
+        return events
+
+    def asTrace(self) -> dict:
+        """
+        return the Chrome trace as a JSON serializable dict.
+        """
+
+        return {"traceEvents": self.traceEvents(), "displayTimeUnit": "ms"}
+
+    def saveTrace(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.asTrace(), file)
+
+    def __str__(self) -> str:
+        lines: list[str] = []
+        for name, total in sorted(self.totals().items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{name:<24}{total['count']:>10} spans {total['seconds']*1000:>10.2f}ms")
+
+        return "\n".join(lines)
+
+class AD_houInstrumentation():
+    """
+    Opt-in instrumentation of the hou calls made while compiling. Counts the calls and measures their time, per hou API and per compile phase of "compiler" (see AD_HSopCompiler.compilePhase()).
+    While the context is active, the instrumented hou functions and methods are replaced by wrappers. They are restored when it exits.
+
+        compiler = AD_HSopCompiler()
+        with AD_houInstrumentation(compiler) as instrumentation:
+            compiler.compileBlock(node)
+        print(instrumentation)
+        instrumentation.report() # -> dict
+
+    apis
+    The instrumented hou APIs, as "function" for hou module functions or "Class.method" for methods.
+    """
+
+    DEFAULT_APIS: tuple[str] = (
+        "node",
+        "parm",
+        "Node.parms",
+        "Node.parmTuples",
+        "Node.parm",
+        "Node.node",
+        "Node.inputs",
+        "Node.input",
+        "Node.outputs",
+        "Node.children",
+        "Node.inputConnectors",
+        "Node.outputConnections",
+        "Node.inputConnections",
+        "Node.dependents",
+        "Node.parmsReferencingThis",
+        "Node.spareParms",
+        "Node.createNode",
+        "Node.setInput",
+        "Node.moveToGoodPosition",
+        "Node.addSpareParmTuple",
+        "Node.parmTemplateGroup",
+        "Node.setParmTemplateGroup",
+        "Node.relativePathTo",
+        "Node.path",
+        "Node.type",
+        "NodeType.parmTemplateGroup",
+        "Parm.rawValue",
+        "Parm.keyframes",
+        "ParmTuple.isAtDefault",
+        "ParmTuple.parmTemplate",
+        "Parm.parmTemplate",
+        "Parm.set",
+        "Parm.setKeyframe",
+        "Parm.evalAsNode",
+        "Parm.path",
+        "Parm.node",
+    )
+
+    def __init__(self, compiler: typing.Union[AD_HSopCompiler, None] = None, apis: typing.Iterable[str] = DEFAULT_APIS) -> None:
+        self.compiler = compiler
+        self.apis: tuple[str] = tuple(apis)
+        # (phase, api) -> [ calls, seconds ]
+        self.stats: dict[tuple[str, str], list] = {}
+        self._originals: list[tuple[typing.Any, str, typing.Any]] = []
+
+    def _owners(self, api: str) -> list[tuple[typing.Any, str]]:
+        """
+        return the (object, attributeName) pairs to patch for "api".
+        A method is patched on every hou class defining it, so overrides in subclasses (hou.SopNode, ...) are instrumented too.
+        """
+
+        if "." not in api:
+            return [(hou, api)] if hasattr(hou, api) else []
+
+        className, methodName = api.split(".", 1)
+        baseClass = getattr(hou, className, None)
+        if baseClass == None:
+            return []
+
+        owners: list[tuple[typing.Any, str]] = []
+        for value in vars(hou).values():
+            if isinstance(value, type) and issubclass(value, baseClass) and methodName in vars(value):
+                owners.append((value, methodName))
+
+        return owners
+
+    def _wrap(self, api: str, function: typing.Callable) -> typing.Callable:
+
+        stats = self.stats
+        compiler = self.compiler
+
+        def wrapper(*args, **kwargs):
+            startTime = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - startTime
+                key = (compiler.currentPhase if compiler != None else "none", api)
+                stat = stats.get(key)
+                if stat == None:
+                    stats[key] = [1, seconds]
+                else:
+                    stat[0] = stat[0] + 1
+                    stat[1] = stat[1] + seconds
+
+        return wrapper
+
+    def __enter__(self) -> "AD_houInstrumentation":
+        for api in self.apis:
+            for owner, name in self._owners(api):
+                original = vars(owner)[name]
+                self._originals.append((owner, name, original))
+                setattr(owner, name, self._wrap(api, original))
+
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+
+    def report(self) -> dict:
+        """
+        return the collected stats :
+        {
+            "apis":   { api:   { "calls": int, "seconds": float } },
+            "phases": { phase: { "calls": int, "seconds": float, "apis": { api: { "calls": int, "seconds": float } } } }
+        }
+        """
+
+        apis: dict[str, dict] = {}
+        phases: dict[str, dict] = {}
+
+        for (phase, api), (calls, seconds) in self.stats.items():
+            apiStats = apis.setdefault(api, {"calls": 0, "seconds": 0.0})
+            apiStats["calls"] = apiStats["calls"] + calls
+            apiStats["seconds"] = apiStats["seconds"] + seconds
+
+            phaseStats = phases.setdefault(phase, {"calls": 0, "seconds": 0.0, "apis": {}})
+            phaseStats["calls"] = phaseStats["calls"] + calls
+            phaseStats["seconds"] = phaseStats["seconds"] + seconds
+            phaseStats["apis"][api] = {"calls": calls, "seconds": seconds}
+
+        return {"apis": apis, "phases": phases}
+
+    def __str__(self) -> str:
+        report = self.report()
+        lines: list[str] = []
+
+        for phase, phaseStats in sorted(report["phases"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{phase} : {phaseStats['calls']} hou calls, {phaseStats['seconds']*1000:.2f}ms")
+            for api, apiStats in sorted(phaseStats["apis"].items(), key=lambda item: -item[1]["seconds"]):
+                lines.append(f"    {api:<28}{apiStats['calls']:>10} calls {apiStats['seconds']*1000:>10.2f}ms")
 
-        for node in self.allNodesInBlock(blockNode):
-            self.makeNodeCompilable(node, debug=debug)
\ No newline at end of file
+        return "\n".join(lines)
@@ -0,0 +1,273 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Compiles the foreach blocks of .hip and .hda files without opening Houdini.
+#
+# Each file is converted by its own hython process, several files running at once :
+#     python ad_hsopcompiler_batch.py "legacy/**/*.hip" --nodes "/obj/*" --jobs 8 --output-dir converted --summary summary.json
+#
+# Every converted file is saved to a new file, next to a JSON summary with timings and failures.
+# With --trace, the compile phases of each file are also saved as a Chrome trace. (see ad_hsopcompiler.AD_compileProfiler)
+# The driver itself does not need hou, so it can run with any Python 3 interpreter.
+
+import typing, os, sys, glob, json, time, fnmatch, logging, argparse, subprocess, traceback, concurrent.futures
+
+HIP_EXTENSIONS = (".hip", ".hipnc", ".hiplc")
+HDA_EXTENSIONS = (".hda", ".hdanc", ".hdalc", ".otl", ".otlnc", ".otllc")
+
+def expandPatterns(patterns: typing.Iterable[str]) -> tuple[str]:
+    """
+    return the sorted list of files matching the glob "patterns". ** matches any number of directories.
+    """
+
+    files: set[str] = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.expanduser(pattern), recursive=True):
+            if os.path.isfile(path) and path.lower().endswith(HIP_EXTENSIONS + HDA_EXTENSIONS):
+                files.add(os.path.abspath(path))
+
+    return tuple(sorted(files))
+
+def outputPathFor(path: str, outputDir: typing.Union[str, None] = None, suffix: str = "_compiled") -> str:
+    """
+    return the path where the converted "path" is saved : "suffix" is added to the file name, and the file is moved to "outputDir" if not None.
+    """
+
+    root, extension = os.path.splitext(os.path.basename(path))
+    directory = outputDir if outputDir != None else os.path.dirname(path)
+
+    return os.path.join(directory, root + suffix + extension)
+
+def summaryPathFor(outputPath: str) -> str:
+    """
+    return the path of the JSON summary written for "outputPath".
+    """
+
+    return outputPath + ".json"
+
+def matchingBlockEnds(root: "hou.Node", nodePatterns: typing.Iterable[str]) -> tuple["hou.SopNode"]:
+    """
+    return the block_end nodes under "root" whose path matches one of the fnmatch "nodePatterns".
+    """
+
+    from ad_hsopcompiler import AD_HSopCompiler
+
+    nodePatterns = tuple(nodePatterns)
+    blockEnds = AD_HSopCompiler().allBlockEndNodes(root, recursive=True)
+
+    return tuple(node for node in blockEnds if any(fnmatch.fnmatchcase(node.path(), pattern) for pattern in nodePatterns))
+
+def tracePathFor(outputPath: str) -> str:
+    """
+    return the path of the Chrome trace written for "outputPath".
+    """
+
+    return outputPath + ".trace.json"
+
+def compileFile(path: str, outputPath: str, nodePatterns: typing.Iterable[str] = ("*",), trace=False, analysisWorkers: int = 1, measureFrames: typing.Union[typing.Iterable[float], None] = None) -> dict:
+    """
+    Compiles the blocks of the .hip or .hda file "path" and saves the result to "outputPath". Must run in hython.
+    return the summary of the conversion as a JSON serializable dict.
+
+    nodePatterns
+    Only the blocks whose block_end path matches one of these fnmatch patterns are compiled.
+
+    trace
+    If True, the compile phases are saved as a Chrome trace. (see tracePathFor())
+
+    analysisWorkers
+    Number of processes analysing the parms of each network. (see AD_HSopCompiler.prefetchAnalysis())
+
+    measureFrames
+    If not None, the blocks are cooked at these frames before and after being compiled, the cook times are in the reports. (see AD_HSopCompiler.measureCook())
+    """
+
+    import hou
+    from ad_hsopcompiler import AD_HSopCompiler, AD_compileProfiler
+
+    summary: dict = {"file": path, "output": outputPath, "status": "ok", "reports": [], "failures": []}
+    startTime = time.perf_counter()
+    compiler = AD_HSopCompiler(profiler=AD_compileProfiler() if trace == True else None, analysisWorkers=analysisWorkers, measureFrames=measureFrames)
+
+    if path.lower().endswith(HIP_EXTENSIONS):
+        loadStart = time.perf_counter()
+        hou.hipFile.load(path, suppress_save_prompt=True, ignore_load_warnings=True)
+        summary["loadSeconds"] = time.perf_counter() - loadStart
+
+        report = compiler.compileBlocks(matchingBlockEnds(hou.node("/"), nodePatterns), label=f"Compile blocks in {path}")
+        summary["reports"].append(report.asDict())
+
+        saveStart = time.perf_counter()
+        hou.hipFile.save(file_name=outputPath, save_to_recent_files=False)
+        summary["saveSeconds"] = time.perf_counter() - saveStart
+
+    else:
+        hou.hda.installFile(path)
+        for definition in hou.hda.definitionsInFile(path):
+            category = definition.nodeTypeCategory().name()
+            try:
+                if category == "Sop":
+                    container = hou.node("/obj").createNode("geo")
+                    instance = container.createNode(definition.nodeTypeName())
+                elif category == "Object":
+                    instance = hou.node("/obj").createNode(definition.nodeTypeName())
+                else:
+                    summary["failures"].append({"definition": definition.nodeTypeName(), "error": f"{category} definitions are not supported"})
+                    continue
+
+                instance.allowEditingOfContents()
+                report = compiler.compileBlocks(matchingBlockEnds(instance, nodePatterns), label=f"Compile blocks in {definition.nodeTypeName()}")
+                definition.save(outputPath, template_node=instance)
+                summary["reports"].append(dict(report.asDict(), definition=definition.nodeTypeName()))
+            except Exception:
+                summary["failures"].append({"definition": definition.nodeTypeName(), "error": traceback.format_exc()})
+
+    if compiler.profiler != None:
+        compiler.profiler.saveTrace(tracePathFor(outputPath))
+        summary["trace"] = tracePathFor(outputPath)
+
+    if len(summary["failures"]) > 0:
+        summary["status"] = "failed"
+    summary["seconds"] = time.perf_counter() - startTime
+
+    return summary
+
+def runWorker(args: argparse.Namespace) -> int:
+    """
+    Converts a single file in the current hython process and writes its summary. (see compileFile())
+    """
+
+    if args.debug == True:
+        logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+
+    try:
+        summary = compileFile(args.worker, args.output, args.nodes, trace=args.trace, analysisWorkers=args.analysis_workers, measureFrames=args.measure_frames)
+    except Exception:
+        summary = {"file": args.worker, "output": args.output, "status": "failed", "reports": [], "failures": [{"error": traceback.format_exc()}]}
+
+    with open(summaryPathFor(args.output), "w") as file:
+        json.dump(summary, file, indent=4)
+
+    return 0 if summary["status"] == "ok" else 1
+
+def runFile(path: str, args: argparse.Namespace) -> dict:
+    """
+    Converts "path" in a new hython process.
+    return its summary, or a failure summary if the process did not write one.
+    """
+
+    outputPath = outputPathFor(path, args.output_dir, args.suffix)
+    summaryPath = summaryPathFor(outputPath)
+    if os.path.exists(summaryPath):
+        os.remove(summaryPath)
+
+    command = [args.hython, os.path.abspath(__file__), "--worker", path, "--output", outputPath]
+    for pattern in args.nodes:
+        command.extend(["--nodes", pattern])
+    if args.trace == True:
+        command.append("--trace")
+    if args.analysis_workers > 1:
+        command.extend(["--analysis-workers", str(args.analysis_workers)])
+    if args.measure_frames != None:
+        command.append("--measure-frames")
+        command.extend(str(frame) for frame in args.measure_frames)
+    if args.debug == True:
+        command.append("--debug")
+
+    startTime = time.perf_counter()
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout)
+        returnCode = process.returncode
+        output = process.stdout + process.stderr
+    except subprocess.TimeoutExpired:
+        returnCode = None
+        output = f"Timed out after {args.timeout}s"
+    except OSError as error:
+        returnCode = None
+        output = f"Could not start {args.hython} : {error}"
+
+    if os.path.exists(summaryPath):
+        with open(summaryPath) as file:
+            summary = json.load(file)
+    else:
+        summary = {"file": path, "output": outputPath, "status": "failed", "reports": [], "failures": [{"error": output[-4000:]}]}
+        with open(summaryPath, "w") as file:
+            json.dump(summary, file, indent=4)
+
+    summary["returnCode"] = returnCode
+    summary["processSeconds"] = time.perf_counter() - startTime
+
+    return summary
+
+def parseArgs(argv: typing.Union[list[str], None] = None) -> argparse.Namespace:
+
+    parser = argparse.ArgumentParser(description="Compile the foreach blocks of .hip and .hda files with hython.")
+    parser.add_argument("patterns", nargs="*", help="glob patterns of the files to convert, ** matches any number of directories")
+    parser.add_argument("--nodes", action="append", default=None, help="fnmatch pattern of the block_end node paths to compile, can be repeated (default : all)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="number of files converted at once (default : number of cpus)")
+    parser.add_argument("--hython", default="hython", help="hython executable used to convert the files (default : hython)")
+    parser.add_argument("--output-dir", default=None, help="directory of the converted files (default : next to each file)")
+    parser.add_argument("--suffix", default="_compiled", help="added to the name of the converted files (default : _compiled)")
+    parser.add_argument("--summary", default=None, help="JSON file gathering the summaries of all the files")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds after which the conversion of a file is stopped")
+    parser.add_argument("--analysis-workers", type=int, default=1, help="processes analysing the parms of each file, useful for a few very large files (default : 1)")
+    parser.add_argument("--measure-frames", type=float, nargs="+", default=None, help="cooks the blocks at these frames before and after compiling them, and reports the speed-up")
+    parser.add_argument("--trace", action="store_true", help="saves the compile phases of each file as a Chrome trace, next to its summary")
+    parser.add_argument("--debug", action="store_true", help="logs the compiler debug output (see the \"ad_hsopcompiler\" logger)")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=None, help=argparse.SUPPRESS)
+
+    args = parser.parse_args(argv)
+    if args.nodes == None:
+        args.nodes = ["*"]
+    if args.worker == None and len(args.patterns) == 0:
+        parser.error("at least one file pattern is needed")
+
+    return args
+
+def main(argv: typing.Union[list[str], None] = None) -> int:
+
+    args = parseArgs(argv)
+
+    if args.worker != None:
+        return runWorker(args)
+
+    files = expandPatterns(args.patterns)
+    if args.output_dir != None:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    startTime = time.perf_counter()
+    summaries: list[dict] = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {pool.submit(runFile, path, args): path for path in files}
+        for future in concurrent.futures.as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            print(f"[{len(summaries)}/{len(files)}] {summary['status']} : {summary['file']} ({summary['processSeconds']:.1f}s)")
+
+    summaries.sort(key=lambda summary: summary["file"])
+    failed = [summary for summary in summaries if summary["status"] != "ok"]
+    print(f"{len(files)} files converted in {time.perf_counter() - startTime:.1f}s, {len(failed)} failed.")
+
+    if args.summary != None:
+        with open(args.summary, "w") as file:
+            json.dump({"files": summaries, "failed": len(failed), "seconds": time.perf_counter() - startTime}, file, indent=4)
+
+    return 0 if len(failed) == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Runs the tests against the in-memory hou stand-in of benchmarks/fakehou.
+
+import os, sys
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks", "fakehou"))
+sys.path.insert(0, os.path.join(REPO_DIR, "houdiniAutoCompileBlock", "scripts", "python"))
+
+import hou
+
+@pytest.fixture
+def network():
+    """
+    A new empty Sop network /obj/geo1.
+    """
+
+    hou.reset()
+    return hou.createNetwork()
+
+@pytest.fixture
+def block(network):
+    """
+    grid1 -> block_begin1 -> block_end1, the block_begin being paired to the block_end. return (network, blockBegin, blockEnd).
+    """
+
+    grid = network.createNode("grid")
+    blockBegin = network.createNode("block_begin")
+    blockEnd = network.createNode("block_end")
+    blockBegin.parm("blockpath").set(blockBegin.relativePathTo(blockEnd))
+    blockBegin.setInput(0, grid)
+    blockEnd.setInput(0, blockBegin)
+    return network, blockBegin, blockEnd
@@ -0,0 +1,86 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import sys, concurrent.futures
+import hou
+from ad_hsopcompiler import AD_HSopCompiler
+
+def test_workers_never_run_houdini(monkeypatch, tmp_path):
+    compiler = AD_HSopCompiler()
+    monkeypatch.delenv(compiler.WORKER_PYTHON_ENV, raising=False)
+    monkeypatch.setenv("HFS", str(tmp_path))
+    monkeypatch.setattr(sys, "executable", str(tmp_path / "bin" / "hython"))
+
+    # No Python shipped in $HFS
+    assert compiler.workerExecutable() == None
+    assert compiler.analysisExecutor(2) == None
+
+    python = tmp_path / "python" / "bin" / "python3"
+    python.parent.mkdir(parents=True)
+    python.write_text("")
+    assert compiler.workerExecutable() == str(python)
+
+    monkeypatch.setenv(compiler.WORKER_PYTHON_ENV, "/usr/bin/python3")
+    assert compiler.workerExecutable() == "/usr/bin/python3"
+
+def test_no_pool_without_python(block, monkeypatch):
+    network, blockBegin, blockEnd = block
+    xform = network.createNode("xform")
+    xform.parm("tx").setKeyframe(hou.Keyframe(1, 'bbox("../grid1", D_XMAX)'))
+    compiler = AD_HSopCompiler(analysisWorkers=2)
+    monkeypatch.setattr(compiler, "PARALLEL_ANALYSIS_MIN_TEXTS", 1)
+    monkeypatch.setattr(compiler, "workerExecutable", lambda: None)
+    monkeypatch.setattr("os.cpu_count", lambda: 2)
+
+    with compiler.analysisScope():
+        assert compiler.prefetchAnalysis(network.children()) == 0
+        assert compiler.parmTextAnalysis(xform.parm("tx")).paths == ("../grid1",)
+
+def test_spawned_python_processes(block, monkeypatch):
+    network, blockBegin, blockEnd = block
+    for i in range(8):
+        xform = network.createNode("xform")
+        xform.parm("tx").setKeyframe(hou.Keyframe(1, f'bbox("../grid1", D_XMAX) + {i}'))
+    compiler = AD_HSopCompiler()
+    monkeypatch.setattr(compiler, "PARALLEL_ANALYSIS_MIN_TEXTS", 1)
+
+    with compiler.analysisExecutor(2) as pool, compiler.analysisScope():
+        assert isinstance(pool, concurrent.futures.ProcessPoolExecutor)
+        assert pool._mp_context.get_start_method() == "spawn"
+
+        assert compiler.prefetchAnalysis(network.children(), executor=pool) >= 8
+        assert compiler.parmTextAnalysis(network.node("xform1").parm("tx")).paths == ("../grid1",)
+
+def test_rewritten_parm_analysed_again(block):
+    network, blockBegin, blockEnd = block
+    network.createNode("box")
+    xform = network.createNode("xform")
+    parm = xform.parm("tx")
+    parm.setKeyframe(hou.Keyframe(1, 'bbox("../box1", D_XMAX)'))
+    compiler = AD_HSopCompiler()
+
+    with compiler.analysisScope():
+        assert compiler.referencedNodesInParm(parm) == (network.node("box1"),)
+        compiler.makeNodeCompilable(xform)
+
+        # Same parm in the same scope, its new keyframe is analysed instead of the cached result
+        assert parm.keyframes()[0].expression() == "bbox(-1, D_XMAX)"
+        assert compiler.parmTextAnalysis(parm).paths == ()
+        assert compiler.referencedNodesInParm(parm) == ()
+
+        parm.setKeyframe(hou.Keyframe(1, 'bbox("../grid1", D_XMAX)'))
+        assert compiler.referencedNodesInParm(parm) == (network.node("grid1"),)
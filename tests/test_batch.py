@@ -0,0 +1,76 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+from ad_hsopcompiler import AD_HSopCompiler
+from ad_hsopcompiler_batch import parseArgs, runWorker, summaryPathFor
+
+def runScene(tmp_path, *argv):
+    """
+    return (returnCode, summary, outputPath) of the worker converting scene.hip of "tmp_path".
+    """
+
+    outputPath = tmp_path / "scene_compiled.hip"
+    returnCode = runWorker(parseArgs(["--worker", str(tmp_path / "scene.hip"), "--output", str(outputPath), *argv]))
+    with open(summaryPathFor(str(outputPath))) as file:
+        summary = json.load(file)
+    return returnCode, summary, outputPath
+
+def test_run_worker_compiles_blocks(block, tmp_path):
+    network, blockBegin, blockEnd = block
+    (tmp_path / "scene.hip").write_text("")
+
+    returnCode, summary, outputPath = runScene(tmp_path)
+
+    assert returnCode == 0
+    assert summary["status"] == "ok"
+    assert summary["failures"] == []
+    assert [block["path"] for block in summary["reports"][0]["blocks"]] == [blockEnd.path()]
+    assert blockEnd.outputs()[0].type().name() == "compile_end"
+    assert outputPath.exists()
+
+def test_run_worker_skips_unmatched_blocks(block, tmp_path):
+    network, blockBegin, blockEnd = block
+    (tmp_path / "scene.hip").write_text("")
+
+    returnCode, summary, outputPath = runScene(tmp_path, "--nodes", "/obj/other/*")
+
+    assert returnCode == 0
+    assert summary["reports"][0]["blocks"] == []
+    assert len(blockEnd.outputs()) == 0
+
+def test_run_worker_records_failures(block, tmp_path, monkeypatch):
+    (tmp_path / "scene.hip").write_text("")
+
+    def compileBlock(self, blockNode, debug=False, report=None):
+        raise RuntimeError("block failed to compile")
+    monkeypatch.setattr(AD_HSopCompiler, "compileBlock", compileBlock)
+
+    returnCode, summary, outputPath = runScene(tmp_path)
+
+    assert returnCode == 1
+    assert summary["status"] == "failed"
+    assert "block failed to compile" in summary["failures"][0]["error"]
+    assert not outputPath.exists()
+
+def test_run_worker_missing_file(network, tmp_path):
+    returnCode, summary, outputPath = runScene(tmp_path)
+
+    assert returnCode == 1
+    assert summary["status"] == "failed"
+    assert "OperationFailed" in summary["failures"][0]["error"]
+    assert not outputPath.exists()
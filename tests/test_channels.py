@@ -0,0 +1,56 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+import hou
+from ad_hsopcompiler import AD_HSopCompiler
+
+@pytest.fixture
+def channelBlock(block):
+    """
+    The block fixture with xform1 inside, and null1 outside of the wires. xform1 and null1 reference each other channels.
+    return (network, blockBegin, blockEnd, xform, null).
+    """
+
+    network, blockBegin, blockEnd = block
+    xform = network.createNode("xform")
+    xform.setInput(0, blockBegin)
+    blockEnd.setInput(0, xform)
+    null = network.createNode("null")
+    null.addSpareParmTuple(hou.FloatParmTemplate("offset", "Offset", 1))
+    null.parm("offset").setKeyframe(hou.Keyframe(1, 'ch("../xform1/tx")'))
+    xform.parm("ty").setKeyframe(hou.Keyframe(1, 'ch("../null1/offset") * 2'))
+    return network, blockBegin, blockEnd, xform, null
+
+def test_channel_references_are_dependencies(channelBlock):
+    network, blockBegin, blockEnd, xform, null = channelBlock
+    compiler = AD_HSopCompiler()
+
+    assert compiler.channelReferencesInParm(xform.parm("ty")) == (("../null1/offset", null),)
+    assert null in compiler.allAncestors(blockEnd, stop=[blockBegin])
+    assert null in compiler.allDescendants(blockBegin, stop=[blockEnd])
+
+def test_channel_references_do_not_pull_nodes_in_block(channelBlock):
+    network, blockBegin, blockEnd, xform, null = channelBlock
+    compiler = AD_HSopCompiler()
+
+    # null1 depends on xform1 and xform1 on null1, but null1 is not wired after block_begin1
+    assert set(compiler.allNodesInBlock(blockEnd)) == {blockEnd, xform, blockBegin}
+
+    plan = compiler.planBlock(blockEnd)
+    assert null.path() not in plan.nodes
+    assert [(ref.parm, ref.channel, ref.node) for ref in plan.channelReferences] == [(xform.parm("ty").path(), "../null1/offset", null.path())]
@@ -0,0 +1,47 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import os, sys, json, subprocess
+import pytest
+from ad_compilerules import AD_compileRules, RULES_ENV
+
+def test_invalid_files_are_skipped(tmp_path):
+    valid = tmp_path / "valid.json"
+    valid.write_text(json.dumps({"studio::mytool": {"compilable": False, "reason": "reads files"}}))
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"studio::other": {"compilable": "no"}')
+    wrongType = tmp_path / "wrongtype.json"
+    wrongType.write_text(json.dumps({"studio::other": {"compilable": "no"}}))
+    rules = AD_compileRules()
+
+    with pytest.warns(UserWarning) as warned:
+        loaded = rules.loadFiles([str(tmp_path / "missing.json"), str(broken), str(wrongType), str(valid)])
+
+    assert loaded == (str(valid),)
+    assert len(warned) == 3
+    assert "studio::mytool" in rules and "studio::other" not in rules
+
+def test_import_with_missing_rules_file(tmp_path):
+    env = dict(os.environ)
+    env[RULES_ENV] = str(tmp_path / "missing.json")
+    code = "import ad_compilerules; print(len(ad_compilerules.compileRules))"
+
+    result = subprocess.run([sys.executable, "-c", code], env=env, cwd=os.path.dirname(sys.modules["ad_compilerules"].__file__), capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert "missing.json" in result.stderr
@@ -0,0 +1,92 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import hou
+from ad_hsopcompiler import AD_HSopCompiler, AD_HSopGraph, AD_plannedNode, AD_plannedInsertion
+
+def siblingBlocks(network, count):
+    blockEnds = []
+    for i in range(count):
+        grid = network.createNode("grid")
+        blockBegin = network.createNode("block_begin")
+        blockEnd = network.createNode("block_end")
+        blockBegin.parm("blockpath").set(blockBegin.relativePathTo(blockEnd))
+        blockBegin.setInput(0, grid)
+        xform = network.createNode("xform")
+        xform.setInput(0, blockBegin)
+        xform.parm("tx").setKeyframe(hou.Keyframe(1, 'bbox(0, D_XMAX) + bbox("../grid1", D_YMAX)'))
+        blockEnd.setInput(0, xform)
+        blockEnds.append(blockEnd)
+    return blockEnds
+
+def test_blocks_share_one_graph(network, monkeypatch):
+    siblingBlocks(network, 10)
+    builds = []
+    init = AD_HSopGraph.__init__
+    monkeypatch.setattr(AD_HSopGraph, "__init__", lambda self, *args, **kwargs: builds.append(1) or init(self, *args, **kwargs))
+
+    report = AD_HSopCompiler().compileAllBlocks(network)
+
+    assert len(report.blocks) == 10
+    assert len(builds) == 1
+
+def test_updated_graph_matches_a_new_one(network):
+    blockEnds = siblingBlocks(network, 4)
+    compiler = AD_HSopCompiler()
+
+    with compiler.analysisScope():
+        for blockEnd in blockEnds:
+            compiler.compileBlock(blockEnd)
+        updated = compiler.graph(network)
+        rebuilt = AD_HSopGraph(compiler, network)
+
+        assert set(updated.nodes) == set(rebuilt.nodes)
+        for node in rebuilt.nodes:
+            assert updated.directAncestors(node) == rebuilt.directAncestors(node)
+            assert updated.directDescendants(node) == rebuilt.directDescendants(node)
+            assert updated.wiredDescendants(node) == rebuilt.wiredDescendants(node)
+        for blockEnd in blockEnds:
+            assert updated.pairedBlockBegins(blockEnd) == rebuilt.pairedBlockBegins(blockEnd)
+
+def test_queries_see_user_edits(block):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+    assert set(compiler.allNodesInBlock(blockEnd)) == {blockEnd, blockBegin}
+
+    xform = network.createNode("xform")
+    xform.setInput(0, blockBegin)
+    blockEnd.setInput(0, xform)
+
+    assert set(compiler.allNodesInBlock(blockEnd)) == {blockEnd, xform, blockBegin}
+    assert compiler.allAncestors(blockEnd, stop=[blockBegin]) == (xform,)
+
+def test_cached_path_miss_found_after_insertion(block):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+    parm = blockBegin.parm("blockpath")
+
+    with compiler.analysisScope():
+        assert compiler.pathToNode("../compile_begin1", parm) == None
+        # The miss is cached by network and relative path
+        assert compiler._paths[(network, "../compile_begin1")] == None
+
+        insertion = AD_plannedInsertion(AD_plannedNode("compileBegin", "compile_begin", network.path()), blockBegin.path(), 0, ((blockEnd.path(), 0),), None)
+        compileBegin = compiler.applyInsertions((insertion,))[0]
+
+        assert compileBegin.name() == "compile_begin1"
+        assert compiler.pathToNode("../compile_begin1", parm) == compileBegin
@@ -0,0 +1,69 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import hou
+from ad_hsopcompiler import AD_HSopCompiler, AD_houInstrumentation
+
+def blockWithExpression(block):
+    """
+    return the xform added inside the block fixture, with a spare parm referencing grid1 and 20 plain spare parms.
+    """
+
+    network, blockBegin, blockEnd = block
+    xform = network.createNode("xform")
+    xform.setInput(0, blockBegin)
+    blockEnd.setInput(0, xform)
+    xform.addSpareParmTuple(hou.StringParmTemplate("label", "Label"))
+    xform.parm("label").set('piece_`npoints("../grid1")`')
+    for i in range(20):
+        xform.addSpareParmTuple(hou.FloatParmTemplate(f"plain{i}", f"Plain {i}"))
+        xform.parm(f"plain{i}").set(i + 0.5)
+    return xform
+
+def test_edited_parm_invalidates_stamp(block):
+    network, blockBegin, blockEnd = block
+    xform = blockWithExpression(block)
+    compiler = AD_HSopCompiler()
+    compiler.compileBlock(blockEnd)
+
+    with AD_houInstrumentation(compiler, ("Parm.rawValue",)) as instrumentation:
+        assert compiler.isNodeUpToDate(xform) == True
+    # Only label and spare_input0 are read, by expressionParms() then parmFingerprint(), not the plain parms
+    assert instrumentation.report()["apis"]["Parm.rawValue"]["calls"] == 4
+
+    # Plain parms do not change the conversion
+    xform.parm("plain0").set(10.0)
+    assert compiler.isNodeUpToDate(xform) == True
+
+    xform.parm("label").set('piece_`npoints("../grid1") + 1`')
+    assert compiler.isNodeUpToDate(xform) == False
+    assert compiler.isBlockUpToDate(blockEnd) == False
+
+def test_untouched_block_is_skipped(block):
+    network, blockBegin, blockEnd = block
+    xform = blockWithExpression(block)
+    compiler = AD_HSopCompiler()
+    compiler.compileBlock(blockEnd)
+    nodes = network.children()
+    label = xform.parm("label").rawValue()
+
+    report = AD_HSopCompiler().compileBlock(blockEnd)
+
+    assert report.skipped == [(blockEnd.path(), "up to date")]
+    assert report.blocks == []
+    assert network.children() == nodes
+    assert xform.parm("label").rawValue() == label
@@ -0,0 +1,53 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from ad_exprtools import AD_hscriptLexer, hscriptSignatures, hscriptVariables
+
+lexer = AD_hscriptLexer()
+
+def test_strings_with_escaped_quotes():
+    expr = r'point("../a\"b", 0, "P", 0) + prim(' + "'../c'" + ', 0, "N", 0)'
+
+    assert [match.group() for match in lexer.strings(expr)] == [r'"../a\"b"', '"P"', "'../c'", '"N"']
+
+def test_unterminated_string():
+    # An unterminated quote is not a string, the path in it is not detected
+    assert lexer.strings('point("../box1, 0') == ()
+    assert [token.kind for token in lexer.tokenize('"a')] == [lexer.OTHER, lexer.IDENT]
+
+def test_nested_calls():
+    expr = 'max(npoints(0), nprims(fit(1, 0, 1, 0, 2)))'
+
+    # Nested calls come before the calls containing them
+    assert [(call.name, len(call.args)) for call in lexer.calls(expr)] == [("npoints", 1), ("fit", 5), ("nprims", 1), ("max", 2)]
+    # A call as argument is not an input number
+    assert [(match.group(1), match.group(2)) for match in lexer.inputReferences(expr, hscriptSignatures)] == [("npoints", "0")]
+
+def test_input_references():
+    expr = 'bbox(0, D_XMAX) + npoints(opinputpath(".", 1)) + strcat("x", "0") + point(1, 0, "P", 0)'
+
+    matches = lexer.inputReferences(expr, hscriptSignatures)
+    assert [(match.group(1), match.group(2)) for match in matches] == [("bbox", "0"), ("point", "1")]
+    assert expr[matches[1].start(2)] == "1"
+
+def test_variables():
+    expr = '$CEX + ${CEY} + "$CEZ" + $FOO'
+
+    # Variables in string literals and unknown variables are skipped
+    matches = lexer.variables(expr, hscriptVariables)
+    assert [match.group() for match in matches] == ["$CEX", "${CEY}"]
+    assert [match.group(1) for match in matches] == ["CEX", "CEY"]
@@ -0,0 +1,61 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import hou
+from ad_hsopcompiler import AD_HSopCompiler
+
+def settings(compiler, blockEnd) -> dict:
+    """
+    return { parm : (old, new) } of the loop settings of "blockEnd".
+    """
+
+    return {setting.parm: (setting.old, setting.new) for setting in compiler.loopSettings(blockEnd)}
+
+def test_merge_loop_is_multithreaded(block):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+    blockEnd.parm("method").set(compiler.GATHER_MERGE)
+
+    assert settings(compiler, blockEnd) == {"multithread": (0, 1), "batching": (None, None)}
+
+    report = compiler.compileBlock(blockEnd)
+
+    assert blockEnd.evalParm("multithread") == 1
+    assert "block_end1/multithread set to 1" in str(report)
+    assert "block_end1 batching not available" in str(report)
+
+def test_feedback_loop_is_left_as_it_is(block):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+    blockEnd.parm("method").set(compiler.GATHER_FEEDBACK)
+
+    assert settings(compiler, blockEnd) == {"multithread": (0, 0), "batching": (None, None)}
+
+    compiler.compileBlock(blockEnd)
+
+    assert blockEnd.evalParm("multithread") == 0
+
+def test_single_iteration_is_left_as_it_is(block):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+    blockEnd.parm("itermethod").set(compiler.ITERATE_BY_COUNT)
+    blockEnd.parm("iterations").set(1)
+
+    assert settings(compiler, blockEnd) == {"multithread": (0, 0), "batching": (None, None)}
+
+    blockEnd.parm("iterations").set(8)
+    assert settings(compiler, blockEnd)["multithread"] == (0, 1)
@@ -0,0 +1,114 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import time
+import pytest
+import hou
+from ad_hsopcompiler import AD_HSopCompiler
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Simulated time : the stand-in cooks advance it instead of sleeping, so cook times are exact.
+    """
+
+    now = [0.0]
+    def sleep(seconds):
+        now[0] += seconds
+    monkeypatch.setattr(time, "sleep", sleep)
+    monkeypatch.setattr(time, "perf_counter", lambda: now[0])
+    return now
+
+@pytest.fixture
+def cookedBlock(block):
+    """
+    The block fixture with an xform inside, cooking in 40ms. return (network, blockBegin, blockEnd, xform).
+    """
+
+    network, blockBegin, blockEnd = block
+    xform = network.createNode("xform")
+    xform.setInput(0, blockBegin)
+    blockEnd.setInput(0, xform)
+    xform.setCookTime(0.04)
+    return network, blockBegin, blockEnd, xform
+
+def test_measure_compiled_block(cookedBlock, clock, monkeypatch):
+    network, blockBegin, blockEnd, xform = cookedBlock
+    monkeypatch.setattr(hou, "_frame", 5.0)
+
+    report = AD_HSopCompiler(measureFrames=(1, 2)).compileBlock(blockEnd)
+
+    measurement = report.measurements[0]
+    assert measurement.blockEnd == blockEnd.path()
+    assert measurement.frames == (1, 2)
+    assert measurement.before == pytest.approx((0.04, 0.04))
+    assert measurement.after == pytest.approx((0.04 / hou.COMPILED_SPEEDUP, 0.04 / hou.COMPILED_SPEEDUP))
+    assert measurement.speedup() == pytest.approx(hou.COMPILED_SPEEDUP)
+    assert measurement.compiled == True
+    assert measurement.messages == ()
+    assert hou.frame() == 5
+
+def test_measure_compile_end_errors(cookedBlock, clock, monkeypatch):
+    network, blockBegin, blockEnd, xform = cookedBlock
+    monkeypatch.setattr(hou.Node, "errors", lambda self: ("Invalid source",) if self.type().name() == "compile_end" else ())
+
+    measurement = AD_HSopCompiler(measureFrames=(1,)).compileBlock(blockEnd).measurements[0]
+
+    assert measurement.before == pytest.approx((0.04,))
+    assert measurement.compiled == False
+    assert measurement.messages == ("Invalid source",)
+
+def test_measure_not_compilable_node(cookedBlock, clock):
+    network, blockBegin, blockEnd, xform = cookedBlock
+    compiler = AD_HSopCompiler()
+    compiler.compileBlock(blockEnd)
+    # Added after the compile, so it is not reported as a blocker
+    python = network.createNode("python")
+    python.setInput(0, blockBegin)
+    xform.setInput(0, python)
+
+    measurement = compiler.measureCook(blockEnd, before=(0.04,), frames=(1,))
+
+    assert measurement.after == pytest.approx((0.04,))
+    assert measurement.compiled == False
+    assert measurement.messages == (f"Unable to compile : {python.path()} is not compilable", f"{python.path()} (python) can not be compiled : Python SOPs run Python code when cooking, they can not be compiled")
+
+def test_measure_silent_node_without_verb(cookedBlock, clock, monkeypatch):
+    network, blockBegin, blockEnd, xform = cookedBlock
+    compiler = AD_HSopCompiler()
+    compiler.compileBlock(blockEnd)
+    python = network.createNode("python")
+    python.setInput(0, blockBegin)
+    xform.setInput(0, python)
+    # The compile_end cooks fine, but the block is not compiled around a node without a verb
+    monkeypatch.setattr(hou.Node, "warnings", lambda self: ())
+
+    measurement = compiler.measureCook(blockEnd, before=(0.04,), frames=(1,))
+
+    assert measurement.after == pytest.approx((0.04,))
+    assert measurement.compiled == False
+    assert measurement.messages == (f"{python.path()} (python) can not be compiled : Python SOPs run Python code when cooking, they can not be compiled",)
+
+def test_measure_uncompiled_block(cookedBlock, clock):
+    network, blockBegin, blockEnd, xform = cookedBlock
+
+    measurement = AD_HSopCompiler().measureCook(blockEnd, frames=(1,))
+
+    assert measurement.before == pytest.approx((0.04,))
+    assert measurement.after == ()
+    assert measurement.compiled == False
+    assert measurement.messages == ("no compile_end node after the block",)
@@ -0,0 +1,48 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import hou
+from ad_hsopcompiler import AD_HSopCompiler, AD_houInstrumentation
+
+def test_parm_tuple_kinds():
+    compiler = AD_HSopCompiler()
+
+    assert compiler.parmTupleKind(hou.ParmTemplate("folder", parm_type=hou.parmTemplateType.Folder)) == (compiler.PARM_NONE, True)
+    assert compiler.parmTupleKind(hou.FloatParmTemplate("t", "T", 3)) == (compiler.PARM_NUMERIC, True)
+    assert compiler.parmTupleKind(hou.FloatParmTemplate("tx", "Tx")) == (compiler.PARM_NUMERIC, False)
+    assert compiler.parmTupleKind(hou.FloatParmTemplate("t", "T", 3, default_expression=("$F", "", ""))) == (compiler.PARM_NUMERIC, False)
+    assert compiler.parmTupleKind(hou.StringParmTemplate("group", "Group")) == (compiler.PARM_STRING, True)
+    assert compiler.parmTupleKind(hou.StringParmTemplate("file", "File", default_value=("`$HIP`/a.bgeo",))) == (compiler.PARM_STRING, False)
+    assert compiler.parmTupleKind(hou.StringParmTemplate("snippet", "Snippet", default_value=("@P.y = 1;",)), ("snippet",)) == (compiler.PARM_VEX, False)
+
+def test_expression_parms_skip_default_parms(network):
+    grid = network.createNode("grid")
+    wrangle = network.createNode("attribwrangle")
+    wrangle.setInput(0, grid)
+    wrangle.parm("snippet").set('@P = point("op:../grid1", "P", 0);')
+    wrangle.addSpareParmTuple(hou.StringParmTemplate("target", "Target", string_type=hou.stringParmType.NodeReference))
+    wrangle.parm("target").set("../grid1")
+    wrangle.addSpareParmTuple(hou.StringParmTemplate("label", "Label"))
+    wrangle.parm("label").set("plain text")
+    compiler = AD_HSopCompiler()
+
+    with AD_houInstrumentation(compiler, ("Parm.rawValue",)) as instrumentation:
+        parms = compiler.expressionParms(wrangle)
+
+    assert [parm.name() for parm in parms] == ["snippet", "target"]
+    # group, at its default, is not read
+    assert instrumentation.report()["apis"]["Parm.rawValue"]["calls"] == 3
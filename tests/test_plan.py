@@ -0,0 +1,133 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+import hou
+from ad_hsopcompiler import AD_HSopCompiler
+
+@pytest.fixture
+def xform(block):
+    """
+    The block fixture with an xform inside, referencing box1 and its input.
+    """
+
+    network, blockBegin, blockEnd = block
+    network.createNode("box")
+    xform = network.createNode("xform")
+    xform.setInput(0, blockBegin)
+    blockEnd.setInput(0, xform)
+    xform.parm("tx").setKeyframe(hou.Keyframe(1, 'bbox("../box1", D_XMAX) + npoints(0)'))
+    return xform
+
+def snapshot(network) -> list:
+    """
+    return what a compile can change in "network" : nodes, wiring, parms values and keyframes, compile records.
+    """
+
+    nodes = []
+    for node in network.children():
+        inputs = [input.name() if input != None else None for input in node.inputs()]
+        parms = [(parm.name(), parm.rawValue(), [key.expression() for key in parm.keyframes()]) for parm in node.parms()]
+        userData = [node.userData(key) for key in (AD_HSopCompiler.NODE_FINGERPRINT_KEY, AD_HSopCompiler.BLOCK_NODES_KEY)]
+        nodes.append((node.name(), node.type().name(), inputs, parms, userData))
+    return nodes
+
+def test_plan_is_a_dry_run(block, xform):
+    network, blockBegin, blockEnd = block
+    before = snapshot(network)
+    undoLabels = hou.undos.undoLabels()
+
+    plan = AD_HSopCompiler().planBlock(blockEnd)
+
+    assert snapshot(network) == before
+    assert hou.undos.undoLabels() == undoLabels
+    assert [insertion.node.kind for insertion in plan.insertions] == ["compile_end", "compile_begin"]
+    assert [(spare.number, spare.target) for spare in plan.spareInputs] == [(0, "/obj/geo1/box1"), (1, "/obj/geo1/block_begin1")]
+    assert [(edit.old, edit.new) for edit in plan.parmEdits] == [('bbox("../box1", D_XMAX) + npoints(0)', "bbox(-1, D_XMAX) + npoints(-2)")]
+
+def test_applied_plan_compiles_the_block(block, xform):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+
+    compiler.applyPlan(compiler.planBlock(blockEnd))
+
+    compileEnd = compiler.compileEndNode(blockEnd)
+    compileBegin = blockBegin.input(0)
+    assert compileEnd.inputs() == (blockEnd,)
+    assert compileBegin.type().name() == "compile_begin"
+    assert compileBegin.inputs() == (network.node("grid1"),)
+    assert xform.parm("tx").keyframes()[0].expression() == "bbox(-1, D_XMAX) + npoints(-2)"
+    assert [xform.parm(f"spare_input{i}").rawValue() for i in range(2)] == ["../box1", "../block_begin1"]
+    assert compiler.isBlockUpToDate(blockEnd) == True
+
+def test_compile_block_applies_the_plan(network):
+    # compileBlock and applyPlan(planBlock()) make the same network
+    def compiled(compile) -> list:
+        hou.reset()
+        network = hou.createNetwork()
+        grid = network.createNode("grid")
+        blockBegin = network.createNode("block_begin")
+        blockEnd = network.createNode("block_end")
+        blockBegin.parm("blockpath").set(blockBegin.relativePathTo(blockEnd))
+        blockBegin.setInput(0, grid)
+        network.createNode("box")
+        xform = network.createNode("xform")
+        xform.setInput(0, blockBegin)
+        blockEnd.setInput(0, xform)
+        xform.parm("tx").setKeyframe(hou.Keyframe(1, 'bbox("../box1", D_XMAX) + npoints(0)'))
+        compile(AD_HSopCompiler(), blockEnd)
+        return snapshot(network)
+
+    assert compiled(lambda compiler, blockEnd: compiler.compileBlock(blockEnd)) == compiled(lambda compiler, blockEnd: compiler.applyPlan(compiler.planBlock(blockEnd)))
+
+def test_stale_plan_is_not_applied(block, xform):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+    plan = compiler.planBlock(blockEnd)
+
+    xform.parm("tx").keyframes()[0].setExpression("npoints(0)")
+    xform.parm("tx").setKeyframe(xform.parm("tx").keyframes()[0])
+    before = snapshot(network)
+
+    with pytest.raises(ValueError, match="changed since it was planned"):
+        compiler.applyPlan(plan)
+    # Checked before anything is written
+    assert snapshot(network) == before
+
+def test_plan_of_existing_spare_input_is_not_applied(block, xform):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+    plan = compiler.planBlock(blockEnd)
+
+    xform.addSpareParmTuple(hou.StringParmTemplate("spare_input0", "Spare Input 0", string_type=hou.stringParmType.NodeReference))
+    before = snapshot(network)
+
+    with pytest.raises(ValueError, match="already exists"):
+        compiler.applyPlan(plan)
+    assert snapshot(network) == before
+
+def test_plan_of_deleted_node_is_not_applied(block, xform):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+    plan = compiler.planBlock(blockEnd)
+
+    network.node("box1").destroy()
+    before = snapshot(network)
+
+    with pytest.raises(ValueError, match="does not exist anymore"):
+        compiler.applyPlan(plan)
+    assert snapshot(network) == before
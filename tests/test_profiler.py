@@ -0,0 +1,62 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json, logging
+import pytest
+import hou
+from ad_hsopcompiler import AD_HSopCompiler, AD_compileProfiler
+
+def test_profiler_chrome_trace(block, tmp_path):
+    network, blockBegin, blockEnd = block
+    xform = network.createNode("xform")
+    xform.setInput(0, blockBegin)
+    blockEnd.setInput(0, xform)
+    xform.parm("tx").setExpression('bbox("../grid1", D_XMAX)')
+    compiler = AD_HSopCompiler(profiler=AD_compileProfiler())
+
+    compiler.compileBlock(blockEnd)
+    path = tmp_path / "compile_trace.json"
+    compiler.profiler.saveTrace(str(path))
+
+    with open(path) as file:
+        trace = json.load(file)
+    events = trace["traceEvents"]
+    for event in events:
+        assert event["ph"] == "X"
+        assert isinstance(event["name"], str)
+        assert event["ts"] >= 0
+        assert event["dur"] >= 0
+        assert isinstance(event["pid"], int)
+        assert isinstance(event["tid"], int)
+    names = {event["name"] for event in events}
+    assert {"discovery", "blockBeginCreation", "compileNodesCreation", "spareInputPlanning", "expressionRewriting"} <= names
+
+def test_debug_output_logged(block, caplog):
+    network, blockBegin, blockEnd = block
+
+    with caplog.at_level(logging.DEBUG, logger="ad_hsopcompiler"):
+        AD_HSopCompiler().compileBlock(blockEnd)
+
+    assert any(record.name == "ad_hsopcompiler" and "nodes in block" in record.getMessage() for record in caplog.records)
+
+def test_debug_output_silent_by_default(block, capsys):
+    network, blockBegin, blockEnd = block
+
+    with pytest.warns(DeprecationWarning):
+        AD_HSopCompiler().compileBlock(blockEnd, debug=True)
+
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,55 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import hou
+from ad_exprtools import analysePythonExpr
+from ad_hsopcompiler import AD_HSopCompiler
+
+def test_references():
+    analysis = analysePythonExpr('g = hou.pwd().input(1).geometry()\n# é\nreturn "é" + hou.pwd().node(\'../box1\').name() + hou.node("/obj/geo1/grid1").name()')
+
+    assert analysis.paths == ("../box1", "/obj/geo1/grid1")
+    assert analysis.inputs == (1,)
+    assert [match.group() for match in analysis.pathMatches] == ["hou.pwd().node('../box1')", 'hou.node("/obj/geo1/grid1")']
+    assert analysePythonExpr("hou.node((").paths == ()
+
+def test_node_reference_parm_with_python_keyframe(block):
+    network, blockBegin, blockEnd = block
+    network.createNode("box")
+    objectMerge = network.createNode("object_merge")
+    objectMerge.setInput(0, blockBegin)
+    blockEnd.setInput(0, objectMerge)
+    objectMerge.parm("objpath1").setKeyframe(hou.Keyframe(1, 'hou.node("../box1").path()', hou.exprLanguage.Python))
+    compiler = AD_HSopCompiler()
+
+    spareInputs = compiler.neededSpareInputs(objectMerge)
+    assert [(spare.node.name(), spare.exists) for spare in spareInputs] == [("box1", False)]
+
+    compiler.compileBlock(blockEnd)
+    assert objectMerge.parm("spare_input0").rawValue() == "../box1"
+    assert objectMerge.parm("objpath1").keyframes()[0].expression() == 'hou.pwd().parm("spare_input0").evalAsNode().path()'
+
+def test_node_reference_parm_with_plain_path(block):
+    network, blockBegin, blockEnd = block
+    network.createNode("box")
+    objectMerge = network.createNode("object_merge")
+    objectMerge.setInput(0, blockBegin)
+    blockEnd.setInput(0, objectMerge)
+    objectMerge.parm("objpath1").set("../box1")
+
+    assert len(AD_HSopCompiler().neededSpareInputs(objectMerge)) == 0
@@ -0,0 +1,91 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+import hou
+from ad_hsopcompiler import AD_HSopCompiler, AD_regexTools
+
+def test_apply_edits():
+    reg = AD_regexTools()
+
+    # Indexes refer to the original string, whatever the order and the replacements lengths
+    assert reg.applyEdits("point(0, 0, \"P\", 0)", [(12, 15, "\"N\""), (6, 7, "-12")]) == "point(-12, 0, \"N\", 0)"
+    assert reg.applyEdits("abcdef", [(0, 1, ""), (1, 3, "XYZ"), (3, 3, "+"), (5, 6, "F")]) == "XYZ+deF"
+    assert reg.applyEdits("abc", []) == "abc"
+
+def test_apply_overlapping_edits():
+    reg = AD_regexTools()
+
+    with pytest.raises(ValueError):
+        reg.applyEdits("abcdef", [(0, 3, "x"), (2, 4, "y")])
+    with pytest.raises(ValueError):
+        reg.applyEdits("abcdef", [(3, 2, "x")])
+
+@pytest.fixture
+def xform(network):
+    """
+    grid1 -> xform1, and box1 which is not connected.
+    """
+
+    grid = network.createNode("grid")
+    network.createNode("box")
+    xform = network.createNode("xform")
+    xform.setInput(0, grid)
+    return xform
+
+def test_keyframes_rewrite(xform):
+    # Both references of the first expression are rewritten, the "P" attribute name is not
+    xform.parm("tx").setKeyframe(hou.Keyframe(1, 'point("../box1", 0, "P", 0) + point(0, 0, "P", 0)'))
+    xform.parm("tx").setKeyframe(hou.Keyframe(10, 'bbox(0, D_XMAX)'))
+
+    AD_HSopCompiler().makeNodeCompilable(xform)
+
+    assert [key.expression() for key in xform.parm("tx").keyframes()] == ['point(-1, 0, "P", 0) + point(-2, 0, "P", 0)', 'bbox(-2, D_XMAX)']
+    assert xform.parm("spare_input0").rawValue() == "../box1"
+    assert xform.parm("spare_input1").rawValue() == "../grid1"
+
+def test_backticks_rewrite(xform):
+    xform.addSpareParmTuple(hou.StringParmTemplate("label", "Label"))
+    xform.parm("label").set('piece_`npoints("../box1")`_`npoints(0)`_"0"')
+
+    AD_HSopCompiler().makeNodeCompilable(xform)
+
+    # Text outside of the backticks is kept
+    assert xform.parm("label").rawValue() == 'piece_`npoints(-1)`_`npoints(-2)`_"0"'
+
+def test_registered_function_rewrite(xform):
+    compiler = AD_HSopCompiler()
+    compiler.signatures.register("mybbox", 0)
+    try:
+        xform.parm("tx").setKeyframe(hou.Keyframe(1, 'mybbox("../box1", D_XMAX) + mybbox(0, D_XMAX)'))
+        compiler.makeNodeCompilable(xform)
+    finally:
+        compiler.signatures.unregister("mybbox")
+
+    # Both geometry arguments of the custom function are replaced by spare inputs
+    assert xform.parm("tx").keyframes()[0].expression() == "mybbox(-1, D_XMAX) + mybbox(-2, D_XMAX)"
+    assert xform.parm("spare_input0").rawValue() == "../box1"
+    assert xform.parm("spare_input1").rawValue() == "../grid1"
+    assert "mybbox" not in compiler.signatures
+
+def test_unregistered_function_input_kept(xform):
+    xform.parm("tx").setKeyframe(hou.Keyframe(1, "mybbox(0, D_XMAX)"))
+
+    AD_HSopCompiler().makeNodeCompilable(xform)
+
+    assert xform.parm("tx").keyframes()[0].expression() == "mybbox(0, D_XMAX)"
+    assert xform.parm("spare_input0") == None
@@ -0,0 +1,88 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+import hou
+from ad_hsopcompiler import AD_HSopCompiler
+
+@pytest.fixture
+def undos(monkeypatch):
+    """
+    A new undo stack holding an "earlier edit" undo, whose performUndo() calls are counted in undos.performed.
+    """
+
+    undos = hou._undos()
+    with undos.group("earlier edit"):
+        pass
+    undos.performed = 0
+    performUndo = undos.performUndo
+    def countedPerformUndo():
+        undos.performed += 1
+        performUndo()
+    undos.performUndo = countedPerformUndo
+    monkeypatch.setattr(hou, "undos", undos)
+    return undos
+
+@pytest.fixture
+def failingEdits(monkeypatch):
+    def applyParmEdits(self, edits, debug=False):
+        raise RuntimeError("edit failed")
+    monkeypatch.setattr(AD_HSopCompiler, "applyParmEdits", applyParmEdits)
+
+def test_rollback_when_apply_fails(block, undos, failingEdits):
+    network, blockBegin, blockEnd = block
+    compiler = AD_HSopCompiler()
+
+    # The outer scope keeps the caches, only the rollback can drop them
+    with compiler.analysisScope():
+        with pytest.raises(RuntimeError):
+            compiler.compileBlock(blockEnd)
+
+        assert compiler._graphs == {}
+        assert compiler._paths == {}
+        assert compiler._expressionParms == {}
+
+    assert undos.performed == 1
+    assert undos.undoLabels() == ("earlier edit",)
+
+def test_nested_rollback_undoes_once(block, undos, failingEdits):
+    network, blockBegin, blockEnd = block
+
+    # compileBlocks edits the scene inside its own sceneEdit, the one of the block is nested in it
+    with pytest.raises(RuntimeError):
+        AD_HSopCompiler().compileBlocks([blockEnd])
+
+    assert undos.performed == 1
+    assert undos.undoLabels() == ("earlier edit",)
+
+def test_nested_scene_edits(network, undos):
+    compiler = AD_HSopCompiler()
+
+    with pytest.raises(RuntimeError):
+        with compiler.sceneEdit("outer"):
+            with compiler.sceneEdit("inner"):
+                network.createNode("null")
+                raise RuntimeError("edit failed")
+
+    assert undos.performed == 1
+    assert undos.undoLabels() == ("earlier edit",)
+
+    # Without an error nothing is undone
+    with compiler.sceneEdit("outer"):
+        network.createNode("null")
+    assert undos.performed == 1
+    assert undos.undoLabels() == ("outer", "earlier edit")
@@ -0,0 +1,83 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+import hou
+from ad_hsopcompiler import AD_HSopCompiler, AD_houInstrumentation
+
+@pytest.fixture
+def xform(network):
+    """
+    grid1 -> xform1, and box1 which is not connected.
+    """
+
+    grid = network.createNode("grid")
+    network.createNode("box")
+    xform = network.createNode("xform")
+    xform.setInput(0, grid)
+    return xform
+
+def test_relative_spare_input_reused(xform):
+    compiler = AD_HSopCompiler()
+    box = xform.node("../box1")
+    compiler.createSpareInputs(xform, ((0, box),))
+    xform.parm("tx").setExpression('bbox("../box1", D_XMAX)')
+
+    neededSpareInputs = compiler.neededSpareInputs(xform)
+
+    # The existing spare input is relative ("../box1"), it is reused instead of adding spare_input1
+    assert xform.parm("spare_input0").rawValue() == "../box1"
+    assert [(spare.path, spare.node, spare.exists) for spare in neededSpareInputs] == [(xform.path() + "/spare_input0", box, True)]
+
+def test_spare_input_numbering_after_ten(xform):
+    compiler = AD_HSopCompiler()
+    network = xform.parent()
+    others = [network.createNode("null") for index in range(11)]
+    compiler.createSpareInputs(xform, tuple(enumerate(others)))
+    xform.parm("tx").setExpression('bbox("../box1", D_XMAX)')
+
+    neededSpareInputs = compiler.neededSpareInputs(xform)
+
+    # spare_input0 to spare_input10 exist, the next one is the max + 1, not the count of the last digit
+    newSpareInputs = [spare for spare in neededSpareInputs if spare.exists == False]
+    assert [(spare.path, spare.number) for spare in newSpareInputs] == [(xform.path() + "/spare_input11", 11)]
+
+def test_referenced_nodes_of_parm(xform):
+    xform.parm("tx").setExpression('bbox("../box1", D_XMAX) + bbox(0, D_XMAX)')
+
+    references = AD_HSopCompiler().referencedNodes(xform.parm("tx"))
+
+    assert [(ref.node, ref.parms) for ref in references] == [(xform.node("../box1"), (xform.parm("tx"),)), (xform.node("../grid1"), (xform.parm("tx"),))]
+
+def test_spare_inputs_created_at_once(xform):
+    network = xform.parent()
+    compiler = AD_HSopCompiler()
+    compiler.createSpareInputs(xform, ((0, network.node("box1")),))
+    for index in range(3):
+        network.createNode("null")
+    xform.parm("tx").setKeyframe(hou.Keyframe(1, 'bbox("../box1", D_XMAX) + bbox("../null1", D_XMAX) + bbox("../null2", D_XMAX) + bbox("../null3", D_XMAX) + bbox(0, D_XMAX)'))
+
+    with AD_houInstrumentation(compiler, ("Node.setParmTemplateGroup", "Node.addSpareParmTuple")) as instrumentation:
+        compiler.makeNodeCompilable(xform)
+    apis = instrumentation.report()["apis"]
+
+    # The four new spare inputs are added with a single parm template group, numbered after spare_input0
+    assert apis["Node.setParmTemplateGroup"]["calls"] == 1
+    assert "Node.addSpareParmTuple" not in apis
+    assert [xform.parm(f"spare_input{number}").rawValue() for number in range(5)] == ["../box1", "../null1", "../null2", "../null3", "../grid1"]
+    assert xform.parm("spare_input5") == None
+    assert xform.parm("tx").keyframes()[0].expression() == "bbox(-1, D_XMAX) + bbox(-2, D_XMAX) + bbox(-3, D_XMAX) + bbox(-4, D_XMAX) + bbox(-5, D_XMAX)"
@@ -0,0 +1,64 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+import hou
+from ad_hsopcompiler import AD_HSopCompiler
+
+@pytest.fixture
+def xform(network):
+    """
+    grid1 -> xform1.
+    """
+
+    grid = network.createNode("grid")
+    xform = network.createNode("xform")
+    xform.setInput(0, grid)
+    return xform
+
+def test_variables_rewrite(xform):
+    xform.parm("tx").setKeyframe(hou.Keyframe(1, '$CEX + ${CEY} + strlen("$CEZ")'))
+    compiler = AD_HSopCompiler()
+
+    spareInputs = compiler.neededSpareInputs(xform)
+    assert [(spare.node.name(), spare.number, spare.exists) for spare in spareInputs] == [("grid1", 0, False)]
+
+    compiler.makeNodeCompilable(xform)
+
+    # $CEZ in a string literal is text, not a variable
+    assert xform.parm("tx").keyframes()[0].expression() == 'centroid(-1, D_X) + centroid(-1, D_Y) + strlen("$CEZ")'
+    assert xform.parm("spare_input0").rawValue() == "../grid1"
+
+def test_variables_in_backticks_only(xform):
+    xform.addSpareParmTuple(hou.StringParmTemplate("label", "Label"))
+    xform.parm("label").set("piece_$CEX_`$SIZEY`")
+
+    AD_HSopCompiler().makeNodeCompilable(xform)
+
+    assert xform.parm("label").rawValue() == "piece_$CEX_`bbox(-1, D_YSIZE)`"
+
+def test_variables_in_plain_text(xform):
+    xform.addSpareParmTuple(hou.StringParmTemplate("label", "Label"))
+    xform.parm("label").set("$CEX ${CEY}")
+    compiler = AD_HSopCompiler()
+
+    assert len(compiler.neededSpareInputs(xform)) == 0
+
+    compiler.makeNodeCompilable(xform)
+
+    assert xform.parm("label").rawValue() == "$CEX ${CEY}"
+    assert xform.parm("spare_input0") == None
@@ -0,0 +1,51 @@
+"""
+Houdini Auto Compile Block
+Copyright 2023 Antoine Danion
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from ad_exprtools import AD_vexLexer
+from ad_hsopcompiler import AD_HSopCompiler
+
+def wrangleBlock(block, snippet):
+    network, blockBegin, blockEnd = block
+    network.createNode("box")
+    wrangle = network.createNode("attribwrangle")
+    wrangle.setInput(0, blockBegin)
+    blockEnd.setInput(0, wrangle)
+    wrangle.parm("snippet").set(snippet)
+    return wrangle
+
+def test_geometry_arguments():
+    snippet = 'string g = "op:../box1"; int n = npoints("op:../box1") + npoints(g); // point("op:../grid1", "P", 0)'
+    lexer = AD_vexLexer()
+
+    assert [match.group(1) for match in lexer.geometryPaths(snippet)] == ["../box1", "../box1"]
+    assert [match.start() for match in lexer.geometryArguments(snippet)] == [snippet.index('"op:../box1")')]
+
+def test_geometry_argument_rewritten_as_spare_input(block):
+    wrangle = wrangleBlock(block, 'v@P += point("op:../box1", "P", 0);')
+
+    AD_HSopCompiler().compileBlock(block[2])
+
+    assert wrangle.parm("snippet").rawValue() == 'v@P += point(-1, "P", 0);'
+    assert wrangle.parm("spare_input0").rawValue() == "../box1"
+
+def test_assigned_path_stays_a_string(block):
+    wrangle = wrangleBlock(block, "string g = 'op:../box1'; int n = npoints(g);")
+
+    AD_HSopCompiler().compileBlock(block[2])
+
+    assert wrangle.parm("snippet").rawValue() == "string g = 'opinput:-1'; int n = npoints(g);"
+    assert wrangle.parm("spare_input0").rawValue() == "../box1"